@@ -0,0 +1,105 @@
+import numpy as np
+import scipy.sparse as sp
+import pandas as pd
+import logging
+from pathlib import Path
+import itertools
+import json
+import os
+import sys
+import argparse
+
+# Ensure src is importable
+sys.path.append(os.path.abspath("."))
+from src.grn.operators import OperatorDistiller
+from src.grn.engine import OperatorEngine
+from src.evaluation.timing import time_call, latency_stats, machine_info
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ENGINES = ("dense", "sparse", "rollout")
+
+def random_operators(n_genes, density, seed=0):
+    """
+    Distilled sigmoid operator of a random GRN with the given edge density.
+    """
+    rng = np.random.default_rng(seed)
+    adjacency = sp.random(n_genes, n_genes, density=density, format="csr", random_state=rng,
+                          data_rvs=lambda n: rng.uniform(-1, 1, n))
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    return OperatorDistiller(activation_fn="sigmoid", format="auto").distill_weights(adjacency)
+
+def benchmark_config(operators, engine_name, n_samples, dtype, n_warmup, n_trials, rollout_steps, seed=0):
+    """
+    Times one (operator, engine, batch size, dtype) configuration.
+    """
+    mode = "dense" if engine_name == "dense" else "sparse" if engine_name == "sparse" else "auto"
+    engine = OperatorEngine(operators, dtype=dtype, mode=mode)
+    n_genes = engine.n_genes
+    data = np.random.default_rng(seed).random((n_samples, n_genes)).astype(dtype)
+
+    if engine_name == "rollout":
+        fn = lambda: engine.rollout(data, rollout_steps)
+        steps = rollout_steps
+    else:
+        fn = lambda: engine.forward(data)
+        steps = 1
+
+    samples_ns = time_call(fn, n_warmup=n_warmup, n_trials=n_trials)
+    stats = latency_stats(samples_ns, n_items=n_samples)
+
+    return {
+        # 'device'/'throughput' match the benchmark CSVs read by visualize_results.py
+        "device": "cpu",
+        "engine": engine_name,
+        "mode": engine.mode,
+        "n_genes": n_genes,
+        "batch_size": n_samples,
+        "density": float(operators["density"]),
+        "dtype": np.dtype(dtype).name,
+        "steps": steps,
+        **stats,
+        "step_throughput": stats["throughput"] * steps,
+        "n_trials": n_trials,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/throughput sweep of the CPU operator engine.")
+    parser.add_argument("--genes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--density", type=float, nargs="+", default=[0.01, 0.1])
+    parser.add_argument("--dtype", nargs="+", default=["float32"], choices=["float32", "float64"])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--rollout-steps", type=int, default=10, help="Steps per timed rollout.")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--output", default="results/benchmarks/cpu_inference.json")
+    parser.add_argument("--csv", action="store_true", help="Also write the records as CSV next to the JSON.")
+    args = parser.parse_args()
+
+    records = []
+    for n_genes, density in itertools.product(args.genes, args.density):
+        operators = random_operators(n_genes, density)
+        for engine_name, n_samples, dtype in itertools.product(args.engines, args.batch, args.dtype):
+            record = benchmark_config(operators, engine_name, n_samples, dtype,
+                                      args.warmup, args.trials, args.rollout_steps)
+            logger.info(f"{engine_name:8s} genes={n_genes:6d} density={density:.3f} batch={n_samples:5d} {dtype}: "
+                        f"p50 {record['p50_ms']:.3f} ms, p99 {record['p99_ms']:.3f} ms, "
+                        f"{record['throughput']:.0f} samples/s")
+            records.append(record)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"machine": machine_info(), "results": records}, f, indent=2)
+    if args.csv:
+        pd.DataFrame(records).to_csv(output.with_suffix(".csv"), index=False)
+
+    print("\n=== CPU Inference Benchmark ===\n")
+    print(pd.DataFrame(records)[["engine", "n_genes", "density", "batch_size", "dtype",
+                                 "p50_ms", "p95_ms", "p99_ms", "throughput"]].to_string())
+
+if __name__ == "__main__":
+    main()
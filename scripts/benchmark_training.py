@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+import itertools
+import resource
+import tracemalloc
+import subprocess
+import time
+import json
+import os
+import sys
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Ensure src is importable
+sys.path.append(os.path.abspath("."))
+from src.data.generator import SyntheticGenerator
+from src.encoding.spike_encoding import SpikeEncoder
+from src.snn.simulation import Trainer
+from src.stdp.generalized_stdp import CausalSTDP
+from src.evaluation.timing import time_call, machine_info
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# dense: reference step loop, event: event-driven (bit-identical), window: event-driven
+# with rank-k windowed STDP
+ENGINES = ("dense", "event", "window")
+
+def make_spike_trains(n_genes, duration_ms, max_freq, n_timepoints=20, seed=0):
+    """
+    Spike trains of one synthetic cohort: SyntheticGenerator dynamics encoded with SpikeEncoder.
+    """
+    gen = SyntheticGenerator(n_genes=n_genes, n_timepoints=n_timepoints, n_cohorts=1, seed=seed)
+    gen.generate_ground_truth_grn()
+    expression = gen.simulate_dynamics()[0]
+    return SpikeEncoder(max_freq=max_freq).encode(expression, duration_ms=duration_ms, seed=seed)
+
+def train_once(spikes, engine, duration_ms, dtype, window):
+    trainer = Trainer(spikes.n_genes, stdp_rule=CausalSTDP(dtype=dtype), dtype=dtype)
+    return trainer, trainer.train_cohort(spikes, duration_ms=duration_ms,
+                                         event_driven=engine != "dense",
+                                         stdp_window=window if engine == "window" else 1)
+
+class PhaseTimer:
+    """
+    Wraps methods of a network/rule instance to accumulate their wall time.
+    Nested phases (clip_touched inside process_event) are reported inclusively.
+    """
+
+    def __init__(self):
+        self.totals = {}
+
+    def wrap(self, obj, method, phase):
+        fn = getattr(obj, method)
+        totals = self.totals
+        totals.setdefault(phase, 0)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals[phase] += time.perf_counter_ns() - start
+
+        setattr(obj, method, timed)
+
+def phase_split(spikes, engine, duration_ms, dtype, window):
+    """
+    Runs one instrumented training and returns the seconds spent per phase.
+    """
+    trainer = Trainer(spikes.n_genes, stdp_rule=CausalSTDP(dtype=dtype), dtype=dtype)
+    network = trainer.network
+    timer = PhaseTimer()
+    timer.wrap(network, "update_traces", "traces")
+    timer.wrap(network, "advance", "traces")
+    timer.wrap(network.stdp, "process_event", "stdp")
+    timer.wrap(network.stdp, "process_window", "stdp")
+    timer.wrap(network.stdp, "clip_touched", "clip")
+
+    start = time.perf_counter_ns()
+    trainer.train_cohort(spikes, duration_ms=duration_ms, event_driven=engine != "dense",
+                         stdp_window=window if engine == "window" else 1)
+    total = time.perf_counter_ns() - start
+
+    totals = timer.totals
+    return {
+        "traces_s": totals["traces"] / 1e9,
+        # STDP excluding the clipping it calls
+        "stdp_s": (totals["stdp"] - totals["clip"]) / 1e9,
+        "clip_s": totals["clip"] / 1e9,
+        "other_s": (total - totals["traces"] - totals["stdp"]) / 1e9,
+    }
+
+def peak_traced_bytes(spikes, engine, duration_ms, dtype, window):
+    """
+    Peak Python/NumPy heap allocation of one training run (tracemalloc).
+    """
+    tracemalloc.start()
+    try:
+        train_once(spikes, engine, duration_ms, dtype, window)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _maxrss_bytes() -> int:
+    # ru_maxrss is in KiB on Linux, in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+def _train_and_report_rss(spikes, engine, duration_ms, dtype, window):
+    train_once(spikes, engine, duration_ms, dtype, window)
+    return _maxrss_bytes()
+
+def peak_rss_bytes(spikes, engine, duration_ms, dtype, window):
+    """
+    Peak resident set size of one training run, measured in a fresh spawned process
+    so earlier (larger) configs do not raise it. Includes the interpreter and imports.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_train_and_report_rss, spikes, engine, duration_ms, dtype, window).result()
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_config(spikes, engine, duration_ms, dtype, window, n_warmup, n_trials, phases):
+    samples_ns = time_call(lambda: train_once(spikes, engine, duration_ms, dtype, window),
+                           n_warmup=n_warmup, n_trials=n_trials)
+    seconds = float(np.median(samples_ns)) / 1e9
+    n_steps = int(duration_ms / spikes.dt)
+    n_spikes = int(np.sum(spikes.compact().steps < n_steps))
+
+    record = {
+        "engine": engine,
+        "n_genes": spikes.n_genes,
+        "duration_ms": duration_ms,
+        "n_steps": n_steps,
+        "n_spikes": n_spikes,
+        "dtype": np.dtype(dtype).name,
+        "stdp_window": window if engine == "window" else 1,
+        "time_s": seconds,
+        "min_time_s": float(np.min(samples_ns)) / 1e9,
+        "steps_per_s": n_steps / seconds,
+        "spikes_per_s": n_spikes / seconds,
+        "peak_traced_mb": peak_traced_bytes(spikes, engine, duration_ms, dtype, window) / 1e6,
+        "peak_rss_mb": peak_rss_bytes(spikes, engine, duration_ms, dtype, window) / 1e6,
+        "n_trials": n_trials,
+    }
+    if phases:
+        record.update(phase_split(spikes, engine, duration_ms, dtype, window))
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description="Training throughput benchmark of the SNN/STDP core.")
+    parser.add_argument("--genes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, nargs="+", default=[1000.0], help="Simulated duration (ms).")
+    parser.add_argument("--max-freq", type=float, nargs="+", default=[100.0], help="Encoder firing rate at expression 1 (Hz).")
+    parser.add_argument("--dtype", nargs="+", default=["float32"], choices=["float32", "float64"])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--window", type=int, default=16, help="STDP window of the 'window' engine.")
+    parser.add_argument("--warmup", type=int, default=0)
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--no-phases", action="store_true", help="Skip the instrumented phase-split run.")
+    parser.add_argument("--output", default="results/benchmarks/training.json")
+    args = parser.parse_args()
+
+    records = []
+    for n_genes, duration_ms, max_freq in itertools.product(args.genes, args.duration, args.max_freq):
+        spikes = make_spike_trains(n_genes, duration_ms, max_freq)
+        for engine, dtype in itertools.product(args.engines, args.dtype):
+            record = benchmark_config(spikes, engine, duration_ms, dtype, args.window,
+                                      args.warmup, args.trials, not args.no_phases)
+            record["max_freq"] = max_freq
+            logger.info(f"{engine:6s} genes={n_genes:6d} duration={duration_ms:.0f}ms rate={max_freq:.0f}Hz {dtype}: "
+                        f"{record['time_s']:.3f}s, {record['steps_per_s']:.0f} steps/s, "
+                        f"{record['spikes_per_s']:.0f} spikes/s")
+            records.append(record)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"machine": machine_info(), "revision": git_revision(), "results": records}, f, indent=2)
+
+    columns = ["engine", "n_genes", "duration_ms", "max_freq", "dtype", "time_s", "steps_per_s", "spikes_per_s", "peak_traced_mb", "peak_rss_mb"]
+    if not args.no_phases:
+        columns += ["traces_s", "stdp_s", "clip_s"]
+    print("\n=== Training Benchmark ===\n")
+    print(pd.DataFrame(records)[columns].to_string())
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,21 @@
 import pandas as pd
-import requests
-from Bio import Entrez
 import logging
-from typing import List, Dict
-import time
-import json
+from typing import List, Dict, Optional
+import argparse
+import os
+import sys
+
+# Ensure src is importable
+sys.path.append(os.path.abspath("."))
+from src.utils.http import HttpClient, get_client, BIOSTUDIES_BASE_URL, HTTP_CACHE_DIR
+from src.utils.dataset_fetchers import fetch_metadata_batch
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Constants
-ENTREZ_EMAIL = "kora_agent@example.com"  # Using a placeholder as per plan
+DATASET_INDEX_PATH = "data/dataset_index.csv"
 DISEASE_TERMS = [
     "Alzheimer's Disease",
     "Parkinson's Disease",
@@ -20,11 +24,11 @@ DISEASE_TERMS = [
     "Frontotemporal Dementia"
 ]
 
-def search_geo(term: str, retmax: int = 20) -> List[Dict]:
+def search_geo(term: str, retmax: int = 20, client: Optional[HttpClient] = None) -> List[Dict]:
     """
-    Searches GEO via Entrez for human expression data.
+    Searches GEO via the E-utilities JSON API for human expression data.
     """
-    Entrez.email = ENTREZ_EMAIL
+    client = client or get_client()
     
     # Query: term AND "Homo sapiens"[Organism] AND "Expression profiling by array"[DataSet Type] OR "Expression profiling by high throughput sequencing"[DataSet Type]
     # Simplified for robust hits: term AND "Homo sapiens"[Organism] AND "gse"[Entry Type]
@@ -33,11 +37,9 @@ def search_geo(term: str, retmax: int = 20) -> List[Dict]:
     logger.info(f"Searching GEO for: {term}")
     
     try:
-        handle = Entrez.esearch(db="gds", term=query, retmax=retmax, usehistory="y")
-        results = Entrez.read(handle)
-        handle.close()
+        results = client.eutils("esearch", db="gds", term=query, retmax=retmax)
         
-        id_list = results["IdList"]
+        id_list = results.get("esearchresult", {}).get("idlist", [])
         if not id_list:
             return []
             
@@ -45,20 +47,13 @@ def search_geo(term: str, retmax: int = 20) -> List[Dict]:
         # Note: GDS db returns GDS IDs or GSE IDs depending on query. 
         # Usually for 'gse'[Entry Type], we get GDS uids that link to GSE.
         # Let's try to search 'gds' database but look for GSE accessions in summary.
-        
-        webenv = results["WebEnv"]
-        query_key = results["QueryKey"]
-        
-        handle = Entrez.esummary(db="gds", query_key=query_key, WebEnv=webenv)
-        summaries = Entrez.read(handle)
-        handle.close()
+        summaries = client.eutils("esummary", db="gds", id=",".join(id_list)).get("result", {})
         
         dataset_list = []
-        for doc in summaries:
-            # Extract relevant fields
-            # doc is a dict. Structure varies.
-            # Look for 'Accession' usually starting with GSE
-            accession = doc.get("Accession", "")
+        for uid in summaries.get("uids", []):
+            doc = summaries.get(uid, {})
+            # Look for 'accession' usually starting with GSE
+            accession = doc.get("accession", "")
             if not accession.startswith("GSE"):
                 continue
                 
@@ -67,7 +62,7 @@ def search_geo(term: str, retmax: int = 20) -> List[Dict]:
                 "repository": "GEO",
                 "disease_term": term,
                 "num_samples_estimate": doc.get("n_samples", "Unknown"),
-                "data_type": doc.get("gdsType", "Unknown"), # e.g., 'Expression profiling by array'
+                "data_type": doc.get("gdstype", "Unknown"), # e.g., 'Expression profiling by array'
                 "metadata_source": "Entrez",
                 "raw_link_endpoint": f"https://www.ncbi.nlm.nih.gov/geo/query/acc.cgi?acc={accession}"
             })
@@ -78,11 +73,12 @@ def search_geo(term: str, retmax: int = 20) -> List[Dict]:
         logger.error(f"Error searching GEO for {term}: {e}")
         return []
 
-def search_arrayexpress(term: str) -> List[Dict]:
+def search_arrayexpress(term: str, client: Optional[HttpClient] = None) -> List[Dict]:
     """
     Searches ArrayExpress/BioStudies via REST API.
     """
-    base_url = "https://www.ebi.ac.uk/biostudies/api/v1/search"
+    client = client or get_client()
+    base_url = f"{BIOSTUDIES_BASE_URL}/search"
     
     # Query structure
     params = {
@@ -94,9 +90,7 @@ def search_arrayexpress(term: str) -> List[Dict]:
     logger.info(f"Searching ArrayExpress for: {term}")
     
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = client.get_json(base_url, params=params)
         
         dataset_list = []
         for hit in data.get("hits", []):
@@ -131,27 +125,64 @@ def search_arrayexpress(term: str) -> List[Dict]:
         logger.error(f"Error searching ArrayExpress for {term}: {e}")
         return []
 
-def main():
-    all_datasets = []
+def discover(terms: List[str], client: Optional[HttpClient] = None) -> pd.DataFrame:
+    """
+    Runs the GEO and ArrayExpress searches of all terms concurrently.
+    Requests share the client's per-host rate limits, so no courtesy delays are needed.
+    """
+    client = client or get_client()
+    searches = [(search_geo, term) for term in terms] + [(search_arrayexpress, term) for term in terms]
+    hits = client.map(lambda search: search[0](search[1], client=client), searches)
     
-    for term in DISEASE_TERMS:
-        # GEO
-        geo_hits = search_geo(term)
-        all_datasets.extend(geo_hits)
-        time.sleep(1) # Courtesy delay
-        
-        # ArrayExpress
-        ae_hits = search_arrayexpress(term)
-        all_datasets.extend(ae_hits)
-        time.sleep(1)
-        
-    # Convert to DataFrame
+    all_datasets = [d for term_hits in hits for d in term_hits]
     df = pd.DataFrame(all_datasets)
     
     # Remove duplicates (some studies cover multiple terms)
-    df = df.drop_duplicates(subset=["accession"])
+    if not df.empty:
+        df = df.drop_duplicates(subset=["accession"])
+    return df
+
+def refresh_index(df: pd.DataFrame, client: Optional[HttpClient] = None) -> pd.DataFrame:
+    """
+    Re-fetches the metadata of every indexed dataset concurrently and updates the
+    sample counts (and GEO data types). Rows whose fetch fails are kept unchanged.
+    Cached responses are bypassed, so counts are current.
+    """
+    entries = list(zip(df["accession"], df["repository"]))
+    logger.info(f"Refreshing metadata of {len(entries)} datasets...")
+    # min_samples=0: refresh every row, filtering happens at download time
+    records = fetch_metadata_batch(entries, client=client, min_samples=0, use_cache=False)
+    
+    df = df.copy()
+    df["num_samples_estimate"] = df["num_samples_estimate"].astype(object)
+    n_updated = 0
+    for i, record in zip(df.index, records):
+        if record is None:
+            continue
+        if record.get("n_samples"):
+            df.at[i, "num_samples_estimate"] = record["n_samples"]
+        if record.get("data_type"):
+            df.at[i, "data_type"] = record["data_type"]
+        n_updated += 1
+    logger.info(f"Refreshed {n_updated} of {len(entries)} datasets")
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover transcriptomics datasets in GEO and ArrayExpress.")
+    parser.add_argument("--refresh", action="store_true", 
+                        help=f"Re-fetch the metadata of the datasets in {DATASET_INDEX_PATH} instead of searching.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests (rate limits still apply).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache.")
+    args = parser.parse_args()
+    
+    client = HttpClient(cache_dir=None if args.no_cache else HTTP_CACHE_DIR, max_workers=args.workers)
+    
+    output_path = DATASET_INDEX_PATH
+    if args.refresh:
+        df = refresh_index(pd.read_csv(output_path), client=client)
+    else:
+        df = discover(DISEASE_TERMS, client=client)
     
-    output_path = "data/dataset_index.csv"
     df.to_csv(output_path, index=False)
     logger.info(f"Saved {len(df)} unique datasets to {output_path}")
     
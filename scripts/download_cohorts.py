@@ -1,14 +1,13 @@
 import pandas as pd
-import GEOparse
 import logging
 from pathlib import Path
 import os
-import shutil
 import argparse
-import subprocess
 import re
-import urllib.request
-from src.utils.dataset_fetchers import fetch_metadata
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import instrumentation
+from src.utils.downloads import DownloadManager, DownloadManifest
+from src.utils.soft_store import read_series
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,48 +20,28 @@ def sanitize_dirname(name):
         return "Uncategorized"
     return name.replace(" ", "_").replace("'", "").replace("/", "_")
 
-def get_remote_file_size(url):
-    try:
-        req = urllib.request.Request(url, method='HEAD')
-        with urllib.request.urlopen(req, timeout=10) as response:
-            size = response.headers.get('Content-Length')
-            if size:
-                return int(size)
-            return 0
-    except Exception as e:
-        logger.warning(f"Could not check size for {url}: {e}")
-        return 0
-
-def download_file_wget(url, dest_path):
-    if dest_path.exists():
-        logger.info(f"Skipping {dest_path.name}: Already exists.")
-        return True
-
-    size = get_remote_file_size(url)
-    if size > SIZE_LIMIT_BYTES:
-        logger.warning(f"Skipping {url}: Size {size/1024/1024:.2f}MB exceeds 500MB limit.")
-        return False
-
-    try:
-        cmd = ["wget", "-q", "-O", str(dest_path), url]
-        subprocess.check_call(cmd)
-        logger.info(f"Downloaded {dest_path.name}")
-        return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Failed to download {url}: {e}")
-        return False
-    except FileNotFoundError:
-        logger.error("wget not found.")
-        return False
+def geo_soft_url(accession):
+    """
+    URL of a series' family SOFT file in GEO's HTTPS mirror of its FTP tree.
+    """
+    stub = accession[:-3] + "nnn" if len(accession) > 6 else "GSEnnn"
+    return f"https://ftp.ncbi.nlm.nih.gov/geo/series/{stub}/{accession}/soft/{accession}_family.soft.gz"
 
-def download_supp_files(gse, dest_dir: Path):
-    supp_files = gse.metadata.get("supplementary_file", [])
+def download_supp_files(metadata, dest_dir: Path, manager: DownloadManager):
+    """
+    Downloads the useful supplementary files listed in a series' metadata concurrently.
+    
+    Returns:
+        True if every selected file was downloaded (or skipped for its size).
+    """
+    supp_files = metadata.get("supplementary_file", [])
     if isinstance(supp_files, str):
         supp_files = [supp_files]
         
     logger.info(f"Found {len(supp_files)} supplementary files.")
     useful_patterns = [r"count", r"matrix", r"fpkm", r"tpm", r"norm", r"expression", r"raw"]
     
+    wanted = []
     for url in supp_files:
         filename = url.split("/")[-1]
         # Skip raw sequencing reads explicitly
@@ -80,31 +59,19 @@ def download_supp_files(gse, dest_dir: Path):
              
         if is_useful:
             logger.info(f"Attempting download: {filename}")
-            download_file_wget(url, dest_dir / filename)
+            wanted.append((url, dest_dir / filename))
+    
+    results = manager.download_many(wanted)
+    return all(r["status"] != "failed" for r in results)
 
 def is_fully_downloaded(dest_dir):
     """
-    Checks if SOFT file exists and (if RNA-seq) at least one supplementary file exists.
+    Checks the directory's download manifest: the dataset was marked complete and
+    none of its recorded files is missing or changed size.
     """
-    soft = list(dest_dir.glob("*_family.soft.gz"))
-    if not soft:
-        return False
-        
-    # Heuristic: If we have SOFT, we *might* be done if it's microarray.
-    # But if we started downloading supp files, we want to know.
-    # Simple check: If folder has > 1 file (SOFT + something else), treat as downloaded.
-    # Or just rely on `download_file_wget` skipping existing files.
-    # The user asked to "don't download the dataset which is already downloaded" meaning SKIP THE PROCESSING steps too.
-    
-    # Let's say if SOFT exists, we assume we tried. 
-    # But for RNA-seq we need supps.
-    
-    files = list(dest_dir.glob("*"))
-    if len(files) > 1: 
-        return True
-    return False
+    return DownloadManifest(dest_dir).is_complete()
 
-def process_dataset(accession, disease, dest_dir):
+def process_dataset(accession, disease, dest_dir, manager: DownloadManager):
     if accession in BLACKLIST:
         logger.info(f"Skipping {accession}: Blacklisted.")
         return
@@ -118,16 +85,15 @@ def process_dataset(accession, disease, dest_dir):
     soft_path = dest_dir / f"{accession}_family.soft.gz"
     
     try:
-        if not soft_path.exists():
-            try:
-                gse = GEOparse.get_GEO(geo=accession, destdir=str(dest_dir), silent=True)
-            except Exception as e:
-                logger.error(f"SOFT download failed for {accession}: {e}")
-                return
-        else:
-            gse = GEOparse.get_GEO(filepath=str(soft_path), silent=True)
+        result = manager.download(geo_soft_url(accession), soft_path)
+        if result["status"] != "downloaded" and result["status"] != "cached":
+            logger.error(f"SOFT download failed for {accession}: {result['error'] or result['status']}")
+            return
+        # Parsed once here; later stages read the stored copy
+        metadata = read_series(soft_path, accession)["metadata"]
             
-        download_supp_files(gse, dest_dir)
+        if download_supp_files(metadata, dest_dir, manager):
+            DownloadManifest(dest_dir).mark_complete()
 
     except Exception as e:
         logger.error(f"Failed to process {accession}: {e}")
@@ -137,7 +103,11 @@ def main():
     parser.add_argument("--index", default="data/dataset_index.csv", help="Path to dataset index.")
     parser.add_argument("--limit", type=int, default=20, help="Max datasets per disease.")
     parser.add_argument("--output_dir", default="data/raw/GEO", help="Output directory root.")
+    parser.add_argument("--workers", type=int, default=4, help="Datasets processed concurrently.")
+    parser.add_argument("--downloads", type=int, default=4, help="Maximum concurrent file transfers.")
+    instrumentation.add_arguments(parser)
     args = parser.parse_args()
+    instrumentation.configure_from_args(args)
     
     if not os.path.exists(args.index):
         logger.error(f"Index file {args.index} not found.")
@@ -147,27 +117,30 @@ def main():
     df_geo = df[df["repository"] == "GEO"]
     grouped = df_geo.groupby("disease_term")
     
+    datasets = []
     for disease, group in grouped:
         if any(term in disease for term in ["Alzheimer", "Amyotrophic", "Frontotemporal", "Huntington", "Parkinson"]):
             logger.info(f"Skipping {disease} as requested.")
             continue
             
         safe_disease = sanitize_dirname(disease)
-        logger.info(f"=== {disease} ===")
         
-        count = 0
-        for _, row in group.iterrows():
-            if count >= args.limit:
-                break
-                
-            accession = row["accession"]
+        for accession in group["accession"].iloc[:args.limit]:
             dest_dir = Path(args.output_dir) / safe_disease / accession
             dest_dir.mkdir(parents=True, exist_ok=True)
-            
-            process_dataset(accession, disease, dest_dir)
-            
-            # Count only if we actually processed or if it was already valid
-            count += 1
+            datasets.append((accession, disease, dest_dir))
+    
+    # Transfers of all datasets share the manager's bounded pool; the SOFT parsing of
+    # one dataset overlaps the downloads of the others.
+    manager = DownloadManager(max_workers=args.downloads, size_limit=SIZE_LIMIT_BYTES)
+
+    def run(dataset):
+        with instrumentation.stage("process_dataset", key=dataset[0]):
+            process_dataset(*dataset, manager)
+
+    with instrumentation.stage("download_cohorts", n_datasets=len(datasets)):
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(run, datasets))
             
     logger.info("Batch download complete.")
 
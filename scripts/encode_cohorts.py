@@ -2,13 +2,17 @@ import pandas as pd
 import numpy as np
 import logging
 from pathlib import Path
-import pickle
 import sys
 import os
+import argparse
 
 # Ensure src is importable
 sys.path.append(".")
 from src.encoding.spike_encoding import SpikeEncoder
+from src.encoding.spike_trains import SpikeTrains
+from src.utils.parallel import run_jobs
+from src.utils import instrumentation
+from src.utils.io import read_expression
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -41,16 +45,15 @@ def encode_cohort(accession, disease):
 
     output_dir = Path(f"data/spikes/{accession}")
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / "spikes.pkl"
     
-    if output_path.exists():
+    if SpikeTrains.exists(output_dir) or (output_dir / "spikes.pkl").exists():
         logger.info(f"Skipping {accession}: Spikes already exist.")
         return
 
     logger.info(f"Encoding {accession}...")
     
     try:
-        df = pd.read_csv(input_path, index_col=0)
+        df = read_expression(input_path)
         
         # 1. Normalize to [0, 1] for rate encoding
         # Global min/max for the cohort to preserve relative expression differences
@@ -85,23 +88,29 @@ def encode_cohort(accession, disease):
         
         spikes = encoder.encode(data, duration_ms=duration_ms)
         
-        # Save
-        with open(output_path, "wb") as f:
-            pickle.dump(spikes, f)
+        # Save as a memory-mappable spike store (spike_steps.npy + spike_offsets.npy)
+        spikes.save(output_dir)
             
-        logger.info(f"Encoded {accession}: {len(spikes)} neurons, {duration_ms} ms")
+        logger.info(f"Encoded {accession}: {len(spikes)} neurons, {spikes.n_spikes} spikes, {duration_ms} ms")
         
     except Exception as e:
         logger.error(f"Failed to encode {accession}: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Encode normalized cohorts into spike trains.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cohorts processed in parallel.")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker process.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+    
     registry_path = "data/cohort_index.csv"
     if not os.path.exists(registry_path):
         return
         
     df = pd.read_csv(registry_path)
-    for _, row in df.iterrows():
-        encode_cohort(row["accession"], row["disease"])
+    jobs = [{"key": acc, "args": (acc, disease)} for acc, disease in zip(df["accession"], df["disease"])]
+    run_jobs(encode_cohort, jobs, n_workers=args.workers, blas_threads=args.blas_threads)
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,24 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 import logging
 from pathlib import Path
 import json
 import os
 import gc
+import sys
+import argparse
+
+# Ensure src is importable
+sys.path.append(os.path.abspath("."))
+from src.utils.parallel import run_jobs
+from src.utils import instrumentation
+from src.grn.infer_grn import StreamingGRNExtractor
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def extract_grn(accession):
+def extract_grn(accession, dense_csv=False, top_k=None):
     res_dir = Path(f"results/{accession}")
     weights_path = res_dir / "weights" / "trained_weights.npy"
     genes_path = res_dir / "weights" / "gene_names.json"
@@ -21,8 +30,8 @@ def extract_grn(accession):
     logger.info(f"Extracting GRN for {accession}...")
     
     try:
-        # 1. Load weights and gene names
-        W = np.load(weights_path)
+        # 1. Open weights (memory-mapped, read in row blocks) and gene names
+        W = StreamingGRNExtractor.open(weights_path)
         with open(genes_path, "r") as f:
             gene_names = json.load(f)
             
@@ -30,38 +39,35 @@ def extract_grn(accession):
         # Standardize weights or use simple threshold
         # Causal STDP weights: rows = pre (source), cols = post (target)
         # W[i, j] is strength of i -> j
+        extractor = StreamingGRNExtractor(k_std=2.0, top_k=top_k) # Conservative
+        threshold = extractor.threshold(W) if top_k is None else None
         
-        abs_W = np.abs(W)
-        mean_w = np.mean(abs_W)
-        std_w = np.std(abs_W)
-        threshold = mean_w + 2 * std_w # Conservative
-        
-        # 3. Create Adjacency
-        adj_mask = abs_W > threshold
-        # Preserve sign and magnitude for the adjacency matrix
-        adj_matrix = np.where(adj_mask, W, 0)
+        # 3. Create Adjacency (sparse, sign and magnitude preserved)
+        edges = extractor.extract_edges(W, threshold)
+        sources, targets = edges["sources"], edges["targets"]
+        edge_weights = edges["weights"]
+        adj_matrix = sp.csr_matrix((edge_weights, (sources, targets)), shape=W.shape)
         
-        # 4. Save Adjacency CSV
-        adj_df = pd.DataFrame(adj_matrix, index=gene_names, columns=gene_names)
+        # 4. Save Adjacency (rows/cols ordered as weights/gene_names.json)
         grn_dir.mkdir(parents=True, exist_ok=True)
-        adj_df.to_csv(grn_dir / "adjacency.csv")
+        sp.save_npz(grn_dir / "adjacency.npz", adj_matrix)
+        
+        if dense_csv:
+            adj_df = pd.DataFrame(adj_matrix.toarray(), index=gene_names, columns=gene_names)
+            adj_df.to_csv(grn_dir / "adjacency.csv")
         
         # 5. Save Edge List TSV
-        sources, targets = np.where(adj_mask)
-        edges = []
-        for s, t in zip(sources, targets):
-            edges.append({
-                "source": gene_names[s],
-                "target": gene_names[t],
-                "weight": float(W[s, t]),
-                "type": "activation" if W[s, t] > 0 else "repression"
-            })
-            
-        edges_df = pd.DataFrame(edges)
+        names = np.asarray(gene_names, dtype=object)
+        edges_df = pd.DataFrame({
+            "source": names[sources],
+            "target": names[targets],
+            "weight": edge_weights.astype(float),
+            "type": np.where(edge_weights > 0, "activation", "repression")
+        })
         edges_df.to_csv(grn_dir / "edges.tsv", sep="\t", index=False)
         
-        logger.info(f"Saved GRN for {accession}: {len(edges)} edges")
-        return len(edges)
+        logger.info(f"Saved GRN for {accession}: {len(edges_df)} edges")
+        return len(edges_df)
         
     except Exception as e:
         logger.error(f"Failed to extract GRN for {accession}: {e}")
@@ -70,6 +76,15 @@ def extract_grn(accession):
         gc.collect()
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract GRNs from trained SNN weights.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cohorts processed in parallel.")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker process.")
+    parser.add_argument("--dense-csv", action="store_true", help="Also write the dense n x n adjacency.csv.")
+    parser.add_argument("--top-k", type=int, default=None, help="Keep the top-k incoming edges per target instead of thresholding.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+    
     registry_path = "data/cohort_index.csv"
     if not os.path.exists(registry_path):
         return
@@ -77,10 +92,19 @@ def main():
     df = pd.read_csv(registry_path)
     summary = []
     
+    jobs = []
     for acc in df["accession"]:
-        n_edges = extract_grn(acc)
+        weights_path = Path(f"results/{acc}/weights/trained_weights.npy")
+        # Weights are streamed in row blocks; the dense CSV needs the full matrix
+        memory = 0
+        if weights_path.exists() and args.dense_csv:
+            memory = 2 * weights_path.stat().st_size
+        jobs.append({"key": acc, "args": (acc, args.dense_csv, args.top_k), "memory_bytes": memory})
+        
+    for record in run_jobs(extract_grn, jobs, n_workers=args.workers, blas_threads=args.blas_threads):
+        n_edges = record["result"]
         if n_edges is not None:
-            summary.append({"accession": acc, "n_edges": n_edges})
+            summary.append({"accession": record["key"], "n_edges": n_edges})
             
     summary_df = pd.DataFrame(summary)
     print("\n=== GRN Extraction Summary ===\n")
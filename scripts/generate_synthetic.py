@@ -1,4 +1,5 @@
 import logging
+import argparse
 from pathlib import Path
 import numpy as np
 import pandas as pd
@@ -7,12 +8,39 @@ from src.data.generator import SyntheticGenerator
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def generate_streamed(c, out_dir, chunk_size, workers):
+    """
+    Large synthetic set: cohorts are simulated in chunks straight into a float32
+    memory-mapped expression_data.npy. No expression.csv is written at this size.
+    """
+    gen = SyntheticGenerator(
+        n_genes=c["n_genes"], 
+        n_timepoints=c["n_timepoints"], 
+        n_cohorts=c["n_cohorts"],
+        seed=sum(ord(char) for char in c["id"])
+    )
+    gen.generate_ground_truth_grn()
+    data = gen.simulate_dynamics_chunked(out_dir / "expression_data.npy", chunk_size=chunk_size, n_workers=workers)
+    gen.save_ground_truth(out_dir)
+    gen.save_samples(out_dir, data)
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic cohorts with a known GRN.")
+    parser.add_argument("--stream", action="store_true", 
+                        help="Simulate in chunks into a memory-mapped .npy (for sets that do not fit in memory).")
+    parser.add_argument("--n-genes", type=int, default=100)
+    parser.add_argument("--n-cohorts", type=int, default=50)
+    parser.add_argument("--n-timepoints", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=256, help="Cohorts per chunk in --stream mode.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes in --stream mode.")
+    args = parser.parse_args()
+    
     # Define synthetic cohorts to generate
+    sizes = {"n_genes": args.n_genes, "n_cohorts": args.n_cohorts, "n_timepoints": args.n_timepoints}
     cohorts = [
-        {"id": "SYNTH_AD_001", "n_genes": 100, "n_cohorts": 50, "n_timepoints": 50},
-        {"id": "SYNTH_PD_001", "n_genes": 100, "n_cohorts": 50, "n_timepoints": 50},
-        {"id": "SYNTH_ALS_001", "n_genes": 100, "n_cohorts": 50, "n_timepoints": 50},
+        {"id": "SYNTH_AD_001", **sizes},
+        {"id": "SYNTH_PD_001", **sizes},
+        {"id": "SYNTH_ALS_001", **sizes},
     ]
     
     processed_dir = Path("data/processed/synthetic")
@@ -24,6 +52,11 @@ def main():
         out_dir = processed_dir / cid
         out_dir.mkdir(parents=True, exist_ok=True)
         
+        if args.stream:
+            generate_streamed(c, out_dir, args.chunk_size, args.workers)
+            logger.info(f"Generated {cid} (streamed)")
+            continue
+        
         # Initialize generator
         gen = SyntheticGenerator(
             n_genes=c["n_genes"], 
@@ -3,11 +3,16 @@ import logging
 from pathlib import Path
 import sys
 import os
+import argparse
 
 # Add src to path
 sys.path.append(os.path.abspath("."))
 
 from src.utils.gene_mapping import map_ensembl_to_symbol, map_probes_to_symbol, map_entrez_to_symbol
+from src.utils.gene_cache import GeneMappingCache, OFFLINE_ENV
+from src.utils.parallel import run_jobs
+from src.utils import instrumentation
+from src.utils.io import read_expression, write_expression
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -38,7 +43,7 @@ def harmonize_dataset(accession, disease):
 
     logger.info(f"Harmonizing {accession}...")
     try:
-        df = pd.read_csv(input_path, index_col=0)
+        df = read_expression(input_path)
     except Exception as e:
         logger.error(f"Could not read {input_path}: {e}")
         return
@@ -68,7 +73,7 @@ def harmonize_dataset(accession, disease):
         likely_symbols = all(not c.isdigit() for c in sample_ids[:10]) and len(sample_ids) > 0
         if likely_symbols:
             logger.info(f"{accession} might already be using symbols. Saving as is.")
-            df.to_csv(output_path)
+            write_expression(df, output_path)
         return
 
     # Apply mapping
@@ -91,9 +96,25 @@ def harmonize_dataset(accession, disease):
     df_final = df_subset.groupby(df_subset.columns, axis=1).mean()
     
     logger.info(f"Mapped {len(df.columns)} features -> {len(df_final.columns)} genes.")
-    df_final.to_csv(output_path)
+    write_expression(df_final, output_path)
 
 def main():
+    parser = argparse.ArgumentParser(description="Harmonize gene identifiers to HGNC symbols.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cohorts processed in parallel.")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker process.")
+    parser.add_argument("--offline", action="store_true", help="Map IDs from the local gene cache only (no mygene.info queries).")
+    parser.add_argument("--import-gene-dump", default=None, 
+                        help="Import an HGNC/Ensembl gene table into the local gene cache before mapping.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+    
+    if args.offline:
+        # Environment, so spawned workers inherit it
+        os.environ[OFFLINE_ENV] = "1"
+    if args.import_gene_dump:
+        GeneMappingCache().import_dump(args.import_gene_dump)
+    
     index_path = "data/cohort_index.csv"
     if not os.path.exists(index_path):
         logger.error("Cohort index not found.")
@@ -101,8 +122,8 @@ def main():
         
     df_index = pd.read_csv(index_path)
     
-    for _, row in df_index.iterrows():
-        harmonize_dataset(row["accession"], row["disease"])
+    jobs = [{"key": acc, "args": (acc, disease)} for acc, disease in zip(df_index["accession"], df_index["disease"])]
+    run_jobs(harmonize_dataset, jobs, n_workers=args.workers, blas_threads=args.blas_threads)
 
 if __name__ == "__main__":
     main()
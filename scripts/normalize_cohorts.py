@@ -3,6 +3,14 @@ import numpy as np
 import logging
 from pathlib import Path
 import os
+import sys
+import argparse
+
+# Ensure src is importable
+sys.path.append(os.path.abspath("."))
+from src.utils.parallel import run_jobs
+from src.utils import instrumentation
+from src.utils.io import read_expression, write_expression
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -40,7 +48,7 @@ def process_cohort(accession, disease):
 
     logger.info(f"Normalizing {accession}...")
     try:
-        df = pd.read_csv(input_path, index_col=0)
+        df = read_expression(input_path)
     except Exception as e:
         logger.error(f"Failed to read {input_path}: {e}")
         return
@@ -80,17 +88,24 @@ def process_cohort(accession, disease):
         method = "Log2(x+1)"
 
     # Save
-    df.to_csv(output_path)
+    write_expression(df, output_path)
     logger.info(f"Saved {accession} normalized matrix. Method: {method}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Log-normalize harmonized cohorts.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cohorts processed in parallel.")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker process.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+    
     registry_path = "data/cohort_index.csv"
     if not os.path.exists(registry_path):
         return
     
     df = pd.read_csv(registry_path)
-    for _, row in df.iterrows():
-        process_cohort(row["accession"], row["disease"])
+    jobs = [{"key": acc, "args": (acc, disease)} for acc, disease in zip(df["accession"], df["disease"])]
+    run_jobs(process_cohort, jobs, n_workers=args.workers, blas_threads=args.blas_threads)
 
 if __name__ == "__main__":
     main()
@@ -8,12 +8,17 @@ import os
 import gc
 import json
 import yaml
+import argparse
 
 # Ensure src is importable
 sys.path.append(os.path.abspath("."))
 
 from src.snn.simulation import Trainer
 from src.stdp.generalized_stdp import CausalSTDP
+from src.encoding.spike_trains import SpikeTrains
+from src.utils.parallel import run_jobs
+from src.utils import instrumentation
+from src.utils.io import read_expression
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,6 +32,19 @@ def load_config():
             return yaml.safe_load(f)
     return {}
 
+def estimate_training_memory(accession, config):
+    """
+    Rough peak memory (bytes) of training one cohort: the weight matrix, its returned
+    copy and STDP temporaries, i.e. about 3 n x n matrices of the training dtype.
+    """
+    meta_path = Path(f"data/spikes/{accession}/spike_meta.json")
+    n_genes = MAX_NEURONS
+    if meta_path.exists():
+        with open(meta_path, "r") as f:
+            n_genes = min(json.load(f)["n_genes"], MAX_NEURONS)
+    itemsize = np.dtype(config.get("training", {}).get("dtype", "float64")).itemsize
+    return 3 * n_genes * n_genes * itemsize
+
 def train_cohort(accession, disease, config):
     if accession == "GSE301585" or accession == "GSE311578":
         logger.info(f"Skipping {accession}: Blacklisted (Too large/missing spikes).")
@@ -47,9 +65,10 @@ def train_cohort(accession, disease, config):
     if not input_csv.exists():
         input_csv = processed_dir / "expression.csv" # Fallback
         
-    spike_path = Path(f"data/spikes/{accession}/spikes.pkl")
+    spike_dir = Path(f"data/spikes/{accession}")
+    legacy_spike_path = spike_dir / "spikes.pkl"
     
-    if not spike_path.exists():
+    if not SpikeTrains.exists(spike_dir) and not legacy_spike_path.exists():
         logger.warning(f"Skipping {accession}: No spikes found.")
         return
 
@@ -69,12 +88,18 @@ def train_cohort(accession, disease, config):
     
     try:
         # Load expression to find HVGs if needed
-        df = pd.read_csv(input_csv, index_col=0)
+        df = read_expression(input_csv)
         n_orig_genes = df.shape[1]
         
-        # Load spikes
-        with open(spike_path, "rb") as f:
-            all_spikes = pickle.load(f)
+        dt = config.get("training", {}).get("dt", 1.0)
+        
+        # Open spikes memory-mapped; only the selected genes are read below.
+        # Older encodings are pickled lists of per-gene arrays.
+        if SpikeTrains.exists(spike_dir):
+            all_spikes = SpikeTrains.load(spike_dir, mmap_mode="r")
+        else:
+            with open(legacy_spike_path, "rb") as f:
+                all_spikes = SpikeTrains.from_times(pickle.load(f), dt=dt)
             
         selected_indices = list(range(n_orig_genes))
         
@@ -83,33 +108,35 @@ def train_cohort(accession, disease, config):
             # HVG selection
             variances = df.var(axis=0)
             selected_indices = np.argsort(variances)[-MAX_NEURONS:].values
-            # Filter spikes
-            spikes = [all_spikes[i] for i in selected_indices]
+            # Filter spikes (single gather over the per-gene bounds)
+            spikes = all_spikes.select(selected_indices)
             n_genes = MAX_NEURONS
         else:
             spikes = all_spikes
             n_genes = n_orig_genes
             
+        # Read the selected slices into memory
+        spikes = spikes.compact()
+            
         # Initialize STDP from config
         stdp_params = config.get("training", {}).get("stdp", {})
+        dtype = np.dtype(config.get("training", {}).get("dtype", "float64"))
         stdp_rule = CausalSTDP(
             learning_rate=stdp_params.get("learning_rate", 0.01),
             tau_plus=stdp_params.get("tau_plus", 20.0),
-            tau_minus=stdp_params.get("tau_minus", 20.0)
+            tau_minus=stdp_params.get("tau_minus", 20.0),
+            dtype=dtype
         )
         
         # Instantiate Trainer
-        trainer = Trainer(n_genes=n_genes)
-        trainer.network.stdp = stdp_rule
+        trainer = Trainer(n_genes=n_genes, stdp_rule=stdp_rule, dtype=dtype)
         
         # Calc duration
-        max_time = 0
-        for s in spikes:
-            if len(s) > 0: max_time = max(max_time, s.max())
+        max_time = max(spikes.max_step(), 0) * spikes.dt
         duration = max_time + 100.0
         
         # Train
-        weights = trainer.train_cohort(spikes, duration_ms=duration, dt=config.get("training", {}).get("dt", 1.0))
+        weights = trainer.train_cohort(spikes, duration_ms=duration, dt=dt)
         
         # Save
         np.save(weights_dir / "trained_weights.npy", weights)
@@ -126,6 +153,7 @@ def train_cohort(accession, disease, config):
             "mean_weight": float(np.mean(np.abs(weights))),
             "max_weight": float(np.max(weights)),
             "min_weight": float(np.min(weights)),
+            "dtype": str(weights.dtype),
             "normalization": "Log2(CPM+1)" # From previous step
         }
         with open(logs_dir / "training_stats.json", "w") as f:
@@ -141,6 +169,13 @@ def train_cohort(accession, disease, config):
         gc.collect()
 
 def main():
+    parser = argparse.ArgumentParser(description="Train cohort-specific SNNs with STDP.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of cohorts processed in parallel.")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS threads per worker process.")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure_from_args(args)
+    
     config = load_config()
     registry_path = "data/cohort_index.csv"
     if not os.path.exists(registry_path):
@@ -148,8 +183,15 @@ def main():
         
     df = pd.read_csv(registry_path)
     
-    for _, row in df.iterrows():
-        train_cohort(row["accession"], row["disease"], config)
+    jobs = [
+        {
+            "key": acc,
+            "args": (acc, disease, config),
+            "memory_bytes": estimate_training_memory(acc, config)
+        }
+        for acc, disease in zip(df["accession"], df["disease"])
+    ]
+    run_jobs(train_cohort, jobs, n_workers=args.workers, blas_threads=args.blas_threads)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
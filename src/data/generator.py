@@ -1,10 +1,13 @@
 import numpy as np
 import pandas as pd
 import networkx as nx
+import scipy.sparse as sp
 from pathlib import Path
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Optional, Union
 import logging
 
+from ..utils.parallel import run_jobs
+
 logger = logging.getLogger(__name__)
 
 class SyntheticGenerator:
@@ -100,11 +103,106 @@ class SyntheticGenerator:
             
         return data
 
+    def interaction_operator(self, 
+                             sparse_density: float = 0.1, 
+                             dtype: np.dtype = np.float32) -> Union[np.ndarray, sp.csr_matrix]:
+        """
+        Regulatory operator as (target, source), so that the regulatory input of a
+        batch of states is (W_op @ states.T).T.
+        
+        Args:
+            sparse_density: Graphs with at most this fraction of edges give a CSR
+                            matrix (the scale-free graphs are far sparser), denser
+                            ones a dense array.
+            dtype: Floating point type of the operator.
+        """
+        if self.interaction_matrix is None:
+            raise ValueError("GRN not generated. Call generate_ground_truth_grn first.")
+            
+        W = self.interaction_matrix.T.astype(dtype)
+        density = np.count_nonzero(W) / float(W.size) if W.size else 0.0
+        if density <= sparse_density:
+            return sp.csr_matrix(W)
+        return np.ascontiguousarray(W)
+    
+    def simulate_dynamics_chunked(self, 
+                                  output_path: Path, 
+                                  chunk_size: int = 256, 
+                                  noise_level: float = 0.1, 
+                                  decay: float = 0.2,
+                                  n_workers: int = 1,
+                                  sparse_density: float = 0.1,
+                                  dtype: np.dtype = np.float32) -> np.memmap:
+        """
+        Streaming variant of `simulate_dynamics` for cohort counts that do not fit in memory.
+        
+        Cohorts are simulated in chunks of `chunk_size` and written into a memory-mapped
+        .npy file, so memory use is bounded by one chunk per worker. The regulatory
+        input uses a sparse operator when the graph is sparse.
+        
+        Each chunk draws from its own stream spawned from a np.random.SeedSequence
+        seeded by this generator, so the output depends only on the generator seed
+        and chunk_size, not on n_workers. It follows the same model as
+        `simulate_dynamics` but not the same random stream.
+        
+        Args:
+            output_path: .npy file to create, shape (n_cohorts, n_timepoints, n_genes).
+            chunk_size: Cohorts per chunk.
+            noise_level: Standard deviation of the additive noise.
+            decay: Expression decay per timepoint.
+            n_workers: Worker processes; chunks are distributed with run_jobs.
+            sparse_density: See `interaction_operator`.
+            dtype: Floating point type of the stored data.
+            
+        Returns:
+            Read-only memmap of the written data.
+        """
+        W = self.interaction_operator(sparse_density, dtype)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        shape = (self.n_cohorts, self.n_timepoints, self.n_genes)
+        data = np.lib.format.open_memmap(output_path, mode="w+", dtype=dtype, shape=shape)
+        del data  # Header written; chunks reopen the file
+        
+        entropy = int(self.rng.integers(2**63))
+        n_chunks = (self.n_cohorts + chunk_size - 1) // chunk_size
+        seeds = np.random.SeedSequence(entropy).spawn(n_chunks)
+        
+        jobs = []
+        for i, seed in enumerate(seeds):
+            start = i * chunk_size
+            stop = min(start + chunk_size, self.n_cohorts)
+            jobs.append({
+                "key": i,
+                "args": (output_path, start, stop, W, seed, noise_level, decay),
+                "memory_bytes": 2 * (stop - start) * self.n_timepoints * self.n_genes * np.dtype(dtype).itemsize
+            })
+            
+        failed = [r for r in run_jobs(_simulate_chunk, jobs, n_workers=n_workers) if r["status"] != "ok"]
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {n_chunks} chunks failed: {failed[0]['error']}")
+            
+        logger.info(f"Simulated {self.n_cohorts} cohorts in {n_chunks} chunks into {output_path}")
+        return np.load(output_path, mmap_mode="r")
+    
     def save_data(self, output_dir: Path, data: np.ndarray):
         """
         Saves the generated data and ground truth.
         """
         output_dir = Path(output_dir)
+        self.save_ground_truth(output_dir)
+        
+        # Save Expression Data (as .npy for efficiency with large cohorts)
+        np.save(output_dir / "expression_data.npy", data)
+        
+        self.save_samples(output_dir, data)
+        
+    def save_ground_truth(self, output_dir: Path):
+        """
+        Saves the ground truth GRN (adjacency and signed interaction matrix).
+        """
+        output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Save Ground Truth
@@ -115,8 +213,12 @@ class SyntheticGenerator:
         # Save Interaction Matrix explicitly for easier loading
         np.save(output_dir / "ground_truth_matrix.npy", self.interaction_matrix)
         
-        # Save Expression Data (as .npy for efficiency with large cohorts)
-        np.save(output_dir / "expression_data.npy", data)
+    def save_samples(self, output_dir: Path, data: np.ndarray):
+        """
+        Saves the first cohorts as CSVs for inspection. Works on memmapped data.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # Also save a sample CSV for inspection (first 5 cohorts)
         for i in range(min(5, self.n_cohorts)):
@@ -126,6 +228,59 @@ class SyntheticGenerator:
             
         logger.info(f"Saved synthetic data to {output_dir}")
 
+def _simulate_chunk(output_path: Path, 
+                    start: int, 
+                    stop: int, 
+                    W: Union[np.ndarray, sp.csr_matrix], 
+                    seed: np.random.SeedSequence, 
+                    noise_level: float, 
+                    decay: float) -> int:
+    """
+    Simulates cohorts [start, stop) and writes them into the memmapped output.
+    Module-level so it can run in worker processes.
+    """
+    data = np.load(output_path, mmap_mode="r+")
+    _, n_timepoints, n_genes = data.shape
+    n_cohorts = stop - start
+    dtype = data.dtype
+    rng = np.random.default_rng(seed)
+    
+    chunk = np.empty((n_cohorts, n_timepoints, n_genes), dtype=dtype)
+    chunk[:, 0, :] = rng.uniform(0, 0.5, size=(n_cohorts, n_genes))
+    
+    activation = np.empty((n_cohorts, n_genes), dtype=dtype)
+    noise = np.empty((n_cohorts, n_genes), dtype=dtype)
+    decay = dtype.type(decay)
+    
+    for t in range(n_timepoints - 1):
+        current_state = chunk[:, t, :]
+        
+        # Regulatory input, (Batch, Genes)
+        if sp.issparse(W):
+            np.copyto(activation, (W @ current_state.T).T)
+        else:
+            np.matmul(current_state, W.T, out=activation)
+            
+        # Sigmoid in-place
+        np.negative(activation, out=activation)
+        np.exp(activation, out=activation)
+        activation += 1
+        np.reciprocal(activation, out=activation)
+        
+        rng.standard_normal(out=noise, dtype=dtype)
+        noise *= dtype.type(noise_level)
+        
+        next_state = chunk[:, t + 1, :]
+        np.multiply(current_state, 1 - decay, out=next_state)
+        activation *= decay
+        next_state += activation
+        next_state += noise
+        np.clip(next_state, 0, 1, out=next_state)
+        
+    data[start:stop] = chunk
+    data.flush()
+    return n_cohorts
+
 def run_synthesis(output_dir: str = "data/processed/synthetic", 
                  n_genes: int = 50, 
                  n_cohorts: int = 1000):
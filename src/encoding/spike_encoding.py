@@ -1,6 +1,8 @@
 import numpy as np
 from typing import Tuple, List, Optional
 import logging
+from .spike_trains import SpikeTrains
+from ..utils import instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -26,109 +28,128 @@ class SpikeEncoder:
         self.refractory_period = refractory_period
         self.rng = np.random.default_rng(seed)
         
-    def encode(self, expression_data: np.ndarray, duration_ms: float = 1000.0) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    @instrumentation.timed("encoder.encode")
+    def encode(self, 
+               expression_data: np.ndarray, 
+               duration_ms: float = 1000.0, 
+               seed: Optional[int] = None) -> SpikeTrains:
         """
         Encodes expression data into spikes.
         
+        Each gene fires as a Bernoulli process with per-step probability
+        expression * max_freq * dt, subject to the refractory period. Instead of drawing
+        one random number per step, the waiting time to the next spike is sampled
+        directly: after a spike the gene is silent for the refractory steps and then
+        waits a Geometric(p) number of steps. This is the same process in distribution,
+        sampled for all genes at once.
+        
         Args:
             expression_data: (n_genes,) or (n_timepoints, n_genes) array of expression values [0, 1].
                              If 1D, assumes constant expression over 'duration_ms'.
-                             If 2D, interpolates or segments 'duration_ms' across timepoints.
+                             If 2D, segments 'duration_ms' into equal windows, one per timepoint.
             duration_ms: Total duration of the spike train in ms.
+            seed: Optional seed for this call only. With a seed the output depends only on
+                  the inputs and the seed (not on previous calls), which makes encodings
+                  reproducible across runs and processes.
             
         Returns:
-            spike_times: List of length n_genes, each containing spike times (ms).
-            spike_indices: List of length n_genes, containing indices (redundant but useful for some formats).
+            SpikeTrains with n_genes trains. Spike times are binned to the dt grid;
+            indexing it yields each gene's spike times (ms).
         """
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        
         if expression_data.ndim == 1:
-            # Constant expression case
-            n_genes = len(expression_data)
-            n_steps = int(duration_ms / self.dt)
-            rates = expression_data * self.max_freq * (self.dt / 1000.0) # probability per step
-            
-            spike_times = [[] for _ in range(n_genes)]
+            # Constant expression case: a single window spanning the whole duration
+            expression_data = expression_data[None, :]
+        elif expression_data.ndim != 2:
+            raise ValueError("expression_data must be 1D or 2D")
             
-            for gene_idx in range(n_genes):
-                rate = rates[gene_idx]
-                last_spike_time = -self.refractory_period
-                
-                for step in range(n_steps):
-                    time = step * self.dt
-                    
-                    if time - last_spike_time < self.refractory_period:
-                        continue
-                        
-                    if self.rng.random() < rate:
-                        spike_times[gene_idx].append(time)
-                        last_spike_time = time
-                        
-            return spike_times
+        n_timepoints, n_genes = expression_data.shape
+        window_duration = duration_ms / n_timepoints
+        steps_in_window = int(window_duration / self.dt)
+        refractory_steps = max(1, int(np.ceil(self.refractory_period / self.dt)))
+        
+        last_spike_times = np.full(n_genes, -self.refractory_period)
+        gene_chunks = []
+        time_chunks = []
+        
+        for t_idx in range(n_timepoints):
+            # We hold each transcriptomic timepoint for the duration of its window
+            offset = t_idx * window_duration
+            rates = expression_data[t_idx] * self.max_freq * (self.dt / 1000.0) # probability per step
             
-        elif expression_data.ndim == 2:
-            # Time-varying expression case
-            # We assume expression_data points are equally spaced over duration_ms
-            n_timepoints, n_genes = expression_data.shape
-            steps_per_point = int(duration_ms / (n_timepoints * self.dt))
+            # First step of the window at which each gene is out of its refractory period
+            first_eligible = np.ceil((last_spike_times + self.refractory_period - offset) / self.dt - 1e-9)
+            first_eligible = np.maximum(first_eligible, 0).astype(np.int64)
             
-            # This is a simplification; ideally we'd interpolate. 
-            # For now, we hold the value for the duration of the timepoint segment.
+            genes, steps = self._sample_window(rates, first_eligible, steps_in_window, refractory_steps, rng)
+            if len(genes) == 0:
+                continue
+                
+            times = offset + steps * self.dt
+            gene_chunks.append(genes)
+            time_chunks.append(times)
+            np.maximum.at(last_spike_times, genes, times)
             
-            spike_times = [[] for _ in range(n_genes)]
+        if not gene_chunks:
+            return SpikeTrains.from_events(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), n_genes, dt=self.dt)
             
-            for t_idx in range(n_timepoints):
-                current_expression = expression_data[t_idx]
-                rates = current_expression * self.max_freq * (self.dt / 1000.0)
-                
-                start_time = t_idx * steps_per_point * self.dt
-                
-                for step in range(steps_per_point):
-                    current_time = start_time + step * self.dt
-                    
-                    for gene_idx in range(n_genes):
-                        # Refractory check (simplified global tracking)
-                        # To do this efficiently, we'd track last_spike per gene
-                        pass 
+        genes = np.concatenate(gene_chunks)
+        steps = (np.concatenate(time_chunks) / self.dt).astype(np.int32)
+        
+        instrumentation.add_items(len(steps))
+        return SpikeTrains.from_events(genes, steps, n_genes, dt=self.dt)
+    
+    def _sample_window(self, 
+                       rates: np.ndarray, 
+                       first_eligible: np.ndarray, 
+                       n_steps: int, 
+                       refractory_steps: int,
+                       rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Samples spike steps within one window of constant rates.
+        
+        Args:
+            rates: (n_genes,) spike probability per step.
+            first_eligible: (n_genes,) first step each gene may fire at.
+            n_steps: Number of steps in the window.
+            refractory_steps: Minimum number of steps between two spikes (>= 1).
             
-            # Re-implementing more efficiently
-            total_steps = int(duration_ms / self.dt)
-            # Interpolate expression to full resolution
-            # For strict correctness with the "transcriptomic" nature, 
-            # we might just want to treat each transcriptomic timepoint as a window.
+        Returns:
+            genes, steps: Flat arrays of the gene index and in-window step of each spike.
+        """
+        probs = np.clip(rates, 0.0, 1.0)
+        pending = np.flatnonzero((probs > 0) & (first_eligible < n_steps))
+        
+        # Position of a virtual previous spike such that the next eligible step is first_eligible
+        current = first_eligible[pending] - refractory_steps
+        max_spikes = int(np.ceil(n_steps / refractory_steps))
+        
+        gene_chunks = []
+        step_chunks = []
+        
+        while len(pending) > 0:
+            p = probs[pending]
+            # Draw enough intervals per round that most genes finish in one pass
+            expected = (n_steps / (refractory_steps - 1 + 1 / p)).mean()
+            n_draws = min(max_spikes, max(16, int(np.ceil(1.25 * expected))))
             
-            # Let's use a simpler approach: Process by window
-            window_duration = duration_ms / n_timepoints
-            current_time_offset = 0.0
+            intervals = rng.geometric(p[:, None], size=(len(pending), n_draws)) + (refractory_steps - 1)
+            positions = current[:, None] + np.cumsum(intervals, axis=1)
             
-            all_spikes = [[] for _ in range(n_genes)]
-            last_spike_times = np.full(n_genes, -self.refractory_period)
+            valid = positions < n_steps
+            rows, cols = np.nonzero(valid)
+            gene_chunks.append(pending[rows])
+            step_chunks.append(positions[rows, cols])
             
-            for t_idx in range(n_timepoints):
-                rates = expression_data[t_idx] * self.max_freq * (self.dt / 1000.0)
-                steps_in_window = int(window_duration / self.dt)
-                
-                # Vectorized probability check for this window
-                # Shape: (steps_in_window, n_genes)
-                rand_vals = self.rng.random((steps_in_window, n_genes))
-                spikes = rand_vals < rates[None, :] # Broadcast rates
-                
-                # Convert to times
-                # This doesn't easily handle refractory period vectorially across steps dependent on history
-                # Fallback to loop for correctness with refractory
-                
-                for step in range(steps_in_window):
-                    time = current_time_offset + step * self.dt
-                    
-                    # Identify potential spikes
-                    potential_spikes = np.where(rand_vals[step] < rates)[0]
-                    
-                    for gene_idx in potential_spikes:
-                        if time - last_spike_times[gene_idx] >= self.refractory_period:
-                            all_spikes[gene_idx].append(time)
-                            last_spike_times[gene_idx] = time
-                            
-                current_time_offset += window_duration
-                
-            return [np.array(x) for x in all_spikes]
+            current = positions[:, -1]
+            still_inside = current < n_steps
+            pending = pending[still_inside]
+            current = current[still_inside]
             
-        else:
-            raise ValueError("expression_data must be 1D or 2D")
+        if not gene_chunks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        genes = np.concatenate(gene_chunks)
+        steps = np.concatenate(step_chunks)
+        return genes, steps
@@ -0,0 +1,251 @@
+import numpy as np
+from typing import Iterator, List, Optional, Sequence, Tuple
+from pathlib import Path
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# On-disk store: flat spike steps + CSR offsets as plain .npy files, so the steps can be
+# memory-mapped and only the slices of selected genes are ever read.
+STEPS_FILE = "spike_steps.npy"
+OFFSETS_FILE = "spike_offsets.npy"
+META_FILE = "spike_meta.json"
+
+class SpikeTrains:
+    """
+    Compact container for the spike trains of a cohort.
+
+    All spikes live in one flat int32 array of time step indices, grouped by gene and
+    sorted within each gene. Gene i owns steps[starts[i]:stops[i]]. Selecting a gene
+    subset only gathers the (starts, stops) pairs and shares the flat array, and a
+    time window only moves them, so neither copies spike data.
+
+    Indexing and iteration yield per-gene spike times in ms (steps * dt), so code written
+    for the list-of-arrays format keeps working.
+    """
+
+    def __init__(self,
+                 steps: np.ndarray,
+                 starts: np.ndarray,
+                 stops: np.ndarray,
+                 dt: float = 1.0):
+        """
+        Args:
+            steps: Flat array of spike time steps, grouped by gene.
+            starts: (n_genes,) start of each gene's slice in `steps`.
+            stops: (n_genes,) end (exclusive) of each gene's slice in `steps`.
+            dt: Time step (ms) the step indices refer to.
+        """
+        self.steps = steps
+        self.starts = starts
+        self.stops = stops
+        self.dt = dt
+
+    @classmethod
+    def from_offsets(cls, steps: np.ndarray, offsets: np.ndarray, dt: float = 1.0) -> "SpikeTrains":
+        """
+        Builds the container from CSR-style offsets of length n_genes + 1.
+        """
+        return cls(steps, offsets[:-1], offsets[1:], dt=dt)
+
+    @classmethod
+    def from_events(cls,
+                    genes: np.ndarray,
+                    steps: np.ndarray,
+                    n_genes: int,
+                    dt: float = 1.0) -> "SpikeTrains":
+        """
+        Builds the container from flat (gene, step) pairs in any order.
+        """
+        order = np.lexsort((steps, genes))
+        counts = np.bincount(genes, minlength=n_genes)
+        offsets = np.zeros(n_genes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls.from_offsets(steps[order].astype(np.int32), offsets, dt=dt)
+
+    @classmethod
+    def from_times(cls, spike_times: Sequence[np.ndarray], dt: float = 1.0) -> "SpikeTrains":
+        """
+        Converts the legacy list-of-arrays format (spike times in ms per gene).
+        Times are binned to steps the same way the trainer does: int(t / dt).
+        """
+        if isinstance(spike_times, SpikeTrains):
+            return spike_times
+
+        counts = np.array([len(t) for t in spike_times], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        if offsets[-1] > 0:
+            times = np.concatenate([np.asarray(t, dtype=float) for t in spike_times])
+            steps = (times / dt).astype(np.int32)
+        else:
+            steps = np.zeros(0, dtype=np.int32)
+        return cls.from_offsets(steps, offsets, dt=dt)
+
+    @property
+    def n_genes(self) -> int:
+        return len(self.starts)
+
+    @property
+    def n_spikes(self) -> int:
+        return int(np.sum(self.stops - self.starts))
+
+    def counts(self) -> np.ndarray:
+        """
+        Number of spikes per gene.
+        """
+        return self.stops - self.starts
+
+    def __len__(self) -> int:
+        return self.n_genes
+
+    def __getitem__(self, gene_idx: int) -> np.ndarray:
+        return self.gene_steps(gene_idx) * self.dt
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(self.n_genes):
+            yield self[i]
+
+    def gene_steps(self, gene_idx: int) -> np.ndarray:
+        """
+        Spike steps of one gene (a view into the flat array).
+        """
+        return self.steps[self.starts[gene_idx]:self.stops[gene_idx]]
+
+    def select(self, gene_indices: np.ndarray) -> "SpikeTrains":
+        """
+        Restricts to a gene subset (e.g. the selected HVGs), in the given order.
+        Shares the flat spike array; only the per-gene bounds are gathered.
+        """
+        gene_indices = np.asarray(gene_indices)
+        return SpikeTrains(self.steps, self.starts[gene_indices], self.stops[gene_indices], dt=self.dt)
+
+    def window(self, start_step: int, stop_step: int) -> "SpikeTrains":
+        """
+        Restricts every gene to spikes with start_step <= step < stop_step.
+        Step indices stay absolute; the flat spike array is shared.
+        """
+        # Number of spikes before each bound within each gene's sorted slice
+        before_start = np.zeros(len(self.steps) + 1, dtype=np.int64)
+        np.cumsum(self.steps < start_step, out=before_start[1:])
+        before_stop = np.zeros(len(self.steps) + 1, dtype=np.int64)
+        np.cumsum(self.steps < stop_step, out=before_stop[1:])
+
+        starts = self.starts + (before_start[self.stops] - before_start[self.starts])
+        stops = self.starts + (before_stop[self.stops] - before_stop[self.starts])
+        return SpikeTrains(self.steps, starts, stops, dt=self.dt)
+
+    def compact(self) -> "SpikeTrains":
+        """
+        Copies the referenced spikes into a new contiguous flat array.
+        """
+        counts = self.counts()
+        offsets = np.zeros(self.n_genes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # Flat gather index: for each output spike, its position in self.steps
+        gather = np.arange(offsets[-1], dtype=np.int64) + np.repeat(self.starts - offsets[:-1], counts)
+        steps = np.asarray(self.steps[gather], dtype=np.int32)
+        return SpikeTrains.from_offsets(steps, offsets, dt=self.dt)
+
+    def max_step(self) -> int:
+        """
+        Latest spike step over all genes, or -1 without spikes.
+        """
+        counts = self.counts()
+        has_spikes = counts > 0
+        if not np.any(has_spikes):
+            return -1
+        # Steps are sorted per gene, so the last spike of each gene is its maximum
+        return int(np.max(self.steps[self.stops[has_spikes] - 1]))
+
+    def events(self, n_steps: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Regroups spikes by time step (CSR layout over steps), as consumed by the trainer.
+
+        Args:
+            n_steps: Optional number of simulated steps; later spikes are dropped.
+
+        Returns:
+            event_steps: Sorted unique steps containing spikes.
+            offsets: (n_events + 1,) offsets into `genes` per event step.
+            genes: Gene indices of all spikes, ordered by step.
+        """
+        compact = self.compact()
+        genes = np.repeat(np.arange(self.n_genes, dtype=np.int64), compact.counts())
+        steps = compact.steps
+
+        if n_steps is not None:
+            keep = steps < n_steps
+            steps = steps[keep]
+            genes = genes[keep]
+
+        order = np.argsort(steps, kind="stable")
+        steps = steps[order]
+        genes = genes[order]
+
+        event_steps, starts = np.unique(steps, return_index=True)
+        offsets = np.append(starts, len(steps))
+
+        return event_steps, offsets, genes
+
+    def to_list(self) -> List[np.ndarray]:
+        """
+        Converts back to the list-of-arrays format (spike times in ms per gene).
+        """
+        return list(self)
+
+    def is_contiguous(self) -> bool:
+        """
+        True if the gene slices tile the flat array in order (CSR layout).
+        """
+        if self.n_genes == 0:
+            return len(self.steps) == 0
+        return (self.starts[0] == 0 
+                and self.stops[-1] == len(self.steps) 
+                and np.array_equal(self.starts[1:], self.stops[:-1]))
+
+    def save(self, directory: Path):
+        """
+        Writes the spike store (steps, offsets and metadata) into `directory`.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        trains = self if self.is_contiguous() else self.compact()
+        offsets = np.append(trains.starts, trains.stops[-1:] if trains.n_genes else [0]).astype(np.int64)
+        
+        np.save(directory / STEPS_FILE, np.asarray(trains.steps, dtype=np.int32))
+        np.save(directory / OFFSETS_FILE, offsets)
+        with open(directory / META_FILE, "w") as f:
+            json.dump({
+                "dt": trains.dt,
+                "n_genes": trains.n_genes,
+                "n_spikes": trains.n_spikes
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = "r") -> "SpikeTrains":
+        """
+        Opens a spike store written by `save`.
+        
+        Args:
+            directory: Store directory.
+            mmap_mode: Passed to np.load for the flat steps array. With the default "r"
+                       nothing is read until accessed; select() followed by compact()
+                       reads only the chosen genes' slices. None loads everything.
+        """
+        directory = Path(directory)
+        with open(directory / META_FILE, "r") as f:
+            meta = json.load(f)
+            
+        steps = np.load(directory / STEPS_FILE, mmap_mode=mmap_mode)
+        offsets = np.load(directory / OFFSETS_FILE)
+        return cls.from_offsets(steps, offsets, dt=meta["dt"])
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        directory = Path(directory)
+        return all((directory / name).exists() for name in (STEPS_FILE, OFFSETS_FILE, META_FILE))
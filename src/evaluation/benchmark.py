@@ -1,10 +1,12 @@
 import numpy as np
-import coremltools as ct
 import time
 from typing import Dict, Any, Tuple
 import logging
 from pathlib import Path
 
+from ..grn.engine import OperatorEngine
+from .timing import time_call, latency_stats
+
 logger = logging.getLogger(__name__)
 
 class InferenceBenchmark:
@@ -16,44 +18,44 @@ class InferenceBenchmark:
         self.model_path = model_path
         self.operators = operators
         self.coreml_model = None
+        self.engine = None
         
     def load_coreml(self):
+        # Imported here so CPU inference works on machines without coremltools
+        import coremltools as ct
+        
         logger.info(f"Loading CoreML model from {self.model_path}")
         self.coreml_model = ct.models.MLModel(self.model_path)
         
     def run_cpu_inference(self, data: np.ndarray) -> Tuple[np.ndarray, float]:
         """
-        Runs inference using NumPy (Matrix Multiplication).
+        Runs inference on the CPU with OperatorEngine (dense BLAS or CSR SpMM,
+        depending on operator density).
         Data: (n_samples, n_genes)
         """
-        W = self.operators["weights"] # (Out, In) or (In, Out)? 
-        # In distillation: W[idx_v, idx_u] = weight. u->v.
-        # u is source (in), v is target (out).
-        # So W is (n_genes, n_genes).
-        # x is (n_samples, n_genes).
-        # y = x @ W.T + b
-        
-        b = self.operators["bias"]
-        activation = self.operators["activation"]
+        if self.engine is None:
+            self.engine = OperatorEngine(self.operators)
+            
+        data = np.asarray(data, dtype=self.engine.dtype)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
+        y = self.engine.forward(data)
+        end_time = time.perf_counter()
         
-        # Linear
-        # x shape: (N, G)
-        # W shape: (G, G)
-        # Result: (N, G)
-        z = data @ W.T + b
+        # The engine reuses its output buffer across calls
+        return y.copy(), end_time - start_time
         
-        # Activation
-        if activation == "sigmoid":
-            y = 1 / (1 + np.exp(-z))
-        elif activation == "relu":
-            y = np.maximum(0, z)
-        else:
-            y = z
+    def benchmark_cpu_inference(self, data: np.ndarray, n_warmup: int = 3, n_trials: int = 20) -> Dict[str, float]:
+        """
+        Repeated, warmed-up timing of the CPU engine on one batch.
+        Returns latency percentiles (ms) and throughput (samples/s), see latency_stats.
+        """
+        if self.engine is None:
+            self.engine = OperatorEngine(self.operators)
             
-        end_time = time.time()
-        return y, end_time - start_time
+        data = np.asarray(data, dtype=self.engine.dtype)
+        samples_ns = time_call(lambda: self.engine.forward(data), n_warmup=n_warmup, n_trials=n_trials)
+        return {"device": "cpu", **latency_stats(samples_ns, n_items=data.shape[0])}
         
     def run_coreml_inference(self, data: np.ndarray) -> Tuple[np.ndarray, float]:
         """
@@ -0,0 +1,55 @@
+import time
+import platform
+import numpy as np
+from typing import Callable, Dict, Any
+
+def time_call(fn: Callable[[], Any], n_warmup: int = 3, n_trials: int = 20) -> np.ndarray:
+    """
+    Times repeated calls of `fn` after `n_warmup` untimed calls.
+
+    Returns:
+        (n_trials,) int64 wall times in nanoseconds (time.perf_counter_ns).
+    """
+    for _ in range(n_warmup):
+        fn()
+
+    samples = np.empty(n_trials, dtype=np.int64)
+    for i in range(n_trials):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+    return samples
+
+def latency_stats(samples_ns: np.ndarray, n_items: int = 1) -> Dict[str, float]:
+    """
+    Summarizes per-call latencies.
+
+    Args:
+        samples_ns: Wall times of individual calls in nanoseconds.
+        n_items: Items (e.g. samples) processed per call, for the throughput.
+
+    Returns:
+        Dictionary with 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'min_ms' and
+        'throughput' (items per second at the median latency).
+    """
+    ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "min_ms": float(ms.min()),
+        "throughput": float(n_items / (p50 / 1e3)) if p50 > 0 else float("inf"),
+    }
+
+def machine_info() -> Dict[str, Any]:
+    """
+    Host description stored alongside benchmark results.
+    """
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
@@ -0,0 +1,220 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OperatorEngine:
+    """
+    CPU inference engine for distilled GRN operators: y = act(W x + b).
+
+    Picks dense BLAS or scipy.sparse CSR products from the operator's density, keeps
+    everything in one floating point type (float32 by default), writes into output
+    buffers reused across calls and applies the activation in-place. The dense product
+    is computed straight into the buffer; the sparse one costs a single temporary.
+    """
+
+    ACTIVATIONS = ("sigmoid", "tanh", "relu", "linear")
+
+    def __init__(self,
+                 operators: Dict[str, Any],
+                 dtype: np.dtype = np.float32,
+                 sparse_density: float = 0.1,
+                 mode: str = "auto"):
+        """
+        Args:
+            operators: Output of OperatorDistiller ('weights' as (target, source)
+                       dense array or sparse matrix, 'bias', 'activation').
+            dtype: Floating point type used end-to-end.
+            sparse_density: In 'auto' mode, operators with at most this fraction of
+                            non-zeros use the sparse product.
+            mode: 'auto', 'dense' or 'sparse'.
+        """
+        self.dtype = np.dtype(dtype)
+        W = operators["weights"]
+        self.n_genes = W.shape[0]
+        self.activation = operators.get("activation", "linear")
+        self.bias = np.asarray(operators["bias"], dtype=self.dtype)
+
+        nnz = W.nnz if sp.issparse(W) else np.count_nonzero(W)
+        self.density = nnz / float(W.shape[0] * W.shape[1]) if W.size else 0.0
+
+        if mode == "auto":
+            mode = "sparse" if self.density <= sparse_density else "dense"
+        if mode not in ("dense", "sparse"):
+            raise ValueError(f"Unknown engine mode {mode}")
+        self.mode = mode
+
+        if mode == "sparse":
+            self._W = sp.csr_matrix(W, dtype=self.dtype)
+        else:
+            dense = W.toarray() if sp.issparse(W) else np.asarray(W)
+            # Row-major (source, target) copy so a batch is a single x @ W.T GEMM
+            self._WT = np.ascontiguousarray(dense.T, dtype=self.dtype)
+
+        self._buffers = {}
+        self._rollout_buffers = {}
+
+        logger.debug(f"OperatorEngine: {self.n_genes} genes, density {self.density:.3f}, {self.mode} mode")
+
+    def output_buffer(self, n_samples: int) -> np.ndarray:
+        """
+        Returns the reusable (n_samples, n_genes) output buffer for a batch size.
+        """
+        buf = self._buffers.get(n_samples)
+        if buf is None:
+            buf = np.empty((n_samples, self.n_genes), dtype=self.dtype)
+            self._buffers[n_samples] = buf
+        return buf
+
+    def forward(self, data: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluates one operator step for a batch.
+
+        Args:
+            data: (n_samples, n_genes) or (n_genes,) expression.
+            out: Optional (n_samples, n_genes) array of the engine's dtype to write
+                 into; must not alias `data`. Defaults to the engine's buffer for this
+                 batch size, which is overwritten by the next call with the same
+                 batch size (copy the result to keep it).
+
+        Returns:
+            act(data @ W.T + b), written into `out`.
+        """
+        x = np.asarray(data, dtype=self.dtype)
+        single = x.ndim == 1
+        if single:
+            x = x[None, :]
+
+        if out is None:
+            out = self.output_buffer(x.shape[0])
+
+        # Linear
+        if self.mode == "dense":
+            np.matmul(x, self._WT, out=out)
+        else:
+            # scipy has no out= for sparse products: one (n_genes, n_samples) temporary
+            np.copyto(out, (self._W @ x.T).T)
+        out += self.bias
+
+        # Activation
+        self.activate(out)
+
+        return out[0] if single else out
+
+    def rollout(self,
+                x0: np.ndarray,
+                n_steps: int,
+                tol: Optional[float] = None,
+                record_every: Optional[int] = None,
+                clamp: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Iterates x(t+1) = act(W x(t) + b) for a batch of initial states.
+
+        Two state buffers per batch size are allocated once and reused, swapping
+        roles every step, so the loop itself does not allocate.
+
+        Args:
+            x0: (n_samples, n_genes) or (n_genes,) initial states.
+            n_steps: Maximum number of steps.
+            tol: If given, stops once every trajectory has reached a fixed point,
+                 i.e. max |x(t+1) - x(t)| <= tol for all samples.
+            record_every: If given, stores x(0) and every record_every-th state.
+                          Without it only the final state is kept.
+            clamp: Optional (genes, values) pinning one gene per sample, genes of
+                   shape (n_samples,) and values scalar or (n_samples,). The gene is
+                   set to its value in x(0) and after every step (e.g. a knockout).
+
+        Returns:
+            Dictionary containing 'final' (state after the last step), 'n_steps'
+            (steps taken), 'converged' ((n_samples,) bool, all False without tol),
+            'sample_steps' ((n_samples,) step at which each sample first reached
+            tol, n_steps for samples that did not),
+            'trajectory' ((n_records, n_samples, n_genes) or None) and
+            'record_steps' (step of each recorded state).
+        """
+        x0 = np.asarray(x0, dtype=self.dtype)
+        single = x0.ndim == 1
+        if single:
+            x0 = x0[None, :]
+        n_samples = x0.shape[0]
+
+        bufs = self._rollout_buffers.get(n_samples)
+        if bufs is None:
+            bufs = tuple(np.empty((n_samples, self.n_genes), dtype=self.dtype) for _ in range(3))
+            self._rollout_buffers[n_samples] = bufs
+        current, nxt, diff = bufs
+        np.copyto(current, x0)
+
+        if clamp is not None:
+            clamp_rows = np.arange(n_samples)
+            clamp_genes = np.asarray(clamp[0], dtype=np.int64)
+            clamp_values = np.broadcast_to(np.asarray(clamp[1], dtype=self.dtype), (n_samples,))
+            current[clamp_rows, clamp_genes] = clamp_values
+
+        trajectory = None
+        record_steps = []
+        if record_every is not None:
+            trajectory = np.empty((n_steps // record_every + 1, n_samples, self.n_genes), dtype=self.dtype)
+            trajectory[0] = current
+            record_steps.append(0)
+
+        converged = np.zeros(n_samples, dtype=bool)
+        reached = np.zeros(n_samples, dtype=bool)
+        sample_steps = np.zeros(n_samples, dtype=np.int64)
+        step = 0
+        while step < n_steps:
+            self.forward(current, out=nxt)
+            if clamp is not None:
+                nxt[clamp_rows, clamp_genes] = clamp_values
+            step += 1
+
+            if tol is not None:
+                np.subtract(nxt, current, out=diff)
+                np.abs(diff, out=diff)
+                converged = diff.max(axis=1) <= tol
+                sample_steps[converged & ~reached] = step
+                reached |= converged
+
+            current, nxt = nxt, current
+
+            if record_every is not None and step % record_every == 0:
+                trajectory[len(record_steps)] = current
+                record_steps.append(step)
+
+            if tol is not None and converged.all():
+                break
+
+        if trajectory is not None:
+            trajectory = trajectory[:len(record_steps)]
+            if single:
+                trajectory = trajectory[:, 0]
+
+        sample_steps[~reached] = step
+
+        final = current.copy()
+        return {
+            "final": final[0] if single else final,
+            "n_steps": step,
+            "converged": converged[0] if single else converged,
+            "sample_steps": sample_steps[0] if single else sample_steps,
+            "trajectory": trajectory,
+            "record_steps": np.array(record_steps, dtype=np.int64)
+        }
+
+    def activate(self, z: np.ndarray) -> np.ndarray:
+        """
+        Applies the activation in-place.
+        """
+        if self.activation == "sigmoid":
+            # 1 / (1 + exp(-z)) without temporaries
+            np.negative(z, out=z)
+            np.exp(z, out=z)
+            z += 1
+            np.reciprocal(z, out=z)
+        elif self.activation == "tanh":
+            np.tanh(z, out=z)
+        elif self.activation == "relu":
+            np.maximum(z, 0, out=z)
+        return z
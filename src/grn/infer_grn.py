@@ -1,8 +1,11 @@
 import numpy as np
 import networkx as nx
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional, Union, Iterator
+from pathlib import Path
 import logging
 
+from ..utils import instrumentation
+
 logger = logging.getLogger(__name__)
 
 class GRNExtractor:
@@ -16,6 +19,32 @@ class GRNExtractor:
         self.threshold = weight_threshold
         self.stability_window = stability_window
         
+    def extract_edges(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Thresholds the weight matrix into flat edge arrays, without building a graph.
+        
+        Args:
+            weights: (n_genes, n_genes) matrix. Rows=Pre(Source), Cols=Post(Target).
+            
+        Returns:
+            Dictionary of equally long arrays 'sources', 'targets' (gene indices),
+            'weights' and 'signs' (+1/-1), in row-major order. Self-loops are excluded.
+        """
+        # Filter by threshold
+        mask = np.abs(weights) > self.threshold
+        np.fill_diagonal(mask, False) # No self-loops
+        
+        sources, targets = np.nonzero(mask)
+        edge_weights = weights[sources, targets]
+        
+        return {
+            "sources": sources,
+            "targets": targets,
+            "weights": edge_weights,
+            "signs": np.where(edge_weights > 0, 1, -1)
+        }
+        
+    @instrumentation.timed("grn.extract")
     def extract(self, weights: np.ndarray, gene_names: list = None) -> nx.DiGraph:
         """
         Converts weight matrix to Directed Graph.
@@ -36,17 +65,18 @@ class GRNExtractor:
         G.add_nodes_from(gene_names)
         
         # Normalize weights? No, raw weights from STDP are interpretable.
+        edges = self.extract_edges(weights)
         
-        # Filter by threshold
-        rows, cols = np.where(np.abs(weights) > self.threshold)
-        
-        for r, c in zip(rows, cols):
-            if r == c: continue # No self-loops
-            
-            w = weights[r, c]
-            sign = 1 if w > 0 else -1
-            
-            G.add_edge(gene_names[r], gene_names[c], weight=float(w), sign=sign)
+        # Bulk insert; tolist() does the float/int conversion for all edges at once
+        names = np.asarray(gene_names, dtype=object)
+        G.add_edges_from(
+            (u, v, {"weight": w, "sign": sign})
+            for u, v, w, sign in zip(names[edges["sources"]].tolist(),
+                                     names[edges["targets"]].tolist(),
+                                     edges["weights"].tolist(),
+                                     edges["signs"].tolist())
+        )
+        instrumentation.add_items(len(edges["weights"]))
             
         return G
         
@@ -89,3 +119,151 @@ class GRNExtractor:
             "edges_true": int(np.sum(flat_true)),
             "edges_inferred": int(np.sum(flat_pred))
         }
+
+class StreamingGRNExtractor:
+    """
+    Extracts GRN edges from weight matrices too large to process in memory at once.
+    
+    The matrix (typically trained_weights.npy opened with mmap_mode="r") is read in
+    blocks of rows, so only a (block_rows, n_genes) slab is resident at any time.
+    """
+    
+    def __init__(self, 
+                 k_std: float = 2.0, 
+                 top_k: Optional[int] = None, 
+                 block_rows: int = 512):
+        """
+        Args:
+            k_std: Threshold is mean(|W|) + k_std * std(|W|).
+            top_k: If set, keep at most the top_k strongest incoming edges (by |w|) per
+                   target gene instead of (or, with an explicit threshold, in addition
+                   to) thresholding. Zero weights are never returned as edges.
+            block_rows: Number of rows read per block.
+        """
+        self.k_std = k_std
+        self.top_k = top_k
+        self.block_rows = block_rows
+        
+    @staticmethod
+    def open(weights_path: Union[str, Path]) -> np.ndarray:
+        """
+        Memory-maps a saved weight matrix.
+        """
+        return np.load(weights_path, mmap_mode="r")
+        
+    def _blocks(self, weights: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        for start in range(0, weights.shape[0], self.block_rows):
+            yield start, np.asarray(weights[start:start + self.block_rows], dtype=np.float64)
+            
+    def threshold(self, weights: np.ndarray) -> float:
+        """
+        Computes mean(|W|) + k_std * std(|W|) in a single pass over row blocks,
+        merging per-block moments with the parallel form of Welford's algorithm.
+        """
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        
+        for _, block in self._blocks(weights):
+            abs_block = np.abs(block)
+            n_b = abs_block.size
+            if n_b == 0:
+                continue
+            mean_b = abs_block.mean()
+            m2_b = np.sum((abs_block - mean_b) ** 2)
+            
+            delta = mean_b - mean
+            total = count + n_b
+            mean += delta * n_b / total
+            m2 += m2_b + delta * delta * count * n_b / total
+            count = total
+            
+        std = np.sqrt(m2 / count) if count > 0 else 0.0
+        return float(mean + self.k_std * std)
+    
+    @instrumentation.timed("grn.stream_extract_edges")
+    def extract_edges(self, weights: np.ndarray, threshold: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Selects edges block by block.
+        
+        Args:
+            weights: (n_genes, n_genes) matrix or memmap. Rows=Source, Cols=Target.
+            threshold: Absolute weight threshold. Computed with `threshold()` when
+                       neither it nor top_k is given.
+            
+        Returns:
+            Same layout as GRNExtractor.extract_edges: 'sources', 'targets', 'weights',
+            'signs', in row-major order, without self-loops.
+        """
+        if self.top_k is not None:
+            return self._extract_top_k(weights, threshold)
+            
+        if threshold is None:
+            threshold = self.threshold(weights)
+            
+        source_chunks, target_chunks, weight_chunks = [], [], []
+        for start, block in self._blocks(weights):
+            mask = np.abs(block) > threshold
+            rows = np.arange(start, start + len(block))
+            mask[np.arange(len(block)), rows] = False # No self-loops
+            
+            r, c = np.nonzero(mask)
+            source_chunks.append(r + start)
+            target_chunks.append(c)
+            weight_chunks.append(block[r, c].astype(weights.dtype))
+            
+        return self._edges(source_chunks, target_chunks, weight_chunks, weights.dtype)
+    
+    def _extract_top_k(self, weights: np.ndarray, threshold: Optional[float]) -> Dict[str, np.ndarray]:
+        """
+        Keeps the top_k sources per target, maintaining a running (top_k, n_genes)
+        candidate set that each row block is merged into with np.argpartition.
+        """
+        n_rows, n_cols = weights.shape
+        k = min(self.top_k, n_rows)
+        
+        best_abs = np.full((k, n_cols), -np.inf)
+        best_w = np.zeros((k, n_cols))
+        best_src = np.full((k, n_cols), -1, dtype=np.int64)
+        col_idx = np.arange(n_cols)
+        
+        for start, block in self._blocks(weights):
+            rows = np.arange(start, start + len(block))
+            abs_block = np.abs(block)
+            abs_block[np.arange(len(block)), rows] = -np.inf # No self-loops
+            
+            stacked_abs = np.vstack([best_abs, abs_block])
+            stacked_w = np.vstack([best_w, block])
+            stacked_src = np.vstack([best_src, np.broadcast_to(rows[:, None], block.shape)])
+            
+            keep = np.argpartition(stacked_abs, -k, axis=0)[-k:]
+            best_abs = stacked_abs[keep, col_idx]
+            best_w = stacked_w[keep, col_idx]
+            best_src = stacked_src[keep, col_idx]
+            
+        # Zero weights are no edges, even when a target has fewer than k nonzero sources
+        valid = np.isfinite(best_abs) & (best_abs > 0)
+        if threshold is not None:
+            valid &= best_abs > threshold
+            
+        sources = best_src[valid]
+        targets = np.broadcast_to(col_idx, best_src.shape)[valid]
+        edge_weights = best_w[valid]
+        
+        return self._edges([sources], [targets], [edge_weights], weights.dtype)
+    
+    @staticmethod
+    def _edges(source_chunks, target_chunks, weight_chunks, dtype) -> Dict[str, np.ndarray]:
+        sources = np.concatenate(source_chunks) if source_chunks else np.zeros(0, dtype=np.int64)
+        targets = np.concatenate(target_chunks) if target_chunks else np.zeros(0, dtype=np.int64)
+        edge_weights = np.concatenate(weight_chunks).astype(dtype) if weight_chunks else np.zeros(0, dtype=dtype)
+        
+        order = np.lexsort((targets, sources))
+        sources, targets, edge_weights = sources[order], targets[order], edge_weights[order]
+        
+        return {
+            "sources": sources,
+            "targets": targets,
+            "weights": edge_weights,
+            "signs": np.where(edge_weights > 0, 1, -1)
+        }
@@ -1,6 +1,7 @@
 import numpy as np
 import networkx as nx
-from typing import Dict, Any
+import scipy.sparse as sp
+from typing import Dict, Any, List, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,54 +11,131 @@ class OperatorDistiller:
     Distills learned GRN weights into fixed linear/non-linear operators for CoreML.
     """
     
-    def __init__(self, activation_fn: str = "sigmoid"):
+    FORMATS = ("dense", "csr", "auto")
+    
+    def __init__(self, 
+                 activation_fn: str = "sigmoid", 
+                 sparse_density: float = 0.1, 
+                 format: str = "dense"):
+        """
+        Args:
+            activation_fn: Activation applied after the linear operator.
+            sparse_density: In 'auto' format, operators with at most this fraction of
+                            non-zeros are emitted as CSR, denser ones as dense arrays.
+            format: 'dense' (float32 ndarray, as consumed by the CoreML export),
+                    'csr' (scipy.sparse CSR) or 'auto' (by density).
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown operator format {format}")
         self.activation = activation_fn
+        self.sparse_density = sparse_density
+        self.format = format
         
-    def distill(self, grn: nx.DiGraph, n_genes: int) -> Dict[str, Any]:
+    def distill_weights(self, 
+                        weights: Union[np.ndarray, sp.spmatrix], 
+                        gene_names: Optional[List[str]] = None,
+                        threshold: Optional[float] = None) -> Dict[str, Any]:
         """
-        Converts GRN graph to operator matrices.
+        Converts a weight matrix or sparse adjacency directly into an operator.
         
         Args:
-            grn: Inferred GRN.
-            n_genes: Total genes (dimension).
+            weights: (n_genes, n_genes) dense weights or scipy.sparse adjacency with
+                     rows = source and cols = target (as trained / as in adjacency.npz).
+            gene_names: Optional gene name per row/column. Defaults to "Gene_i".
+            threshold: If given, entries with |w| <= threshold are dropped.
             
         Returns:
-            Dictionary containing 'weights', 'bias', 'activation'.
+            Dictionary containing 'weights' ((target, source) float32, dense or CSR
+            depending on the distiller's format), 'bias', 'activation', 'format'
+            ('csr' or 'dense'), 'density', 'gene_names' and 'gene_index'
+            (gene name -> row/column index).
         """
-        # Create sparse weight matrix
-        # CoreML usually likes dense for small/medium, or sparse storage.
-        # We'll export dense for simplicity as n_genes is likely < 1000 for local models.
-        
-        W = np.zeros((n_genes, n_genes), dtype=np.float32)
-        node_list = sorted(list(grn.nodes()))
-        # Map node names "Gene_i" to index i
-        # Assumes format "Gene_0", "Gene_1"...
+        n_genes = weights.shape[0]
+        if gene_names is None:
+            gene_names = [f"Gene_{i}" for i in range(n_genes)]
+            
+        # GRN extraction stores weights[r, c] with r=source, c=target, while the
+        # operator computes y = W x, i.e. W[target, source]: transpose.
+        if sp.issparse(weights):
+            W = sp.csr_matrix(weights.T, dtype=np.float32)
+            if threshold is not None:
+                W.data[np.abs(W.data) <= threshold] = 0.0
+            W.eliminate_zeros()
+            nnz = W.nnz
+        else:
+            W = np.asarray(weights, dtype=np.float32).T
+            if threshold is not None:
+                W = np.where(np.abs(W) > threshold, W, np.float32(0.0))
+            nnz = np.count_nonzero(W)
+        density = nnz / float(n_genes * n_genes) if n_genes else 0.0
         
-        mapping = {}
-        for node in node_list:
-            try:
-                idx = int(node.split('_')[1])
-                mapping[node] = idx
-            except:
-                logger.warning(f"Could not parse index from node name {node}")
-                
-        for u, v, data in grn.edges(data=True):
-            if u in mapping and v in mapping:
-                # W_ij means j -> i usually in NN, but here we used row=source, col=target in GRN extraction
-                # W[row, col] -> row affects col.
-                # So if u -> v, then u is source, v is target.
-                # In standard NN: y = Wx + b. x is input (source), y is output (target).
-                # y_v = sum(W_vu * x_u).
-                # So W_matrix should be (n_targets, n_sources).
-                # GRN extraction stored weights[r, c] where r=source, c=target.
-                # So we need to transpose to get W_vu.
-                
-                idx_u = mapping[u] # Source
-                idx_v = mapping[v] # Target
-                W[idx_v, idx_u] = data['weight'] # Transposed
+        as_csr = self.format == "csr" or (self.format == "auto" and density <= self.sparse_density)
+        if as_csr:
+            W = sp.csr_matrix(W)
+        else:
+            W = np.ascontiguousarray(W.toarray() if sp.issparse(W) else W)
                 
         return {
             "weights": W,
             "bias": np.zeros(n_genes, dtype=np.float32), # Assuming zero bias for now
-            "activation": self.activation
+            "activation": self.activation,
+            "format": "csr" if sp.issparse(W) else "dense",
+            "density": density,
+            "gene_names": list(gene_names),
+            "gene_index": {name: i for i, name in enumerate(gene_names)}
         }
+        
+    def distill(self, grn: nx.DiGraph, n_genes: int, gene_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Converts GRN graph to operator matrices.
+        
+        Args:
+            grn: Inferred GRN.
+            n_genes: Total genes (dimension).
+            gene_names: Optional ordered gene names defining the operator's index.
+                        Without it, nodes named "Gene_i" map to index i and any other
+                        names (e.g. real gene symbols) are indexed in sorted order.
+            
+        Returns:
+            Same dictionary as `distill_weights`.
+        """
+        if gene_names is None:
+            gene_names = self._default_gene_order(grn, n_genes)
+            
+        index = {name: i for i, name in enumerate(gene_names)}
+        nodes = [node for node in grn.nodes() if node in index]
+        missing = grn.number_of_nodes() - len(nodes)
+        if missing:
+            logger.warning(f"{missing} GRN nodes are not in the gene index and were dropped")
+            
+        # Edge weights as a (source, target) sparse adjacency, remapped to the gene index
+        adj = nx.to_scipy_sparse_array(grn, nodelist=nodes, weight="weight", format="coo")
+        node_idx = np.array([index[node] for node in nodes], dtype=np.int64)
+        adjacency = sp.coo_matrix((adj.data, (node_idx[adj.row], node_idx[adj.col])), 
+                                  shape=(n_genes, n_genes))
+        
+        return self.distill_weights(adjacency, gene_names=gene_names)
+    
+    @staticmethod
+    def _default_gene_order(grn: nx.DiGraph, n_genes: int) -> List[str]:
+        """
+        "Gene_i" nodes keep index i; other node names fill the free slots in sorted order.
+        """
+        gene_names = [None] * n_genes
+        others = []
+        for node in sorted(grn.nodes(), key=str):
+            name = str(node)
+            prefix, _, suffix = name.partition("_")
+            if prefix == "Gene" and suffix.isdigit() and int(suffix) < n_genes and gene_names[int(suffix)] is None:
+                gene_names[int(suffix)] = node
+            else:
+                others.append(node)
+                
+        free = [i for i, name in enumerate(gene_names) if name is None]
+        if len(others) > len(free):
+            raise ValueError(f"GRN has {grn.number_of_nodes()} nodes but n_genes is {n_genes}")
+        for i, node in zip(free, others):
+            gene_names[i] = node
+        for i in free[len(others):]:
+            gene_names[i] = f"Gene_{i}"
+        return gene_names
@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import logging
+
+from .engine import OperatorEngine
+
+logger = logging.getLogger(__name__)
+
+class PerturbationScreen:
+    """
+    In-silico knockout / overexpression screen over the genes of a distilled operator.
+
+    Every perturbation is a trajectory of the operator dynamics with one gene pinned
+    (to 0 for a knockout, to a high value for overexpression), started from the
+    unperturbed steady state. Perturbations are simulated as batched rollouts, one
+    block of genes at a time, and the shift of the steady state relative to the
+    unperturbed one is written per block, to disk if requested.
+    """
+
+    MODES = ("knockout", "overexpression")
+
+    def __init__(self,
+                 operators: Dict[str, Any],
+                 mode: str = "knockout",
+                 value: Optional[float] = None,
+                 n_steps: int = 200,
+                 tol: float = 1e-5,
+                 block_size: int = 256,
+                 engine: Optional[OperatorEngine] = None):
+        """
+        Args:
+            operators: Output of OperatorDistiller.
+            mode: 'knockout' or 'overexpression'.
+            value: Level the perturbed gene is pinned to. Defaults to 0 for knockouts
+                   and 1 (the saturation level of the sigmoid operator) for
+                   overexpression.
+            n_steps: Maximum rollout length per perturbation.
+            tol: Fixed point tolerance (max absolute change per step).
+            block_size: Perturbations simulated together; bounds the working set to
+                        a few block_size x n_genes buffers.
+            engine: Optional pre-built engine for the operator.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown perturbation mode {mode}")
+        self.mode = mode
+        self.value = value if value is not None else (0.0 if mode == "knockout" else 1.0)
+        self.n_steps = n_steps
+        self.tol = tol
+        self.block_size = block_size
+        self.engine = engine if engine is not None else OperatorEngine(operators)
+        self.gene_names = operators.get("gene_names")
+
+    def steady_state(self, x0: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Unperturbed steady state reached from `x0` (default: all zeros).
+        """
+        if x0 is None:
+            x0 = np.zeros(self.engine.n_genes, dtype=self.engine.dtype)
+        result = self.engine.rollout(x0, self.n_steps, tol=self.tol)
+        if not result["converged"]:
+            logger.warning(f"Baseline did not converge within {self.n_steps} steps")
+        return result
+
+    def run(self,
+            x0: Optional[np.ndarray] = None,
+            genes: Optional[np.ndarray] = None,
+            output_path: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Runs the screen.
+
+        Args:
+            x0: Optional (n_genes,) starting expression for the baseline.
+            genes: Indices of the genes to perturb. Defaults to all genes.
+            output_path: If given, effects are streamed block by block into this .npy
+                         file (memory-mapped) instead of being held in memory.
+
+        Returns:
+            Dictionary containing 'effects' ((n_perturbed, n_genes) steady-state shift
+            per perturbation, row i for genes[i]), 'genes', 'baseline' (unperturbed
+            steady state), and per perturbed gene 'converged' and 'n_steps' (steps
+            until its trajectory reached tol).
+        """
+        n_genes = self.engine.n_genes
+        genes = np.arange(n_genes) if genes is None else np.asarray(genes, dtype=np.int64)
+        n_perturbed = len(genes)
+
+        baseline = self.steady_state(x0)["final"]
+
+        if output_path is not None:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            effects = np.lib.format.open_memmap(output_path, mode="w+", dtype=self.engine.dtype,
+                                                shape=(n_perturbed, n_genes))
+        else:
+            effects = np.empty((n_perturbed, n_genes), dtype=self.engine.dtype)
+        converged = np.zeros(n_perturbed, dtype=bool)
+        steps = np.zeros(n_perturbed, dtype=np.int64)
+
+        for start in range(0, n_perturbed, self.block_size):
+            stop = min(start + self.block_size, n_perturbed)
+            block = genes[start:stop]
+
+            # One row per perturbed gene, all starting from the unperturbed steady state
+            x_block = np.broadcast_to(baseline, (len(block), n_genes))
+            result = self.engine.rollout(x_block, self.n_steps, tol=self.tol, clamp=(block, self.value))
+
+            np.subtract(result["final"], baseline, out=effects[start:stop])
+            converged[start:stop] = result["converged"]
+            steps[start:stop] = result["sample_steps"]
+
+            if output_path is not None:
+                effects.flush()
+            logger.debug(f"Perturbed genes {start}-{stop} of {n_perturbed} ({result['n_steps']} steps)")
+
+        n_failed = int(np.sum(~converged))
+        if n_failed:
+            logger.warning(f"{n_failed} of {n_perturbed} perturbations did not converge within {self.n_steps} steps")
+
+        return {
+            "effects": effects,
+            "genes": genes,
+            "baseline": baseline,
+            "converged": converged,
+            "n_steps": steps
+        }
+
+    def summarize(self, result: Dict[str, Any], top_n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Per perturbed gene: total absolute effect and most affected genes.
+        Reads the effects block by block, so it works on memory-mapped results.
+        """
+        effects = result["effects"]
+        names = self.gene_names or [f"Gene_{i}" for i in range(self.engine.n_genes)]
+        rows = []
+        for start in range(0, len(effects), self.block_size):
+            block = np.abs(np.asarray(effects[start:start + self.block_size]))
+            block[np.arange(len(block)), result["genes"][start:start + self.block_size]] = 0.0
+            total = block.sum(axis=1)
+            k = min(top_n, block.shape[1])
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            for i in range(len(block)):
+                order = top[i][np.argsort(-block[i, top[i]])]
+                gene = result["genes"][start + i]
+                rows.append({
+                    "gene": names[gene],
+                    "total_effect": float(total[i]),
+                    "converged": bool(result["converged"][start + i]),
+                    "n_steps": int(result["n_steps"][start + i]),
+                    "top_targets": [names[j] for j in order if block[i, j] > 0]
+                })
+        return rows
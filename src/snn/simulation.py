@@ -1,7 +1,9 @@
 import numpy as np
-from typing import List, Optional
+from typing import List, Optional, Union
 import logging
 from ..stdp.generalized_stdp import CausalSTDP
+from ..encoding.spike_trains import SpikeTrains
+from ..utils import instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -10,19 +12,30 @@ class SNNNetwork:
     Spiking Neural Network with STDP plasticity.
     """
     
-    def __init__(self, n_neurons: int, stdp_rule: Optional[CausalSTDP] = None):
+    def __init__(self, 
+                 n_neurons: int, 
+                 stdp_rule: Optional[CausalSTDP] = None, 
+                 dtype: np.dtype = np.float64):
+        """
+        Args:
+            n_neurons: Number of neurons (genes).
+            stdp_rule: Plasticity rule. Defaults to CausalSTDP in the same dtype.
+            dtype: Floating point type of the weights, membrane potentials and traces.
+                   float32 halves the memory of the (n_neurons, n_neurons) weight matrix.
+        """
         self.n_neurons = n_neurons
-        self.weights = np.zeros((n_neurons, n_neurons))
-        self.stdp = stdp_rule if stdp_rule else CausalSTDP()
+        self.dtype = np.dtype(dtype)
+        self.weights = np.zeros((n_neurons, n_neurons), dtype=self.dtype)
+        self.stdp = stdp_rule if stdp_rule else CausalSTDP(dtype=self.dtype)
         
         # Neuron state
-        self.v = np.zeros(n_neurons)
+        self.v = np.zeros(n_neurons, dtype=self.dtype)
         self.threshold = 1.0
         self.decay = 0.1 # Membrane potential decay
         
         # Traces for STDP
-        self.pre_traces = np.zeros(n_neurons)
-        self.post_traces = np.zeros(n_neurons)
+        self.pre_traces = np.zeros(n_neurons, dtype=self.dtype)
+        self.post_traces = np.zeros(n_neurons, dtype=self.dtype)
         self.trace_decay = 0.1 # Corresponds to tau ~ 10ms if dt=1ms
         
     def reset(self):
@@ -31,6 +44,43 @@ class SNNNetwork:
         self.post_traces.fill(0)
         # Weights persist
         
+    def advance(self, n_steps: int, exact: bool = True):
+        """
+        Advances the network over `n_steps` steps without any input spikes.
+        
+        With no spikes, the STDP update and diagonal mask leave the weights untouched,
+        so only the traces change. They decay by (1 - trace_decay) per step.
+        
+        Args:
+            n_steps: Number of silent time steps to skip.
+            exact: If True, applies the per-step decay repeatedly so traces stay
+                   bit-identical to calling `step` with an empty input. If False, uses
+                   the closed form (1 - trace_decay) ** n_steps (equal up to rounding).
+        """
+        if n_steps <= 0:
+            return
+            
+        factor = 1 - self.trace_decay
+        if exact:
+            for _ in range(n_steps):
+                self.pre_traces *= factor
+                self.post_traces *= factor
+        else:
+            gap_factor = factor ** n_steps
+            self.pre_traces *= gap_factor
+            self.post_traces *= gap_factor
+        
+    def update_traces(self, input_spikes: np.ndarray):
+        """
+        Decays the traces by one step and adds the spikes of this step.
+        """
+        self.pre_traces *= (1 - self.trace_decay)
+        self.post_traces *= (1 - self.trace_decay)
+        
+        # If a neuron spikes (externally driven), trace goes to 1 (or adds 1)
+        self.pre_traces[input_spikes] += 1.0
+        self.post_traces[input_spikes] += 1.0
+        
     def step(self, input_spikes: np.ndarray, dt: float = 1.0, learning: bool = True):
         """
         Single simulation step.
@@ -44,12 +94,7 @@ class SNNNetwork:
             dt: Time step ms.
         """
         # 1. Update Traces
-        self.pre_traces *= (1 - self.trace_decay)
-        self.post_traces *= (1 - self.trace_decay)
-        
-        # If a neuron spikes (externally driven), trace goes to 1 (or adds 1)
-        self.pre_traces[input_spikes] += 1.0
-        self.post_traces[input_spikes] += 1.0
+        self.update_traces(input_spikes)
         
         # 2. STDP Update
         if learning:
@@ -65,25 +110,145 @@ class SNNNetwork:
             # Mask self-connections
             np.fill_diagonal(self.weights, 0.0)
 
+class BatchedSNNNetwork:
+    """
+    A stack of independent SNNNetworks advanced in lock-step.
+    
+    State is shaped (n_batch, n_neurons) and weights (n_batch, n_neurons, n_neurons),
+    so one step of all networks is a handful of batched array operations instead of
+    a Python loop over networks. Network b evolves exactly like an SNNNetwork fed the
+    b-th row of the inputs.
+    """
+    
+    def __init__(self, 
+                 n_batch: int, 
+                 n_neurons: int, 
+                 stdp_rule: Optional[CausalSTDP] = None, 
+                 dtype: np.dtype = np.float64):
+        """
+        Args:
+            n_batch: Number of independent networks.
+            n_neurons: Number of neurons (genes) per network.
+            stdp_rule: Plasticity rule shared by all networks.
+            dtype: Floating point type of weights, potentials and traces.
+        """
+        self.n_batch = n_batch
+        self.n_neurons = n_neurons
+        self.dtype = np.dtype(dtype)
+        self.weights = np.zeros((n_batch, n_neurons, n_neurons), dtype=self.dtype)
+        self.stdp = stdp_rule if stdp_rule else CausalSTDP(dtype=self.dtype)
+        
+        # Neuron state
+        self.v = np.zeros((n_batch, n_neurons), dtype=self.dtype)
+        self.threshold = 1.0
+        self.decay = 0.1
+        
+        # Traces for STDP
+        self.pre_traces = np.zeros((n_batch, n_neurons), dtype=self.dtype)
+        self.post_traces = np.zeros((n_batch, n_neurons), dtype=self.dtype)
+        self.trace_decay = 0.1
+        
+        self._diagonal = np.arange(n_neurons)
+        
+    def reset(self):
+        self.v.fill(0)
+        self.pre_traces.fill(0)
+        self.post_traces.fill(0)
+        
+    def advance(self, n_steps: int, exact: bool = True):
+        """
+        Advances all networks over `n_steps` silent steps (see SNNNetwork.advance).
+        """
+        SNNNetwork.advance(self, n_steps, exact=exact)
+        
+    def update_traces(self, input_spikes: np.ndarray):
+        """
+        Decays the traces by one step and adds the spikes (n_batch, n_neurons) of this step.
+        """
+        SNNNetwork.update_traces(self, input_spikes)
+        
+    def step(self, input_spikes: np.ndarray, dt: float = 1.0, learning: bool = True):
+        """
+        Single simulation step of all networks.
+        
+        Args:
+            input_spikes: Boolean array (n_batch, n_neurons) of clamped spikes per network.
+            dt: Time step ms.
+        """
+        self.update_traces(input_spikes)
+        
+        if learning:
+            # A window of one step per network is exactly the per-step update
+            window_spikes = input_spikes[:, None, :]
+            self.apply_window(window_spikes, self.pre_traces[:, None, :], self.post_traces[:, None, :])
+            
+    def apply_window(self, spike_block: np.ndarray, pre_block: np.ndarray, post_block: np.ndarray):
+        """
+        Applies the STDP updates of a (n_batch, k, n_neurons) window of steps.
+        """
+        self.stdp.process_window(self.weights, pre_block, post_block, spike_block, spike_block)
+        
+        # Mask self-connections
+        self.weights[:, self._diagonal, self._diagonal] = 0.0
+
 class Trainer:
     """
     Manages training across cohorts.
     """
     
-    def __init__(self, n_genes: int):
+    def __init__(self, 
+                 n_genes: int, 
+                 stdp_rule: Optional[CausalSTDP] = None, 
+                 dtype: np.dtype = np.float64):
+        """
+        Args:
+            n_genes: Number of genes (neurons).
+            stdp_rule: Optional plasticity rule; should use the same dtype.
+            dtype: Floating point type of the trained weights (e.g. np.float32).
+        """
         self.n_genes = n_genes
-        self.network = SNNNetwork(n_genes)
+        self.dtype = np.dtype(dtype)
+        self.network = SNNNetwork(n_genes, stdp_rule=stdp_rule, dtype=self.dtype)
         
-    def train_cohort(self, spike_trains: List[np.ndarray], duration_ms: float, dt: float = 1.0):
+    @instrumentation.timed("trainer.train_cohort")
+    def train_cohort(self, 
+                     spike_trains: Union[SpikeTrains, List[np.ndarray]], 
+                     duration_ms: float, 
+                     dt: float = 1.0,
+                     event_driven: bool = True,
+                     stdp_window: int = 1,
+                     exact_decay: bool = True):
         """
         Trains on a single cohort's data.
         
         Args:
-            spike_trains: List of spike times per gene.
+            spike_trains: SpikeTrains, or list of spike times per gene.
+            duration_ms: Simulated duration (ms). Spikes at or after it are ignored.
+            dt: Time step (ms).
+            event_driven: If True, only time steps containing spikes are simulated and
+                          the traces are decayed across the silent gaps in between.
+                          Produces bit-identical weights to the dense step loop.
+            stdp_window: Number of spiking steps whose STDP updates are accumulated and
+                         applied together via `CausalSTDP.process_window` (event-driven
+                         mode only). 1 keeps the exact per-step updates; see
+                         `process_window` for the tolerance of larger windows.
+            exact_decay: Event-driven mode only. If False, silent gaps decay the traces
+                         with the closed form (1 - trace_decay) ** gap in one multiply
+                         (see `SNNNetwork.advance`) instead of once per step; weights
+                         then match the dense loop only up to rounding.
         """
         self.network.reset()
         n_steps = int(duration_ms / dt)
         
+        if not isinstance(spike_trains, SpikeTrains):
+            spike_trains = SpikeTrains.from_times(spike_trains, dt=dt)
+        elif spike_trains.dt != dt:
+            spike_trains = SpikeTrains.from_times(spike_trains.to_list(), dt=dt)
+        instrumentation.add_items(spike_trains.n_spikes)
+        
+        if event_driven:
+            return self._train_events(spike_trains, n_steps, dt, stdp_window, exact_decay)
+        
         # Convert spike times to dense matrix for efficient stepping
         # Shape: (n_steps, n_genes) - sparse boolean
         # This might be memory intensive for long durations, but okay for batches.
@@ -91,8 +256,8 @@ class Trainer:
         
         # Optimization: Pre-compute spike grid
         spike_grid = np.zeros((n_steps, self.n_genes), dtype=bool)
-        for i, times in enumerate(spike_trains):
-            indices = (np.array(times) / dt).astype(int)
+        for i in range(spike_trains.n_genes):
+            indices = spike_trains.gene_steps(i)
             indices = indices[indices < n_steps]
             spike_grid[indices, i] = True
             
@@ -102,6 +267,158 @@ class Trainer:
             self.network.step(current_spikes, dt=dt, learning=True)
             
         return self.network.weights.copy()
+    
+    def _train_events(self, 
+                      spike_trains: SpikeTrains, 
+                      n_steps: int, 
+                      dt: float, 
+                      stdp_window: int = 1,
+                      exact_decay: bool = True) -> np.ndarray:
+        """
+        Event-driven equivalent of the dense step loop in `train_cohort`.
+        
+        A step without spikes only decays the traces (the STDP clip and diagonal mask
+        are no-ops on an already clipped, zero-diagonal matrix), so those steps are
+        folded into `SNNNetwork.advance` instead of being simulated one by one.
+        """
+        event_steps, offsets, event_genes = spike_trains.events(n_steps)
+        network = self.network
+        
+        if stdp_window > 1:
+            window = min(stdp_window, max(len(event_steps), 1))
+            spike_block = np.zeros((window, self.n_genes), dtype=bool)
+            pre_block = np.zeros((window, self.n_genes), dtype=network.pre_traces.dtype)
+            post_block = np.zeros((window, self.n_genes), dtype=network.post_traces.dtype)
+        else:
+            current_spikes = np.zeros(self.n_genes, dtype=bool)
+            
+        last_step = -1
+        filled = 0
+        
+        for k, step in enumerate(event_steps):
+            network.advance(step - last_step - 1, exact=exact_decay)
+            active = event_genes[offsets[k]:offsets[k + 1]]
+            last_step = step
+            
+            if stdp_window <= 1:
+                current_spikes[active] = True
+                network.step(current_spikes, dt=dt, learning=True)
+                current_spikes[active] = False
+                continue
+                
+            # Record the post-update traces of this step; STDP is applied per window
+            spike_block[filled].fill(False)
+            spike_block[filled, active] = True
+            network.update_traces(spike_block[filled])
+            pre_block[filled] = network.pre_traces
+            post_block[filled] = network.post_traces
+            filled += 1
+            
+            if filled == window:
+                self._apply_window(spike_block, pre_block, post_block)
+                filled = 0
+                
+        if stdp_window > 1 and filled > 0:
+            self._apply_window(spike_block[:filled], pre_block[:filled], post_block[:filled])
+            
+        # Trailing silent steps keep the trace state identical to the dense loop
+        network.advance(n_steps - last_step - 1, exact=exact_decay)
+            
+        return network.weights.copy()
+    
+    def _apply_window(self, spike_block: np.ndarray, pre_block: np.ndarray, post_block: np.ndarray):
+        network = self.network
+        network.stdp.process_window(network.weights, 
+                                    pre_block, 
+                                    post_block, 
+                                    spike_block, 
+                                    spike_block)
+        np.fill_diagonal(network.weights, 0.0)
+
+    def train_parallel(self, 
+                       cohort_spikes: List[Union[SpikeTrains, List[np.ndarray]]], 
+                       duration_ms: float, 
+                       dt: float = 1.0,
+                       stdp_window: int = 1,
+                       exact_decay: bool = True) -> np.ndarray:
+        """
+        Trains an independent network per cohort, all advanced in lock-step.
+        
+        Unlike `train_batch`, which accumulates one weight matrix across cohorts,
+        each cohort (e.g. a bootstrap resample or a synthetic cohort) gets its own
+        weights, identical to running `train_cohort` on it alone. Only steps in which
+        at least one cohort spikes are simulated.
+        
+        Args:
+            cohort_spikes: Spike trains per cohort, all with n_genes genes.
+            duration_ms: Simulated duration (ms) of every cohort.
+            dt: Time step (ms).
+            stdp_window: Number of spiking steps accumulated per batched STDP update
+                         (see `CausalSTDP.process_window`); 1 is exact.
+            exact_decay: See `train_cohort`.
+            
+        Returns:
+            Weights of shape (n_cohorts, n_genes, n_genes).
+        """
+        n_steps = int(duration_ms / dt)
+        n_batch = len(cohort_spikes)
+        stdp = self.network.stdp
+        network = BatchedSNNNetwork(n_batch, self.n_genes, stdp_rule=stdp, dtype=self.dtype)
+        
+        # Spikes of all cohorts as (step, cohort, gene) triples, grouped by step
+        step_chunks, batch_chunks, gene_chunks = [], [], []
+        for b, spikes in enumerate(cohort_spikes):
+            if not isinstance(spikes, SpikeTrains) or spikes.dt != dt:
+                spikes = SpikeTrains.from_times(list(spikes), dt=dt)
+            spikes = spikes.compact()
+            genes = np.repeat(np.arange(spikes.n_genes), spikes.counts())
+            keep = spikes.steps < n_steps
+            step_chunks.append(spikes.steps[keep])
+            gene_chunks.append(genes[keep])
+            batch_chunks.append(np.full(int(np.sum(keep)), b))
+            
+        steps = np.concatenate(step_chunks) if step_chunks else np.zeros(0, dtype=np.int32)
+        batches = np.concatenate(batch_chunks) if batch_chunks else np.zeros(0, dtype=int)
+        genes = np.concatenate(gene_chunks) if gene_chunks else np.zeros(0, dtype=int)
+        
+        order = np.argsort(steps, kind="stable")
+        steps, batches, genes = steps[order], batches[order], genes[order]
+        event_steps, starts = np.unique(steps, return_index=True)
+        offsets = np.append(starts, len(steps))
+        
+        window = max(1, min(stdp_window, len(event_steps)))
+        spike_block = np.zeros((n_batch, window, self.n_genes), dtype=bool)
+        pre_block = np.zeros((n_batch, window, self.n_genes), dtype=self.dtype)
+        post_block = np.zeros((n_batch, window, self.n_genes), dtype=self.dtype)
+        
+        last_step = -1
+        filled = 0
+        
+        for k, step in enumerate(event_steps):
+            network.advance(step - last_step - 1, exact=exact_decay)
+            last_step = step
+            
+            block_spikes = spike_block[:, filled, :]
+            block_spikes.fill(False)
+            block_spikes[batches[offsets[k]:offsets[k + 1]], genes[offsets[k]:offsets[k + 1]]] = True
+            
+            network.update_traces(block_spikes)
+            pre_block[:, filled, :] = network.pre_traces
+            post_block[:, filled, :] = network.post_traces
+            filled += 1
+            
+            if filled == window:
+                network.apply_window(spike_block, pre_block, post_block)
+                filled = 0
+                
+        if filled > 0:
+            network.apply_window(spike_block[:, :filled], pre_block[:, :filled], post_block[:, :filled])
+            
+        network.advance(n_steps - last_step - 1, exact=exact_decay)
+        
+        logger.info(f"Trained {n_batch} cohorts in lock-step over {len(event_steps)} spiking steps")
+            
+        return network.weights
 
     def train_batch(self, 
                     cohort_spikes: List[List[np.ndarray]], 
@@ -1,6 +1,9 @@
 import numpy as np
 from typing import Optional, Callable
 import logging
+import time
+
+from ..utils import instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +21,8 @@ class GeneralizedSTDP:
                  A_plus: float = 1.0,
                  A_minus: float = 1.0,
                  w_max: float = 1.0,
-                 w_min: float = -1.0):
+                 w_min: float = -1.0,
+                 dtype: np.dtype = np.float64):
         """
         Args:
             learning_rate: Global scaling factor for weight updates.
@@ -28,6 +32,7 @@ class GeneralizedSTDP:
             A_minus: Amplitude of LTD update.
             w_max: Maximum weight bound.
             w_min: Minimum weight bound.
+            dtype: Floating point type the weight updates are computed in.
         """
         self.lr = learning_rate
         self.tau_plus = tau_plus
@@ -36,6 +41,7 @@ class GeneralizedSTDP:
         self.A_minus = A_minus
         self.w_max = w_max
         self.w_min = w_min
+        self.dtype = np.dtype(dtype)
         
     def update_weights(self, 
                        weights: np.ndarray, 
@@ -98,37 +104,140 @@ class CausalSTDP(GeneralizedSTDP):
         On-line STDP update using traces.
         
         Args:
-            weights: (n_pre, n_post) matrix. Modified in-place.
+            weights: (n_pre, n_post) matrix. Modified in-place. Assumed to start within
+                     [w_min, w_max]; only the touched rows/columns are re-clipped.
             pre_traces: (n_pre,) exponential trace of pre-synaptic activity.
             post_traces: (n_post,) exponential trace of post-synaptic activity.
             pre_spikes: (n_pre,) boolean mask of neurons that spiked this step.
             post_spikes: (n_post,) boolean mask of neurons that spiked this step.
         """
+        # Called once per spiking step: aggregate counters only, no per-call records
+        start = time.perf_counter_ns() if instrumentation.ENABLED else 0
         
         # LTP: Pre (trace) -> Post (spike)
         # If post neuron j spikes, increase weights from all pre i based on their trace.
-        if np.any(post_spikes):
+        active_post_indices = np.flatnonzero(post_spikes)
+        if len(active_post_indices) > 0:
             # w_ij += lr * A_plus * pre_trace_i
             # We update columns j where post_spikes[j] is True
-            active_post_indices = np.where(post_spikes)[0]
             
             # Outer product-like update, but we only select columns
             # delta (n_pre, n_active_post) = pre_traces[:, None] * 1
             
             # weights[:, j] += ...
-            dw_ltp = self.lr * modulation * self.A_plus * pre_traces[:, None]
+            dw_ltp = self.dtype.type(self.lr * modulation * self.A_plus) * pre_traces[:, None]
             weights[:, active_post_indices] += dw_ltp
             
         # LTD: Post (trace) -> Pre (spike)
         # If pre neuron i spikes, decrease weights to all post j based on their trace.
-        if np.any(pre_spikes):
-            active_pre_indices = np.where(pre_spikes)[0]
-            
+        active_pre_indices = np.flatnonzero(pre_spikes)
+        if len(active_pre_indices) > 0:
             # weights[i, :] -= ...
-            dw_ltd = self.lr * modulation * self.A_minus * post_traces[None, :]
+            dw_ltd = self.dtype.type(self.lr * modulation * self.A_minus) * post_traces[None, :]
             weights[active_pre_indices, :] -= dw_ltd
             
         # Clip weights
+        # Only the touched columns/rows can have left [w_min, w_max]; clipping the
+        # whole n x n matrix every step is pure memory traffic.
+        self.clip_touched(weights, active_pre_indices, active_post_indices)
+        
+        if instrumentation.ENABLED:
+            instrumentation.count("stdp.process_event", 
+                                  calls=1, 
+                                  ns=time.perf_counter_ns() - start,
+                                  pre_active=len(active_pre_indices), 
+                                  post_active=len(active_post_indices))
+        
+        return weights
+    
+    def process_window(self, 
+                       weights: np.ndarray, 
+                       pre_traces: np.ndarray, 
+                       post_traces: np.ndarray, 
+                       pre_spikes: np.ndarray, 
+                       post_spikes: np.ndarray,
+                       modulation: float = 1.0):
+        """
+        Applies the trace STDP updates of a window of k steps at once.
+        
+        The per-step LTP/LTD outer products are summed as rank-k products
+        
+            dW = lr * (A_plus * pre_traces.T @ post_spikes - A_minus * pre_spikes.T @ post_traces)
+        
+        restricted to the columns/rows that spiked in the window, so each side is a
+        single GEMM, followed by one clip of the touched columns/rows.
+        
+        Tolerance vs. calling `process_event` k times: clipping is deferred to the
+        end of the window, so results are equal up to floating-point summation order
+        (~1e-12 relative in float64) as long as no weight reaches w_min/w_max inside
+        the window. A weight that saturates mid-window can differ by at most
+        k * lr * modulation * max(A_plus, A_minus) * max(trace).
+        
+        Independent networks can be updated together by adding a leading batch
+        dimension to all arguments; each network then gets its own pair of GEMMs via
+        batched matmul and the whole stack is clipped.
+        
+        Args:
+            weights: (n_pre, n_post) matrix, or (batch, n_pre, n_post). Modified in-place.
+            pre_traces: (k, n_pre) pre-synaptic traces at each step of the window.
+            post_traces: (k, n_post) post-synaptic traces at each step of the window.
+            pre_spikes: (k, n_pre) boolean spike masks.
+            post_spikes: (k, n_post) boolean spike masks.
+        """
+        if weights.ndim == 3:
+            return self._process_window_batched(weights, pre_traces, post_traces, 
+                                                pre_spikes, post_spikes, modulation)
+            
+        active_post_indices = np.flatnonzero(post_spikes.any(axis=0))
+        if len(active_post_indices) > 0:
+            indicator = post_spikes[:, active_post_indices].astype(self.dtype)
+            dw_ltp = pre_traces.T @ indicator
+            dw_ltp *= self.dtype.type(self.lr * modulation * self.A_plus)
+            weights[:, active_post_indices] += dw_ltp
+            
+        active_pre_indices = np.flatnonzero(pre_spikes.any(axis=0))
+        if len(active_pre_indices) > 0:
+            indicator = pre_spikes[:, active_pre_indices].astype(self.dtype)
+            dw_ltd = indicator.T @ post_traces
+            dw_ltd *= self.dtype.type(self.lr * modulation * self.A_minus)
+            weights[active_pre_indices, :] -= dw_ltd
+            
+        self.clip_touched(weights, active_pre_indices, active_post_indices)
+        
+        return weights
+    
+    def _process_window_batched(self, 
+                                weights: np.ndarray, 
+                                pre_traces: np.ndarray, 
+                                post_traces: np.ndarray, 
+                                pre_spikes: np.ndarray, 
+                                post_spikes: np.ndarray,
+                                modulation: float = 1.0):
+        """
+        `process_window` for a stack of independent (batch, n_pre, n_post) weights.
+        """
+        # (batch, n_pre, k) @ (batch, k, n_post)
+        dw_ltp = np.matmul(pre_traces.swapaxes(-1, -2), post_spikes.astype(self.dtype))
+        dw_ltp *= self.dtype.type(self.lr * modulation * self.A_plus)
+        weights += dw_ltp
+        
+        dw_ltd = np.matmul(pre_spikes.astype(self.dtype).swapaxes(-1, -2), post_traces, out=dw_ltp)
+        dw_ltd *= self.dtype.type(self.lr * modulation * self.A_minus)
+        weights -= dw_ltd
+        
         np.clip(weights, self.w_min, self.w_max, out=weights)
         
         return weights
+    
+    def clip_touched(self, 
+                     weights: np.ndarray, 
+                     row_indices: np.ndarray, 
+                     col_indices: np.ndarray):
+        """
+        Clips only the given rows and columns of `weights` to [w_min, w_max].
+        Entries outside them are assumed to be within bounds already.
+        """
+        if len(col_indices) > 0:
+            weights[:, col_indices] = np.clip(weights[:, col_indices], self.w_min, self.w_max)
+        if len(row_indices) > 0:
+            weights[row_indices, :] = np.clip(weights[row_indices, :], self.w_min, self.w_max)
@@ -1,45 +1,46 @@
 import logging
 import requests
-from Bio import Entrez
-import pandas as pd
-from typing import Dict, Optional, Any
-import time
+from typing import Dict, List, Optional, Any, Tuple
+
+from .http import HttpClient, get_client, BIOSTUDIES_BASE_URL
 
 logger = logging.getLogger(__name__)
 
-# Constants (Shared with discovery script, ideally in a config)
-ENTREZ_EMAIL = "kora_agent@example.com" 
+# Cohorts with fewer samples are rejected
+MIN_SAMPLES = 8
 
-def fetch_geo_metadata(accession: str) -> Optional[Dict[str, Any]]:
+def fetch_geo_metadata(accession: str,
+                       client: Optional[HttpClient] = None,
+                       min_samples: int = MIN_SAMPLES,
+                       use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """
-    Fetches metadata for a GEO accession using Entrez.
-    Validates sample count >= 8.
+    Fetches metadata for a GEO accession using the E-utilities JSON API.
+    Validates sample count >= min_samples. use_cache=False skips the client's
+    response cache (for refreshing known datasets).
     """
-    Entrez.email = ENTREZ_EMAIL
+    client = client or get_client()
     try:
         # Search to get GDS/GSE UID
-        handle = Entrez.esearch(db="gds", term=f"{accession}[Accession]", retmax=1)
-        search_res = Entrez.read(handle)
-        handle.close()
+        search_res = client.eutils("esearch", use_cache=use_cache, db="gds",
+                                   term=f"{accession}[Accession]", retmax=1)
+        id_list = search_res.get("esearchresult", {}).get("idlist", [])
         
-        if not search_res["IdList"]:
+        if not id_list:
             logger.warning(f"GEO Accession {accession} not found.")
             return None
             
-        uid = search_res["IdList"][0]
+        uid = id_list[0]
         
         # Get Summary
-        handle = Entrez.esummary(db="gds", id=uid)
-        summary = Entrez.read(handle)[0]
-        handle.close()
+        summary = client.eutils("esummary", use_cache=use_cache, db="gds", id=uid).get("result", {}).get(uid, {})
         
         n_samples = summary.get("n_samples", 0)
         # Type coercion
-        if isinstance(n_samples, str) and n_samples.isdigit():
-            n_samples = int(n_samples)
+        if isinstance(n_samples, str):
+            n_samples = int(n_samples) if n_samples.isdigit() else 0
         
-        if n_samples < 8:
-            logger.warning(f"Skipping {accession}: Insufficient samples ({n_samples} < 8)")
+        if n_samples < min_samples:
+            logger.warning(f"Skipping {accession}: Insufficient samples ({n_samples} < {min_samples})")
             return None
             
         return {
@@ -49,7 +50,8 @@ def fetch_geo_metadata(accession: str) -> Optional[Dict[str, Any]]:
             "n_samples": n_samples,
             "platform": summary.get("gpl", ""), # GPL ID
             "taxon": summary.get("taxon", ""),
-            "entry_type": summary.get("entryType", ""), # e.g. GSE
+            "entry_type": summary.get("entrytype", ""), # e.g. GSE
+            "data_type": summary.get("gdstype", ""),
             "ftplink": summary.get("ftplink", "")
         }
         
@@ -57,19 +59,23 @@ def fetch_geo_metadata(accession: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching GEO metadata for {accession}: {e}")
         return None
 
-def fetch_arrayexpress_metadata(accession: str) -> Optional[Dict[str, Any]]:
+def fetch_arrayexpress_metadata(accession: str,
+                                client: Optional[HttpClient] = None,
+                                min_samples: int = MIN_SAMPLES,
+                                use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """
     Fetches metadata for ArrayExpress accession.
     """
-    url = f"https://www.ebi.ac.uk/biostudies/api/v1/studies/{accession}"
+    client = client or get_client()
+    url = f"{BIOSTUDIES_BASE_URL}/studies/{accession}"
     
     try:
-        response = requests.get(url)
-        if response.status_code != 200:
-            logger.warning(f"ArrayExpress Accession {accession} not found (Status {response.status_code})")
+        try:
+            data = client.get_json(url, use_cache=use_cache)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else "?"
+            logger.warning(f"ArrayExpress Accession {accession} not found (Status {status})")
             return None
-            
-        data = response.json()
         
         # Parse logic for ArrayExpress is complex due to flexible JSON structure
         # Often 'section' -> 'subsections' contains 'Assays and Data'
@@ -94,9 +100,9 @@ def fetch_arrayexpress_metadata(accession: str) -> Optional[Dict[str, Any]]:
                 except:
                     pass
         
-        if n_samples < 8 and n_samples != 0: # If 0, we might have failed to parse, so maybe don't skip yet? 
+        if n_samples < min_samples and n_samples != 0: # If 0, we might have failed to parse, so maybe don't skip yet? 
             # But strict constraint says validate.
-            logger.warning(f"Skipping {accession}: Insufficient samples ({n_samples} < 8)")
+            logger.warning(f"Skipping {accession}: Insufficient samples ({n_samples} < {min_samples})")
             return None
             
         return {
@@ -110,11 +116,34 @@ def fetch_arrayexpress_metadata(accession: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching AE metadata for {accession}: {e}")
         return None
 
-def fetch_metadata(accession: str, repository: str) -> Optional[Dict[str, Any]]:
+def fetch_metadata(accession: str,
+                   repository: str,
+                   client: Optional[HttpClient] = None,
+                   min_samples: int = MIN_SAMPLES,
+                   use_cache: bool = True) -> Optional[Dict[str, Any]]:
     if repository == "GEO":
-        return fetch_geo_metadata(accession)
+        return fetch_geo_metadata(accession, client, min_samples, use_cache)
     elif repository == "ArrayExpress":
-        return fetch_arrayexpress_metadata(accession)
+        return fetch_arrayexpress_metadata(accession, client, min_samples, use_cache)
     else:
         logger.warning(f"Unknown repository {repository}")
         return None
+
+def fetch_metadata_batch(entries: List[Tuple[str, str]],
+                         client: Optional[HttpClient] = None,
+                         max_workers: Optional[int] = None,
+                         min_samples: int = MIN_SAMPLES,
+                         use_cache: bool = True) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fetches metadata for many (accession, repository) pairs concurrently.
+    
+    All requests go through one client, so they share its connection pool, the
+    per-host rate limits (NCBI: 3 req/s, 10 with NCBI_API_KEY) and, unless
+    use_cache is False, the response cache.
+    
+    Returns:
+        One entry per input pair, in order (None where fetch_metadata returned None).
+    """
+    client = client or get_client()
+    return client.map(lambda entry: fetch_metadata(entry[0], entry[1], client, min_samples, use_cache), 
+                      entries, max_workers=max_workers)
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+import urllib3
+
+from .http import HttpClient, get_client, RETRY_STATUSES
+from .io import CACHE_DIRNAME, _atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Completed downloads of a directory are recorded in <dir>/.kora_cache/downloads.json:
+#   {"version": 1, "complete": bool, "files": {name: {url, size, sha256, time}}}
+# A file counts as present only if it has an entry and still has the recorded size;
+# transfers in progress live in <name>.part and are resumed with HTTP Range requests.
+MANIFEST_NAME = "downloads.json"
+MANIFEST_VERSION = 1
+PART_SUFFIX = ".part"
+
+# NCBI serves its FTP tree over HTTPS too, which supports Range and connection reuse
+FTP_HOSTS = ("ftp.ncbi.nlm.nih.gov", "ftp.ebi.ac.uk")
+
+def https_url(url: str) -> str:
+    """
+    Rewrites ftp:// URLs of hosts that mirror their FTP tree over HTTPS.
+    """
+    for host in FTP_HOSTS:
+        prefix = f"ftp://{host}/"
+        if url.startswith(prefix):
+            return f"https://{host}/" + url[len(prefix):]
+    return url
+
+def sha256_file(path: Path, chunk_size: int = 1 << 22) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+class _Restart(Exception):
+    """
+    The partial file did not fit the server's answer and was discarded.
+    """
+
+class DownloadManifest:
+    """
+    Record of the verified files of one download directory. Safe to share between
+    the threads of a DownloadManager.
+    """
+
+    _locks: Dict[Path, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.path = self.directory / CACHE_DIRNAME / MANIFEST_NAME
+        with DownloadManifest._locks_guard:
+            self.lock = DownloadManifest._locks.setdefault(self.path.resolve(), threading.Lock())
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": MANIFEST_VERSION, "complete": False, "files": {}}
+
+    def _save(self, data: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write_json(self.path, data)
+
+    def entry(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._load()["files"].get(name)
+
+    def has_file(self, name: str, sha256: Optional[str] = None) -> bool:
+        """
+        True if `name` was recorded and is still on disk with the recorded size
+        (and the given checksum, if any).
+        """
+        entry = self.entry(name)
+        if entry is None:
+            return False
+        path = self.directory / name
+        if not path.exists() or path.stat().st_size != entry["size"]:
+            return False
+        return sha256 is None or entry.get("sha256") == sha256
+
+    def record(self, name: str, url: Optional[str] = None, sha256: Optional[str] = None):
+        """
+        Records a verified file (size taken from disk; checksum computed if not given).
+        """
+        path = self.directory / name
+        entry = {
+            "url": url,
+            "size": path.stat().st_size,
+            "sha256": sha256 or sha256_file(path),
+            "time": time.time(),
+        }
+        with self.lock:
+            data = self._load()
+            data["files"][name] = entry
+            self._save(data)
+
+    def mark_complete(self, complete: bool = True):
+        """
+        Marks the directory as fully downloaded (all wanted files recorded).
+        """
+        with self.lock:
+            data = self._load()
+            data["complete"] = complete
+            self._save(data)
+
+    def is_complete(self) -> bool:
+        """
+        True if the directory was marked complete and all its recorded files are intact.
+        """
+        data = self._load()
+        if not data["complete"]:
+            return False
+        for name, entry in data["files"].items():
+            path = self.directory / name
+            if not path.exists() or path.stat().st_size != entry["size"]:
+                return False
+        return True
+
+class DownloadManager:
+    """
+    Concurrent, resumable file downloads with integrity checks.
+
+    Transfers write to <dest>.part and resume it with Range requests after
+    interruptions (also across runs). A file is moved into place only once its size
+    matches the server's Content-Length (and its sha256 the expected one, if given),
+    and is then recorded in the directory's DownloadManifest.
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 size_limit: Optional[int] = None,
+                 max_retries: int = 5,
+                 chunk_size: int = 1 << 20,
+                 timeout: float = 60.0,
+                 client: Optional[HttpClient] = None):
+        """
+        Args:
+            max_workers: Maximum concurrent transfers (over all calls sharing this manager).
+            size_limit: Files larger than this (bytes) are skipped. None for no limit.
+            max_retries: Retries per file after connection errors or 429/5xx.
+            chunk_size: Bytes read per write.
+            timeout: Connect/read timeout (s).
+            client: HttpClient whose session, rate limits and backoff are used.
+                    Defaults to the shared client.
+        """
+        self.max_workers = max_workers
+        self.size_limit = size_limit
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.client = client or get_client()
+        self._slots = threading.Semaphore(max_workers)
+
+    def _result(self, url, dest_path, status, error=None):
+        size = dest_path.stat().st_size if status in ("downloaded", "cached") else None
+        return {"url": url, "path": dest_path, "status": status, "size": size, "error": error}
+
+    def _adopt_existing(self, dest_path: Path, part_path: Path) -> bool:
+        # A file without manifest entry may be truncated (e.g. an interrupted wget):
+        # continue it as a partial download, the server's size decides.
+        if dest_path.exists() and not part_path.exists():
+            os.replace(dest_path, part_path)
+            return True
+        return False
+
+    def _release_adopted(self, dest_path: Path, part_path: Path):
+        # A download that did not complete leaves an adopted file where it was found
+        # (possibly extended by the bytes fetched before the failure)
+        if part_path.exists() and not dest_path.exists():
+            os.replace(part_path, dest_path)
+
+    def _transfer(self, url: str, part_path: Path) -> Tuple[str, Optional[int], str]:
+        """
+        One attempt to complete `part_path`.
+
+        Returns:
+            (status, total size or None, sha256 of the part file). status is
+            'complete' or 'too_large'.
+        """
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        self.client.throttle(url)
+        with self.client.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # Nothing left to fetch if the part already has the full size
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit() and int(total) == offset:
+                    return "complete", offset, sha256_file(part_path)
+                part_path.unlink()
+                raise _Restart(f"partial file of {url} does not match the remote file")
+            response.raise_for_status()
+
+            length = response.headers.get("Content-Length")
+            if response.status_code == 206:
+                content_range = response.headers.get("Content-Range", "")
+                start = content_range.split(" ")[-1].split("-")[0]
+                if not start.isdigit() or int(start) != offset:
+                    part_path.unlink()
+                    raise _Restart(f"unexpected Content-Range '{content_range}' for {url}")
+                total = content_range.rpartition("/")[2]
+                total = int(total) if total.isdigit() else None
+                mode = "ab"
+            else:
+                # Server ignored the Range header: start over
+                offset = 0
+                total = int(length) if length and length.isdigit() else None
+                mode = "wb"
+
+            if self.size_limit is not None and total is not None and total > self.size_limit:
+                return "too_large", total, ""
+
+            h = hashlib.sha256()
+            if mode == "ab":
+                with open(part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                        h.update(chunk)
+            with open(part_path, mode) as f:
+                # Raw bytes (no Content-Encoding decoding), so sizes match Content-Length
+                try:
+                    for chunk in response.raw.stream(self.chunk_size, decode_content=False):
+                        f.write(chunk)
+                        h.update(chunk)
+                except urllib3.exceptions.HTTPError as e:
+                    raise requests.ConnectionError(e)
+
+        size = part_path.stat().st_size
+        if total is not None and size != total:
+            # Connection closed early; the next attempt resumes from here
+            raise requests.ConnectionError(f"Incomplete transfer of {url}: {size} of {total} bytes")
+        return "complete", total, h.hexdigest()
+
+    def download(self, url: str, dest_path: Path, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Downloads `url` to `dest_path` unless the manifest already has it.
+
+        Args:
+            url: http(s) URL, or ftp:// URL of a host in FTP_HOSTS.
+            dest_path: Target file.
+            sha256: Expected checksum, if known.
+
+        Returns:
+            Dictionary with 'url', 'path', 'size' and 'status' ('downloaded', 'cached',
+            'too_large' or 'failed', with 'error' set for failures).
+        """
+        url = https_url(url)
+        dest_path = Path(dest_path)
+        manifest = DownloadManifest(dest_path.parent)
+        if manifest.has_file(dest_path.name, sha256):
+            logger.info(f"Skipping {dest_path.name}: Already downloaded.")
+            return self._result(url, dest_path, "cached")
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = dest_path.with_name(dest_path.name + PART_SUFFIX)
+
+        with self._slots:
+            adopted = self._adopt_existing(dest_path, part_path)
+            for attempt in range(self.max_retries + 1):
+                try:
+                    status, total, digest = self._transfer(url, part_path)
+                    break
+                except (requests.RequestException, _Restart) as e:
+                    response = getattr(e, "response", None)
+                    retryable = response is None or response.status_code in RETRY_STATUSES
+                    if not retryable or attempt == self.max_retries:
+                        if adopted:
+                            self._release_adopted(dest_path, part_path)
+                        logger.error(f"Failed to download {url}: {e}")
+                        return self._result(url, dest_path, "failed", str(e))
+                    delay = self.client.retry_delay(attempt, response)
+                    logger.warning(f"Retrying {dest_path.name} in {delay:.1f}s ({e})")
+                    time.sleep(delay)
+
+        if status == "too_large":
+            if adopted:
+                self._release_adopted(dest_path, part_path)
+            logger.warning(f"Skipping {url}: Size {total/1024/1024:.2f}MB exceeds {self.size_limit/1024/1024:.0f}MB limit.")
+            return self._result(url, dest_path, "too_large")
+
+        if sha256 is not None and digest != sha256:
+            part_path.unlink()
+            logger.error(f"Checksum mismatch for {url}")
+            return self._result(url, dest_path, "failed", "sha256 mismatch")
+
+        os.replace(part_path, dest_path)
+        manifest.record(dest_path.name, url=url, sha256=digest)
+        logger.info(f"Downloaded {dest_path.name}")
+        return self._result(url, dest_path, "downloaded")
+
+    def download_many(self, items: Sequence[Tuple[str, Path]]) -> List[Dict[str, Any]]:
+        """
+        Downloads (url, dest_path) or (url, dest_path, sha256) items concurrently.
+
+        Returns:
+            One result per item, in order (see `download`).
+        """
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(lambda item: self.download(*item), items))
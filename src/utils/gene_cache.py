@@ -0,0 +1,170 @@
+import os
+import csv
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gene ID -> symbol lookups shared by all cohorts, stages and worker processes.
+# One SQLite table keyed by (scope, id); scope is the mygene.info scope the ID belongs
+# to ('ensembl.gene', 'entrezgene'). A NULL symbol is a cached miss (the ID is known
+# to have no symbol), so unmappable IDs are not re-queried on every run either.
+DEFAULT_CACHE_PATH = Path("data/gene_mapping.sqlite")
+CACHE_ENV = "KORA_GENE_CACHE"
+OFFLINE_ENV = "KORA_OFFLINE"
+
+ENSEMBL_SCOPE = "ensembl.gene"
+ENTREZ_SCOPE = "entrezgene"
+
+# Column names of the supported offline dumps (HGNC complete set, Ensembl BioMart export)
+_DUMP_COLUMNS = {
+    "symbol": ("symbol", "approved symbol", "hgnc symbol", "gene name"),
+    ENSEMBL_SCOPE: ("ensembl_gene_id", "ensembl gene id", "gene stable id", "ensembl id(supplied by ensembl)"),
+    ENTREZ_SCOPE: ("entrez_id", "ncbi gene id", "ncbi gene (formerly entrezgene) id", "ncbi gene id(supplied by ncbi)"),
+}
+
+def is_offline() -> bool:
+    """
+    True if network lookups are disabled (KORA_OFFLINE=1).
+    """
+    return os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+
+class GeneMappingCache:
+    """
+    Persistent gene ID -> symbol cache (SQLite, WAL mode so concurrent readers
+    and writers in other processes do not block each other).
+    """
+
+    def __init__(self, path: Optional[Path] = None, negative_ttl_days: float = 30.0):
+        """
+        Args:
+            path: Database file. Defaults to $KORA_GENE_CACHE or data/gene_mapping.sqlite.
+            negative_ttl_days: Cached misses older than this are looked up again.
+        """
+        self.path = Path(path or os.environ.get(CACHE_ENV) or DEFAULT_CACHE_PATH)
+        self.negative_ttl = negative_ttl_days * 86400.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gene_symbols ("
+                " scope TEXT NOT NULL,"
+                " gene_id TEXT NOT NULL,"
+                " symbol TEXT,"
+                " source TEXT,"
+                " updated REAL,"
+                " PRIMARY KEY (scope, gene_id)) WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60.0)
+
+    def lookup(self, scope: str, gene_ids: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Looks up IDs in the cache.
+
+        Returns:
+            mapping: ID -> symbol for the cached hits.
+            missing: IDs that are neither cached hits nor fresh cached misses.
+        """
+        gene_ids = list(dict.fromkeys(str(g) for g in gene_ids))
+        mapping = {}
+        known = set()
+        expired_before = time.time() - self.negative_ttl
+
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (gene_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM wanted")
+            conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((g,) for g in gene_ids))
+            rows = conn.execute(
+                "SELECT s.gene_id, s.symbol, s.updated FROM gene_symbols s "
+                "JOIN wanted w ON s.gene_id = w.gene_id WHERE s.scope = ?", (scope,)
+            )
+            for gene_id, symbol, updated in rows:
+                if symbol is not None:
+                    mapping[gene_id] = symbol
+                    known.add(gene_id)
+                elif updated is not None and updated >= expired_before:
+                    known.add(gene_id)
+
+        missing = [g for g in gene_ids if g not in known]
+        return mapping, missing
+
+    def store(self,
+              scope: str,
+              mapping: Dict[str, str],
+              misses: Iterable[str] = (),
+              source: str = "mygene"):
+        """
+        Stores found symbols and IDs confirmed to have none.
+        """
+        now = time.time()
+        rows = [(scope, str(g), s, source, now) for g, s in mapping.items()]
+        rows += [(scope, str(g), None, source, now) for g in misses]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO gene_symbols VALUES (?, ?, ?, ?, ?)", rows)
+
+    def import_dump(self, dump_path: Path, source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Bulk-loads an offline gene table, e.g. HGNC's hgnc_complete_set.txt or an
+        Ensembl BioMart export (tab- or comma-separated, with a header). The symbol
+        column and any Ensembl gene / Entrez ID columns are detected by name.
+
+        Returns:
+            Number of imported IDs per scope.
+        """
+        dump_path = Path(dump_path)
+        source = source or dump_path.name
+        with open(dump_path, "r", newline="") as f:
+            sample = f.read(65536)
+            f.seek(0)
+            delimiter = "\t" if sample.count("\t") >= sample.count(",") else ","
+            reader = csv.reader(f, delimiter=delimiter)
+            header = [h.strip().lower() for h in next(reader)]
+
+            columns = {}
+            for key, names in _DUMP_COLUMNS.items():
+                for name in names:
+                    if name in header:
+                        columns[key] = header.index(name)
+                        break
+            if "symbol" not in columns or len(columns) < 2:
+                raise ValueError(f"{dump_path} has no symbol and gene ID columns: {header}")
+
+            mappings = {scope: {} for scope in columns if scope != "symbol"}
+            for row in reader:
+                if len(row) <= columns["symbol"]:
+                    continue
+                symbol = row[columns["symbol"]].strip()
+                if not symbol:
+                    continue
+                for scope, mapping in mappings.items():
+                    idx = columns[scope]
+                    if idx < len(row):
+                        # Multi-valued cells (e.g. "ENSG...|ENSG...") map every ID
+                        for gene_id in row[idx].replace("|", ",").split(","):
+                            gene_id = gene_id.strip().split(".")[0]
+                            if gene_id:
+                                mapping[gene_id] = symbol
+
+        counts = {}
+        for scope, mapping in mappings.items():
+            self.store(scope, mapping, source=source)
+            counts[scope] = len(mapping)
+        logger.info(f"Imported {dump_path.name} into {self.path}: {counts}")
+        return counts
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Number of cached hits and misses per scope.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT scope, SUM(symbol IS NOT NULL), SUM(symbol IS NULL) FROM gene_symbols GROUP BY scope"
+            ).fetchall()
+        return {scope: {"symbols": int(hits), "misses": int(misses)} for scope, hits, misses in rows}
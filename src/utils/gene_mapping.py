@@ -1,48 +1,94 @@
 import pandas as pd
-import requests
+import numpy as np
 import logging
-import GEOparse
 from pathlib import Path
-import time
+from typing import Callable, Dict, Optional, Union
+import sqlite3
+import re
+import os
+
+from .gene_cache import GeneMappingCache, ENSEMBL_SCOPE, ENTREZ_SCOPE, is_offline
+from .http import HttpClient, get_client, MYGENE_BASE_URL
+from .soft_store import read_series, read_platform_table
 
 logger = logging.getLogger(__name__)
 
+# Symbol patterns in annotation strings: "(SYMBOL)" and "[SYMBOL]"
+PAREN_SYMBOL_RE = re.compile(r'\(([A-Z0-9\-]{2,20})\)')
+BRACKET_SYMBOL_RE = re.compile(r'\[([A-Z0-9\-]{2,20})\]')
+
+# Parsed probe -> symbol tables, one per platform, shared by all cohorts using it.
+# Bump PROBE_MAP_VERSION when the extraction rules change to invalidate them.
+PROBE_MAP_DIR = Path("data/probe_maps")
+PROBE_MAP_VERSION = 1
+SYMBOL_COLUMN_CANDIDATES = ["Gene Symbol", "Symbol", "Gene_Symbol", "GENE_SYMBOL", 
+                            "gene_assignment", "ilmn_gene", "SPOT_ID.1", "SPOT_ID"]
+
 def chunk_list(lst, n):
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
-def map_ensembl_to_symbol(ensembl_ids):
+def _lookup_symbols(unique_ids, scope, label, client: Optional[HttpClient] = None):
     """
-    Maps Ensembl IDs to HGNC Symbols using mygene.info API.
+    Resolves IDs of one mygene.info scope to symbols: the local cache first, then
+    mygene.info for the rest (unless offline), storing the answers in the cache.
+    Queries go through the shared HttpClient (rate limit, retries with backoff); a
+    chunk that still fails is left unmapped and uncached, so the next run retries it.
     """
-    # Remove version numbers if present (ENSG000001.1 -> ENSG000001)
-    cleaned_ids = [str(x).split('.')[0] for x in ensembl_ids]
-    unique_ids = list(set(cleaned_ids))
-    
-    mapping = {}
+    try:
+        cache = GeneMappingCache()
+        mapping, missing = cache.lookup(scope, unique_ids)
+    except sqlite3.Error as e:
+        logger.warning(f"Gene mapping cache unavailable ({e}); querying all IDs")
+        cache, mapping, missing = None, {}, list(unique_ids)
+        
+    logger.info(f"{len(unique_ids) - len(missing)} of {len(unique_ids)} {label} IDs resolved from the local cache")
+    if not missing:
+        return mapping
+    if is_offline():
+        logger.warning(f"Offline mode: {len(missing)} {label} IDs not in the local cache are left unmapped")
+        return mapping
     
-    logger.info(f"Querying mygene.info for {len(unique_ids)} Ensembl IDs...")
+    logger.info(f"Querying mygene.info for {len(missing)} {label} IDs...")
     
-    url = "https://mygene.info/v3/query"
-    headers = {'content-type': 'application/x-www-form-urlencoded'}
+    client = client or get_client()
+    url = f"{MYGENE_BASE_URL}/query"
     
     # Chunking for API limits (1000 per request is usually safe for POST)
-    for chunk in chunk_list(unique_ids, 1000):
+    for chunk in chunk_list(missing, 1000):
         params = {
             'q': ",".join(chunk),
-            'scopes': 'ensembl.gene',
+            'scopes': scope,
             'fields': 'symbol',
             'species': 'human'
         }
         try:
-            response = requests.post(url, data=params, headers=headers)
-            response.raise_for_status()
-            for hit in response.json():
+            hits = client.post_json(url, data=params, use_cache=False)
+            found = {}
+            not_found = []
+            for hit in hits:
                 if 'symbol' in hit:
-                    mapping[hit['query']] = hit['symbol']
+                    found[hit['query']] = hit['symbol']
+                elif hit.get('notfound'):
+                    not_found.append(hit['query'])
+            mapping.update(found)
+            if cache is not None:
+                # Misses are cached too, so unmappable IDs are not queried again
+                cache.store(scope, found, not_found)
         except Exception as e:
-            logger.error(f"mygene.info query failed: {e}")
-            time.sleep(1) # Backoff
+            logger.error(f"mygene.info query for {len(chunk)} {label} IDs failed after retries: {e}")
+            
+    return mapping
+
+def map_ensembl_to_symbol(ensembl_ids, client: Optional[HttpClient] = None):
+    """
+    Maps Ensembl IDs to HGNC Symbols using the local cache and mygene.info.
+    """
+    # Remove version numbers if present (ENSG000001.1 -> ENSG000001)
+    cleaned_ids = [str(x).split('.')[0] for x in ensembl_ids]
+    unique_ids = list(set(cleaned_ids))
+    
+    mapping = _lookup_symbols(unique_ids, ENSEMBL_SCOPE, "Ensembl", client)
             
     # Create final map including version handling
     final_map = {}
@@ -53,34 +99,13 @@ def map_ensembl_to_symbol(ensembl_ids):
     
     return final_map
 
-def map_entrez_to_symbol(entrez_ids):
+def map_entrez_to_symbol(entrez_ids, client: Optional[HttpClient] = None):
     """
-    Maps Entrez Gene IDs to HGNC Symbols using mygene.info API.
+    Maps Entrez Gene IDs to HGNC Symbols using the local cache and mygene.info.
     """
     unique_ids = list(set([str(x) for x in entrez_ids]))
-    mapping = {}
-    
-    logger.info(f"Querying mygene.info for {len(unique_ids)} Entrez IDs...")
     
-    url = "https://mygene.info/v3/query"
-    headers = {'content-type': 'application/x-www-form-urlencoded'}
-    
-    for chunk in chunk_list(unique_ids, 1000):
-        params = {
-            'q': ",".join(chunk),
-            'scopes': 'entrezgene',
-            'fields': 'symbol',
-            'species': 'human'
-        }
-        try:
-            response = requests.post(url, data=params, headers=headers)
-            response.raise_for_status()
-            for hit in response.json():
-                if 'symbol' in hit:
-                    mapping[hit['query']] = hit['symbol']
-        except Exception as e:
-            logger.error(f"mygene.info query failed: {e}")
-            time.sleep(1)
+    mapping = _lookup_symbols(unique_ids, ENTREZ_SCOPE, "Entrez", client)
             
     final_map = {}
     for orig in entrez_ids:
@@ -114,16 +139,13 @@ def extract_symbol_from_complex_string(val):
             if 1 < len(parts[1]) < 20 and parts[1].isupper():
                 return parts[1]
             # Try to find (SYMBOL) in part 2 or part 1
-            import re
             for p in parts:
-                m = re.search(r'\(([A-Z0-9\-]{2,20})\)', p)
+                m = PAREN_SYMBOL_RE.search(p)
                 if m:
                     return m.group(1)
-                # Try [Source:HGNC Symbol;Acc:HGNC:14825]
-                m = re.search(r'Source:HGNC Symbol;Acc:HGNC:(\d+)', p)
-                # If we find this, we might need another mapping, but sometimes the symbol is just before it
-                # For now, let's look for the symbol in brackets if parentheses fail
-                m = re.search(r'\[([A-Z0-9\-]{2,20})\]', p)
+                # [Source:HGNC Symbol;Acc:HGNC:14825] carries only the HGNC ID;
+                # look for the symbol in brackets if parentheses fail
+                m = BRACKET_SYMBOL_RE.search(p)
                 if m:
                     return m.group(1)
 
@@ -133,9 +155,111 @@ def extract_symbol_from_complex_string(val):
         
     return val
 
+def extract_symbols(values: pd.Series) -> pd.Series:
+    """
+    `extract_symbol_from_complex_string` over a whole annotation column.
+    
+    Each distinct string is parsed once (platform annotations repeat heavily) with
+    the precompiled patterns, and the results are broadcast back by position.
+    This is faster than pandas string methods here: the rules need several passes
+    per string, which str.split/str.extract would each run over the full column.
+    
+    Args:
+        values: Annotation strings (non-strings are converted with str()).
+        
+    Returns:
+        Series of symbols on the same index; None where no symbol was found
+        (including results that read "nan").
+    """
+    codes, uniques = pd.factorize(np.array([str(v) for v in values], dtype=object))
+    
+    symbols = np.empty(len(uniques) + 1, dtype=object)
+    for i, val in enumerate(uniques):
+        symbol = extract_symbol_from_complex_string(val)
+        symbols[i] = symbol if symbol and symbol.lower() != "nan" else None
+    symbols[-1] = None # code -1 (never produced for strings, kept for safety)
+    
+    return pd.Series(symbols[codes], index=values.index, dtype=object)
+
+def find_symbol_column(table: pd.DataFrame) -> Optional[str]:
+    """
+    Finds the gene symbol column of a platform table (case-insensitive, by priority).
+    """
+    lower = {col.lower(): col for col in reversed(list(table.columns))}
+    for cand in SYMBOL_COLUMN_CANDIDATES:
+        if cand.lower() in lower:
+            return lower[cand.lower()]
+    return None
+
+def _probe_map_path(gpl_name: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"{gpl_name}.npz"
+
+def load_probe_map(gpl_name: str, cache_dir: Path = PROBE_MAP_DIR) -> Optional[Dict[str, str]]:
+    """
+    Returns the persisted probe -> symbol mapping of a platform, if any.
+    """
+    path = _probe_map_path(gpl_name, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != PROBE_MAP_VERSION:
+                return None
+            return dict(zip(data["probes"].tolist(), data["symbols"].tolist()))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable probe map {path}: {e}")
+        return None
+
+def save_probe_map(gpl_name: str, mapping: Dict[str, str], cache_dir: Path = PROBE_MAP_DIR):
+    """
+    Persists a platform's probe -> symbol mapping as columnar arrays.
+    """
+    path = _probe_map_path(gpl_name, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, 
+             version=np.array(PROBE_MAP_VERSION), 
+             probes=np.array(list(mapping.keys()), dtype=str), 
+             symbols=np.array(list(mapping.values()), dtype=str))
+    os.replace(tmp, path)
+
+def platform_probe_map(gpl_name: str, 
+                       table: Union[pd.DataFrame, Callable[[], pd.DataFrame]], 
+                       cache_dir: Path = PROBE_MAP_DIR) -> Dict[str, str]:
+    """
+    Probe -> symbol mapping of one platform table, parsed once and then served from disk.
+    
+    Args:
+        gpl_name: Platform accession.
+        table: The platform table, or a function loading it (only called on a miss).
+        cache_dir: Directory of the persisted maps.
+    """
+    mapping = load_probe_map(gpl_name, cache_dir)
+    if mapping is not None:
+        logger.info(f"Loaded probe map of {gpl_name} from {cache_dir} ({len(mapping)} probes)")
+        return mapping
+    
+    if callable(table):
+        table = table()
+    symbol_col = find_symbol_column(table)
+    if symbol_col is None:
+        logger.warning(f"No symbol column found in {gpl_name}. Columns: {list(table.columns)}")
+        return {}
+    
+    logger.info(f"Found symbol column: {symbol_col}")
+    symbols = extract_symbols(table[symbol_col])
+    valid = symbols.notna().to_numpy()
+    mapping = dict(zip(table["ID"].astype(str).to_numpy()[valid].tolist(), 
+                       symbols.to_numpy()[valid].tolist()))
+    
+    save_probe_map(gpl_name, mapping, cache_dir)
+    return mapping
+
 def map_probes_to_symbol(probe_ids, accession, disease_term):
     """
-    Extracts probe->symbol mapping from local SOFT file via GEOparse.
+    Extracts probe->symbol mapping from the local SOFT file. The file is parsed via
+    the SOFT store and each platform's map is persisted, so reruns and cohorts on the
+    same platform read neither.
     """
     raw_dir = Path(f"data/raw/GEO/{disease_term.replace(' ', '_')}/{accession}")
     soft_path = raw_dir / f"{accession}_family.soft.gz"
@@ -145,37 +269,13 @@ def map_probes_to_symbol(probe_ids, accession, disease_term):
         return {}
         
     try:
-        gse = GEOparse.get_GEO(filepath=str(soft_path), silent=True)
+        series = read_series(soft_path, accession)
         
         mapping = {}
-        for gpl_name, gpl in gse.gpls.items():
+        for gpl_name in series["platforms"]:
             logger.info(f"Processing platform {gpl_name} for {accession}")
-            table = gpl.table
-            
-            # Find gene symbol column
-            symbol_col = None
-            candidates = ["Gene Symbol", "Symbol", "Gene_Symbol", "GENE_SYMBOL", 
-                          "gene_assignment", "ilmn_gene", "SPOT_ID.1", "SPOT_ID"]
-            
-            for cand in candidates:
-                for col in table.columns:
-                    if cand.lower() == col.lower():
-                        symbol_col = col
-                        break
-                if symbol_col:
-                    break
-            
-            if symbol_col:
-                logger.info(f"Found symbol column: {symbol_col}")
-                for _, row in table.iterrows():
-                    pid = str(row["ID"])
-                    val = str(row[symbol_col])
-                    
-                    symbol = extract_symbol_from_complex_string(val)
-                    if symbol and symbol.lower() != "nan":
-                        mapping[pid] = symbol
-            else:
-                logger.warning(f"No symbol column found in {gpl_name}. Columns: {list(table.columns)}")
+            load_table = lambda gpl_name=gpl_name: read_platform_table(soft_path, gpl_name, accession)
+            mapping.update(platform_probe_map(gpl_name, load_table))
                 
         return mapping
 
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Service endpoints. Overridable (e.g. to point at a local stand-in server in tests).
+EUTILS_BASE_URL = os.environ.get("KORA_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+BIOSTUDIES_BASE_URL = os.environ.get("KORA_BIOSTUDIES_URL", "https://www.ebi.ac.uk/biostudies/api/v1")
+MYGENE_BASE_URL = os.environ.get("KORA_MYGENE_URL", "https://mygene.info/v3")
+
+# NCBI E-utilities allow 3 requests/s per client, 10 with an API key
+# (E-utilities also ask clients to identify themselves with tool and email)
+NCBI_API_KEY_ENV = "NCBI_API_KEY"
+ENTREZ_EMAIL = "kora_agent@example.com"
+NCBI_RATE = 3.0
+NCBI_RATE_WITH_KEY = 10.0
+DEFAULT_RATE = 10.0
+
+HTTP_CACHE_DIR = Path("data/http_cache")
+
+# Statuses worth retrying: rate limited or transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second, with
+    bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HttpClient:
+    """
+    Shared HTTP layer for the metadata fetchers.
+
+    One requests.Session (pooled keep-alive connections) used from many threads,
+    a token bucket per host, retries with exponential backoff and jitter on
+    connection errors and 429/5xx, and an on-disk cache of successful responses.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[Path] = HTTP_CACHE_DIR,
+                 cache_ttl: float = 7 * 86400.0,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 max_retries: int = 5,
+                 backoff: float = 0.5,
+                 max_backoff: float = 60.0,
+                 timeout: float = 30.0,
+                 max_workers: int = 8):
+        """
+        Args:
+            cache_dir: Response cache directory; None disables caching.
+            cache_ttl: Seconds a cached response stays valid.
+            rate_limits: Requests per second per host name. The NCBI E-utilities
+                         host defaults to 3/s (10/s with NCBI_API_KEY set), any
+                         other host to DEFAULT_RATE.
+            max_retries: Retries after the first attempt.
+            backoff: Base delay (s); attempt i waits about backoff * 2**i.
+            max_backoff: Upper bound of a single delay (s).
+            timeout: Per-request timeout (s).
+            max_workers: Threads used by `map`, and size of the connection pool.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.cache_ttl = cache_ttl
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+        self.api_key = os.environ.get(NCBI_API_KEY_ENV)
+        ncbi_host = urlparse(EUTILS_BASE_URL).hostname
+        self.rate_limits = {ncbi_host: NCBI_RATE_WITH_KEY if self.api_key else NCBI_RATE}
+        self.rate_limits.update(rate_limits or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).hostname
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_limits.get(host, DEFAULT_RATE))
+                self._buckets[host] = bucket
+            return bucket
+
+    def _cache_path(self, method: str, url: str, params: Optional[Dict], data: Optional[Dict]) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        key = json.dumps([method, url, sorted((params or {}).items()), sorted((data or {}).items())], default=str)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / digest
+
+    def throttle(self, url: str):
+        """
+        Waits for a request slot of the URL's host (for callers using `session` directly).
+        """
+        self._bucket(url).acquire()
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Delay before retry `attempt` (0-based): the response's Retry-After if given,
+        otherwise exponential backoff with full jitter.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(self.max_backoff, float(retry_after))
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self,
+                method: str,
+                url: str,
+                params: Optional[Dict] = None,
+                data: Optional[Dict] = None,
+                use_cache: bool = True) -> bytes:
+        """
+        Performs a rate-limited request with retries.
+
+        Returns:
+            Response body.
+
+        Raises:
+            requests.HTTPError: Non-retryable status, or retries exhausted.
+            requests.RequestException: Connection errors after all retries.
+        """
+        cache_path = self._cache_path(method, url, params, data) if use_cache else None
+        if cache_path is not None and cache_path.exists():
+            if time.time() - cache_path.stat().st_mtime < self.cache_ttl:
+                return cache_path.read_bytes()
+
+        for attempt in range(self.max_retries + 1):
+            self.throttle(url)
+            response = None
+            try:
+                response = self.session.request(method, url, params=params, data=data, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    break
+                error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            delay = self.retry_delay(attempt, response)
+            logger.debug(f"Retrying {url} in {delay:.2f}s ({error})")
+            time.sleep(delay)
+
+        body = response.content
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, cache_path)
+        return body
+
+    def get_json(self, url: str, params: Optional[Dict] = None, use_cache: bool = True) -> Any:
+        return json.loads(self.request("GET", url, params=params, use_cache=use_cache))
+
+    def post_json(self, url: str, data: Optional[Dict] = None, use_cache: bool = True) -> Any:
+        return json.loads(self.request("POST", url, data=data, use_cache=use_cache))
+
+    def eutils(self, endpoint: str, use_cache: bool = True, **params) -> Any:
+        """
+        Calls an E-utility (e.g. 'esearch', 'esummary') and returns its JSON.
+        """
+        params = {"retmode": "json", "tool": "kora", "email": ENTREZ_EMAIL, **params}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        return self.get_json(f"{EUTILS_BASE_URL}/{endpoint}.fcgi", params=params, use_cache=use_cache)
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any], max_workers: Optional[int] = None) -> List[Any]:
+        """
+        Applies `fn` to all items on a thread pool, returning results in input order.
+        Requests made by `fn` through this client share its rate limits.
+        """
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            return list(executor.map(fn, items))
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> HttpClient:
+    """
+    Process-wide shared client, so all fetchers share one session and rate limits.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
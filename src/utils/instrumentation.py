@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import resource
+import cProfile
+import functools
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Lightweight stage timers and counters for the pipeline.
+#
+# Disabled by default: `stage` then returns a shared no-op context, `timed` wrappers
+# only test a flag, and hot paths guard their counters with `if instrumentation.ENABLED`.
+# When enabled, every stage appends one JSON line (wall/CPU time, peak memory, item
+# count, counters) to the trace file. Settings are passed to spawned workers through
+# the environment, so jobs run by `run_jobs` trace into the same file:
+#   KORA_TRACE=<file.jsonl>   enable tracing
+#   KORA_TRACE_MEMORY=1       track peak allocations with tracemalloc (slower)
+#   KORA_PROFILE=<dir>        run each outermost stage under cProfile, one .prof per stage
+# Stages nest per thread, so stages opened by pool threads (e.g. one per dataset) are
+# outermost stages of their own rather than children of whatever another thread runs.
+TRACE_ENV = "KORA_TRACE"
+MEMORY_ENV = "KORA_TRACE_MEMORY"
+PROFILE_ENV = "KORA_PROFILE"
+
+ENABLED = False
+
+_trace_file: Optional[Path] = None
+_profile_dir: Optional[Path] = None
+_track_memory = False
+_local = threading.local()
+_write_lock = threading.Lock()
+_counters: Dict[str, Dict[str, float]] = {}
+_n_profiles = 0
+
+def _stack() -> list:
+    """
+    Returns the calling thread's stack of running stages.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def enable(trace_file: Optional[Path] = None,
+           memory: bool = False,
+           profile_dir: Optional[Path] = None,
+           export_env: bool = False):
+    """
+    Turns instrumentation on.
+
+    Args:
+        trace_file: JSONL file the stage records are appended to. Without it, records
+                    are only kept for profiling (nothing is written).
+        memory: Track peak allocations per stage with tracemalloc.
+        profile_dir: If given, each outermost stage is profiled with cProfile and the
+                     stats are dumped there (view with snakeviz / pstats).
+        export_env: Also set the environment variables so spawned worker processes
+                    pick up the same settings.
+    """
+    global ENABLED, _trace_file, _track_memory, _profile_dir
+    _trace_file = Path(trace_file) if trace_file else None
+    _track_memory = memory
+    _profile_dir = Path(profile_dir) if profile_dir else None
+
+    if _trace_file is not None:
+        _trace_file.parent.mkdir(parents=True, exist_ok=True)
+    if _profile_dir is not None:
+        _profile_dir.mkdir(parents=True, exist_ok=True)
+    if _track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    if export_env:
+        if _trace_file is not None:
+            os.environ[TRACE_ENV] = str(_trace_file.resolve())
+        if _track_memory:
+            os.environ[MEMORY_ENV] = "1"
+        if _profile_dir is not None:
+            os.environ[PROFILE_ENV] = str(_profile_dir.resolve())
+
+    ENABLED = _trace_file is not None or _profile_dir is not None
+
+def disable():
+    """
+    Turns instrumentation off and discards pending counters.
+    """
+    global ENABLED
+    ENABLED = False
+    _counters.clear()
+    if _track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def configure_from_env():
+    """
+    Enables instrumentation if KORA_TRACE or KORA_PROFILE is set.
+    """
+    trace_file = os.environ.get(TRACE_ENV)
+    profile_dir = os.environ.get(PROFILE_ENV)
+    if trace_file or profile_dir:
+        enable(trace_file, memory=os.environ.get(MEMORY_ENV) == "1", profile_dir=profile_dir)
+
+def add_arguments(parser):
+    """
+    Adds --trace, --trace-memory and --profile options to a script's argument parser.
+    """
+    parser.add_argument("--trace", default=None, help="Append per-stage timing records to this JSONL file.")
+    parser.add_argument("--trace-memory", action="store_true", help="Track peak allocations per stage (slower).")
+    parser.add_argument("--profile", default=None, help="Write cProfile stats of each stage into this directory.")
+
+def configure_from_args(args):
+    """
+    Applies the options added by `add_arguments`, for this process and its workers.
+    """
+    if args.trace or args.profile:
+        enable(args.trace, memory=args.trace_memory, profile_dir=args.profile, export_env=True)
+
+def count(name: str, **values: float):
+    """
+    Adds to the aggregated counters `name` (e.g. calls, items, ns). Counters are
+    attached to the record of the next outermost stage that finishes.
+    Callers on hot paths should check ENABLED first.
+    """
+    if not ENABLED:
+        return
+    entry = _counters.setdefault(name, {})
+    for key, value in values.items():
+        entry[key] = entry.get(key, 0) + value
+
+def add_items(n: int):
+    """
+    Adds to the item count (spikes, edges, samples, ...) of the innermost running stage.
+    """
+    if ENABLED:
+        stack = _stack()
+        if stack:
+            stack[-1].items += n
+
+def _write(record: Dict[str, Any]):
+    if _trace_file is None:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock, open(_trace_file, "a") as f:
+        f.write(line)
+
+class _Stage:
+    """
+    Context manager measuring one stage; see `stage`.
+    """
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+        self.items = 0
+        self.peak_seen = 0
+
+    def __enter__(self):
+        global _n_profiles
+        stack = _stack()
+        parent = stack[-1] if stack else None
+        if _track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent.peak_seen = max(parent.peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = current
+
+        self.profiler = None
+        if _profile_dir is not None and parent is None:
+            self.profiler = cProfile.Profile()
+            _n_profiles += 1
+            self.profile_path = _profile_dir / f"{self.name}-{os.getpid()}-{_n_profiles}.prof"
+
+        stack.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler; another thread's stage has it
+                self.profiler = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler is not None:
+            self.profiler.disable()
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        stack = _stack()
+        stack.pop()
+
+        record = {
+            "stage": self.name,
+            **self.fields,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "items": self.items,
+            "status": "ok" if exc_type is None else "error",
+            "pid": os.getpid(),
+            "depth": len(stack),
+            "timestamp": time.time(),
+            # Process-wide high-water mark (KiB on Linux, bytes on macOS)
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+        if _track_memory:
+            peak = max(self.peak_seen, tracemalloc.get_traced_memory()[1])
+            record["peak_alloc_mb"] = (peak - self.mem_start) / 1e6
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+
+        if not stack and _counters:
+            record["counters"] = {name: dict(values) for name, values in _counters.items()}
+            _counters.clear()
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.profile_path)
+            record["profile"] = str(self.profile_path)
+
+        _write(record)
+        return False
+
+class _NullStage:
+    items = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(name: str, **fields: Any):
+    """
+    Context manager timing a pipeline stage. Extra keyword fields (e.g. accession)
+    are stored in the record. A no-op when instrumentation is disabled.
+
+        with stage("encode_cohort", accession=acc):
+            ...
+    """
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, fields)
+
+def timed(name: Optional[str] = None) -> Callable:
+    """
+    Decorator form of `stage`; the stage name defaults to the function's qualified name.
+    """
+    def decorator(fn: Callable) -> Callable:
+        stage_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Stage(stage_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+configure_from_env()
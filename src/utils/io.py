@@ -0,0 +1,153 @@
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Binary copies of expression CSVs live next to them, keyed by the CSV's content hash:
+#   <dir>/.kora_cache/<stem>-<hash>.npy         float32 (samples, genes) matrix
+#   <dir>/.kora_cache/<stem>-<hash>.index.json  sample names, gene names, index name
+#   <dir>/.kora_cache/fingerprints.json         file name -> (size, mtime_ns, hash)
+CACHE_DIRNAME = ".kora_cache"
+FINGERPRINTS_FILE = "fingerprints.json"
+CACHE_DTYPE = np.float32
+
+def file_hash(path: Path, chunk_size: int = 1 << 22) -> str:
+    """
+    Content hash (BLAKE2b, 128 bit) of a file, read in chunks.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_dir(csv_path: Path) -> Path:
+    return csv_path.parent / CACHE_DIRNAME
+
+def _load_fingerprints(cache_dir: Path) -> Dict[str, Dict]:
+    path = cache_dir / FINGERPRINTS_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _atomic_write_json(path: Path, obj):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+def content_key(csv_path: Path) -> str:
+    """
+    Returns the content hash of `csv_path`, reusing the stored hash if the file's
+    size and mtime are unchanged so the file is not re-read on every load.
+    """
+    csv_path = Path(csv_path)
+    cache_dir = _cache_dir(csv_path)
+    stat = csv_path.stat()
+
+    fingerprints = _load_fingerprints(cache_dir)
+    entry = fingerprints.get(csv_path.name)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["hash"]
+
+    digest = file_hash(csv_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fingerprints = _load_fingerprints(cache_dir)
+    fingerprints[csv_path.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+    _atomic_write_json(cache_dir / FINGERPRINTS_FILE, fingerprints)
+    return digest
+
+def _cache_paths(csv_path: Path, key: str):
+    cache_dir = _cache_dir(csv_path)
+    base = f"{csv_path.stem}-{key}"
+    return cache_dir / f"{base}.npy", cache_dir / f"{base}.index.json"
+
+def _write_cache(df: pd.DataFrame, csv_path: Path, key: str):
+    matrix_path, index_path = _cache_paths(csv_path, key)
+    matrix_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write under temporary names, then rename, so readers never see partial files
+    tmp_matrix = matrix_path.with_name(f"{matrix_path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp_matrix, np.ascontiguousarray(df.to_numpy(dtype=CACHE_DTYPE)))
+    _atomic_write_json(index_path, {
+        "samples": [str(s) for s in df.index],
+        "genes": [str(g) for g in df.columns],
+        "index_name": df.index.name,
+    })
+    os.replace(tmp_matrix, matrix_path)
+
+    # Drop copies of earlier versions of the same CSV
+    for stale in matrix_path.parent.glob(f"{csv_path.stem}-{'?' * len(key)}.*"):
+        if not stale.name.startswith(f"{csv_path.stem}-{key}."):
+            stale.unlink(missing_ok=True)
+
+def _is_numeric(df: pd.DataFrame) -> bool:
+    return all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes)
+
+def _read_cache(matrix_path: Path, index_path: Path, mmap: bool) -> pd.DataFrame:
+    with open(index_path, "r") as f:
+        index = json.load(f)
+    values = np.load(matrix_path, mmap_mode="r" if mmap else None)
+    return pd.DataFrame(values, index=pd.Index(index["samples"], name=index["index_name"]),
+                        columns=index["genes"], copy=False)
+
+def read_expression(csv_path: Path, use_cache: bool = True, mmap: bool = True) -> pd.DataFrame:
+    """
+    Loads a (samples x genes) expression matrix written as CSV with the sample names
+    in the first column.
+
+    The first read parses the CSV and stores a float32 binary copy keyed by the CSV's
+    content hash; every read (from any stage or process, the first one included)
+    returns that copy, memory-mapped, so the values do not depend on whether the
+    cache was warm. Editing the CSV changes its hash and so invalidates the copy.
+
+    Args:
+        csv_path: Path to the CSV.
+        use_cache: If False, always parses the CSV (values as parsed, e.g. float64).
+        mmap: Memory-map the cached matrix (read-only) instead of loading it.
+
+    Returns:
+        DataFrame indexed by sample, one column per gene. Numeric matrices are float32
+        with string labels; non-numeric CSVs are returned as parsed.
+    """
+    csv_path = Path(csv_path)
+    if not use_cache:
+        return pd.read_csv(csv_path, index_col=0)
+
+    key = content_key(csv_path)
+    matrix_path, index_path = _cache_paths(csv_path, key)
+
+    if matrix_path.exists() and index_path.exists():
+        df = _read_cache(matrix_path, index_path, mmap)
+        logger.debug(f"Loaded {csv_path.name} from binary cache ({df.shape[0]}x{df.shape[1]})")
+        return df
+
+    df = pd.read_csv(csv_path, index_col=0)
+    if not _is_numeric(df):
+        return df
+    _write_cache(df, csv_path, key)
+    return _read_cache(matrix_path, index_path, mmap)
+
+def write_expression(df: pd.DataFrame, csv_path: Path):
+    """
+    Writes an expression matrix as CSV (the interchange format) and immediately
+    stores its binary copy, so the next stage never parses the CSV.
+    """
+    csv_path = Path(csv_path)
+    df.to_csv(csv_path)
+    if _is_numeric(df):
+        _write_cache(df, csv_path, content_key(csv_path))
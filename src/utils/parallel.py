@@ -0,0 +1,216 @@
+import os
+import time
+import logging
+import traceback
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by the common BLAS/OpenMP backends at import time
+BLAS_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+def available_memory_bytes() -> Optional[int]:
+    """
+    Returns the memory currently available for new work, or None if unknown.
+    Uses MemAvailable from /proc/meminfo on Linux, free physical pages otherwise.
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def limit_blas_threads(n_threads: int):
+    """
+    Pins BLAS/OpenMP thread pools of the current process to `n_threads`.
+
+    The environment variables only take effect for libraries loaded afterwards; for
+    pool workers run_jobs already sets them before the workers start (see
+    `blas_thread_env`). If threadpoolctl is installed, already loaded pools are
+    limited as well.
+    """
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n_threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(n_threads)
+
+@contextmanager
+def blas_thread_env(n_threads: Optional[int]):
+    """
+    Sets the BLAS/OpenMP thread variables in this process's environment for the
+    duration of the block, so that worker processes started inside it see them from
+    their first instruction. Spawned workers import NumPy while unpickling the main
+    module, before a pool initializer runs, so setting the variables there is too late.
+    """
+    if n_threads is None:
+        yield
+        return
+    saved = {var: os.environ.get(var) for var in BLAS_THREAD_VARS}
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n_threads)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def _init_worker(blas_threads: Optional[int]):
+    if blas_threads is not None:
+        limit_blas_threads(blas_threads)
+
+def _run_job(fn: Callable, key: Any, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """
+    Runs one job and wraps its outcome in a result record. Never raises.
+    """
+    start = time.perf_counter()
+    record = {
+        "key": key,
+        "status": "ok",
+        "result": None,
+        "error": None,
+        "traceback": None,
+        "wall_time_s": 0.0,
+        "pid": os.getpid(),
+    }
+    try:
+        with instrumentation.stage(getattr(fn, "__name__", "job"), key=key):
+            record["result"] = fn(*args, **kwargs)
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["wall_time_s"] = time.perf_counter() - start
+    return record
+
+def run_jobs(fn: Callable,
+             jobs: Sequence[Dict[str, Any]],
+             n_workers: int = 1,
+             blas_threads: Optional[int] = 1,
+             memory_budget: Optional[int] = None,
+             memory_fraction: float = 0.8,
+             start_method: str = "spawn") -> List[Dict[str, Any]]:
+    """
+    Runs per-cohort jobs, fanned out to a process pool.
+
+    Jobs are admitted in order while the sum of the memory estimates of running
+    jobs stays within the budget; a job that does not fit waits for running jobs to
+    finish (smaller jobs behind it may start first). A job larger than the whole
+    budget is only started when nothing else is running.
+
+    Args:
+        fn: Module-level (picklable) function called as fn(*args, **kwargs).
+        jobs: Job specs, dicts with keys 'key' (identifier, e.g. the accession),
+              'args' (tuple), optional 'kwargs' (dict) and optional 'memory_bytes'
+              (estimated peak memory of the job).
+        n_workers: Number of worker processes. 1 runs the jobs serially in-process.
+        blas_threads: BLAS/OpenMP threads per worker (None leaves the defaults), so
+                      that n_workers processes do not each spawn one thread per core.
+                      The variables are in the workers' environment from startup.
+        memory_budget: Total bytes running jobs may use. Defaults to
+                       memory_fraction * currently available memory.
+        memory_fraction: Fraction of available memory used as default budget.
+        start_method: multiprocessing start method. 'spawn' gives workers a fresh
+                      interpreter so the BLAS thread limits apply to NumPy.
+
+    Returns:
+        One record per job, in input order, with keys 'key', 'status' ('ok' or
+        'error'), 'result', 'error', 'traceback', 'wall_time_s' and 'pid'.
+    """
+    jobs = list(jobs)
+
+    if n_workers <= 1:
+        records = []
+        for job in jobs:
+            record = _run_job(fn, job["key"], tuple(job.get("args", ())), job.get("kwargs", {}))
+            _log_record(record)
+            records.append(record)
+        return records
+
+    if memory_budget is None:
+        available = available_memory_bytes()
+        memory_budget = int(available * memory_fraction) if available is not None else None
+
+    pending = list(range(len(jobs)))
+    running = {}
+    records = [None] * len(jobs)
+    used_memory = 0
+
+    ctx = multiprocessing.get_context(start_method)
+    # Workers are started on demand, so the variables stay set while the pool runs
+    with blas_thread_env(blas_threads), \
+         ProcessPoolExecutor(max_workers=n_workers,
+                             mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(blas_threads,)) as executor:
+        while pending or running:
+            # Admit as many pending jobs as workers and memory allow
+            for idx in list(pending):
+                if len(running) >= n_workers:
+                    break
+
+                job_memory = int(jobs[idx].get("memory_bytes", 0) or 0)
+                fits = memory_budget is None or used_memory + job_memory <= memory_budget
+                if not fits and running:
+                    continue
+                if not fits:
+                    logger.warning(f"Job {jobs[idx]['key']} needs ~{job_memory / 1e9:.2f} GB, "
+                                   f"more than the {memory_budget / 1e9:.2f} GB budget. Running it alone.")
+
+                job = jobs[idx]
+                future = executor.submit(_run_job, fn, job["key"], tuple(job.get("args", ())), job.get("kwargs", {}))
+                running[future] = (idx, job_memory)
+                used_memory += job_memory
+                pending.remove(idx)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx, job_memory = running.pop(future)
+                used_memory -= job_memory
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # Worker died (e.g. killed by the OOM killer)
+                    record = {
+                        "key": jobs[idx]["key"],
+                        "status": "error",
+                        "result": None,
+                        "error": f"{type(e).__name__}: {e}",
+                        "traceback": traceback.format_exc(),
+                        "wall_time_s": None,
+                        "pid": None,
+                    }
+                _log_record(record)
+                records[idx] = record
+
+    return records
+
+def _log_record(record: Dict[str, Any]):
+    if record["status"] == "ok":
+        logger.debug(f"Job {record['key']} finished in {record['wall_time_s']:.2f}s")
+    else:
+        logger.error(f"Job {record['key']} failed: {record['error']}")
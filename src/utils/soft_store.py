@@ -0,0 +1,151 @@
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import GEOparse
+
+from .io import CACHE_DIRNAME, content_key, _atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Parsed copies of GEO family SOFT files, stored next to them and keyed by the SOFT
+# file's content hash (see io.content_key), so each file is parsed once:
+#   <dir>/.kora_cache/<accession>-<hash>.series.json      series metadata + platform list
+#   <dir>/.kora_cache/<accession>-<hash>.<GPL>.table.npz  platform table, columnar
+# Table columns are stored as UTF-8 bytes plus offsets (per-column CSR layout), since
+# fixed-width string arrays would pad every cell to the longest annotation.
+SOFT_STORE_VERSION = 1
+
+def _store_paths(soft_path: Path, accession: str, key: str):
+    cache_dir = soft_path.parent / CACHE_DIRNAME
+    base = f"{accession}-{key}"
+    return cache_dir, cache_dir / f"{base}.series.json", base
+
+def _table_path(cache_dir: Path, base: str, gpl_name: str) -> Path:
+    return cache_dir / f"{base}.{gpl_name}.table.npz"
+
+def _accession(soft_path: Path) -> str:
+    return soft_path.name.split("_family")[0]
+
+def _encode_column(values) -> Dict[str, np.ndarray]:
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return {"data": data, "offsets": offsets}
+
+def _decode_column(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    if len(offsets) < 2:
+        return []
+    if data.all():
+        # One decode of the whole column with NUL inserted at the cell boundaries,
+        # then a single split instead of a slice and decode per cell
+        return np.insert(data, offsets[1:-1], 0).tobytes().decode("utf-8").split("\x00")
+    # Cells containing NUL bytes (not expected in SOFT text): split by offsets
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def _write_table(path: Path, table: pd.DataFrame):
+    arrays = {"columns": np.array([str(c) for c in table.columns], dtype=str)}
+    for i, col in enumerate(table.columns):
+        column = _encode_column(table[col].tolist())
+        arrays[f"c{i}_data"] = column["data"]
+        arrays[f"c{i}_offsets"] = column["offsets"]
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+def _read_table(path: Path) -> pd.DataFrame:
+    with np.load(path) as data:
+        columns = data["columns"].tolist()
+        return pd.DataFrame({
+            col: _decode_column(data[f"c{i}_data"], data[f"c{i}_offsets"])
+            for i, col in enumerate(columns)
+        }, columns=columns)
+
+def store_series(gse, soft_path: Path, accession: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Writes the store entry of an already parsed series (e.g. right after GEOparse
+    downloaded it), so the SOFT file never has to be parsed again.
+
+    Returns:
+        The stored series record (see `read_series`).
+    """
+    soft_path = Path(soft_path)
+    accession = accession or _accession(soft_path)
+    cache_dir, series_path, base = _store_paths(soft_path, accession, content_key(soft_path))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    platforms = list(gse.gpls.keys())
+    for gpl_name, gpl in gse.gpls.items():
+        _write_table(_table_path(cache_dir, base, gpl_name), gpl.table)
+
+    record = {
+        "version": SOFT_STORE_VERSION,
+        "accession": accession,
+        "metadata": {k: list(v) if isinstance(v, (list, tuple)) else v for k, v in gse.metadata.items()},
+        "platforms": platforms,
+        "n_samples": len(gse.gsms),
+    }
+    # Series record last: its presence marks a complete entry
+    _atomic_write_json(series_path, record)
+
+    # Drop entries of earlier versions of the same SOFT file
+    for stale in cache_dir.glob(f"{accession}-*.*"):
+        if not stale.name.startswith(f"{base}.") and (stale.name.endswith(".series.json") or stale.name.endswith(".table.npz")):
+            stale.unlink(missing_ok=True)
+
+    logger.debug(f"Stored parsed SOFT of {accession} ({len(platforms)} platforms)")
+    return record
+
+def read_series(soft_path: Path, accession: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Series metadata of a family SOFT file, parsing the file only on the first call.
+
+    Args:
+        soft_path: Path to <accession>_family.soft(.gz).
+        accession: Series accession. Defaults to the file name prefix.
+
+    Returns:
+        Dictionary with 'accession', 'metadata' (GEOparse series metadata, values are
+        lists of strings), 'platforms' (GPL accessions) and 'n_samples'.
+    """
+    soft_path = Path(soft_path)
+    accession = accession or _accession(soft_path)
+    _, series_path, _ = _store_paths(soft_path, accession, content_key(soft_path))
+
+    if series_path.exists():
+        try:
+            with open(series_path, "r") as f:
+                record = json.load(f)
+            if record.get("version") == SOFT_STORE_VERSION:
+                return record
+        except (OSError, ValueError):
+            pass
+
+    logger.info(f"Parsing {soft_path.name} (first use)")
+    gse = GEOparse.get_GEO(filepath=str(soft_path), silent=True)
+    return store_series(gse, soft_path, accession)
+
+def read_platform_table(soft_path: Path, gpl_name: str, accession: Optional[str] = None) -> pd.DataFrame:
+    """
+    Platform (GPL) annotation table from the store. All cells are strings, as
+    str() of the values GEOparse parsed ("nan" for missing).
+    """
+    soft_path = Path(soft_path)
+    accession = accession or _accession(soft_path)
+    record = read_series(soft_path, accession)
+    if gpl_name not in record["platforms"]:
+        raise KeyError(f"{gpl_name} is not a platform of {accession}")
+
+    cache_dir, _, base = _store_paths(soft_path, accession, content_key(soft_path))
+    path = _table_path(cache_dir, base, gpl_name)
+    if not path.exists():
+        # Entry written by another version or partially removed: rebuild it
+        gse = GEOparse.get_GEO(filepath=str(soft_path), silent=True)
+        store_series(gse, soft_path, accession)
+    return _read_table(path)
@@ -0,0 +1,32 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def stand_in_server():
+    """
+    Factory starting local HTTP stand-ins for remote services.
+
+    stand_in_server(handler_cls, **attrs) serves handler_cls on a free localhost port
+    in a background thread, with request logging silenced, and returns the server
+    with `attrs` set on it (state shared with the handler via self.server) and its
+    `base_url`. Servers are shut down at teardown.
+    """
+    servers = []
+
+    def start(handler_cls, **attrs):
+        quiet = type(handler_cls.__name__, (handler_cls,), {"log_message": lambda self, *args: None})
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), quiet)
+        for name, value in attrs.items():
+            setattr(srv, name, value)
+        srv.base_url = f"http://127.0.0.1:{srv.server_address[1]}"
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,150 @@
+import hashlib
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.utils.http import HttpClient
+from src.utils.downloads import DownloadManager, DownloadManifest, https_url
+
+PAYLOAD = bytes(range(256)) * 400
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """
+    Serves PAYLOAD with Range support at /file/<name>. /drop/<name> cuts the first
+    response off halfway through, like an interrupted transfer.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        if not self.path.startswith(("/file/", "/drop/")):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.path.startswith("/drop/") and not self.server.dropped:
+            self.server.dropped = True
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(stand_in_server):
+    return stand_in_server(RangeHandler, requests=[], dropped=False)
+
+
+@pytest.fixture
+def manager():
+    client = HttpClient(cache_dir=None, backoff=0.01, rate_limits={"127.0.0.1": 1000.0})
+    return DownloadManager(max_workers=3, client=client, timeout=5.0)
+
+
+def url(server, path):
+    return f"{server.base_url}{path}"
+
+
+def test_download_many_verifies_and_records(server, manager, tmp_path):
+    items = [(url(server, f"/file/{i}.txt"), tmp_path / f"{i}.txt") for i in range(5)]
+    results = manager.download_many(items)
+
+    assert [r["status"] for r in results] == ["downloaded"] * 5
+    manifest = DownloadManifest(tmp_path)
+    for _, path in items:
+        assert path.read_bytes() == PAYLOAD
+        assert manifest.entry(path.name)["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+
+    # Recorded files are not fetched again
+    n_requests = len(server.requests)
+    assert manager.download(*items[0])["status"] == "cached"
+    assert len(server.requests) == n_requests
+
+
+def test_interrupted_transfer_resumes_with_range(server, manager, tmp_path):
+    dest = tmp_path / "matrix.txt.gz"
+    result = manager.download(url(server, "/drop/matrix.txt.gz"), dest)
+
+    assert result["status"] == "downloaded"
+    assert dest.read_bytes() == PAYLOAD
+    assert not dest.with_name("matrix.txt.gz.part").exists()
+    ranges = [r for _, r in server.requests]
+    assert ranges[0] is None
+    assert ranges[1] == f"bytes={len(PAYLOAD) // 2}-"
+
+
+def test_unrecorded_truncated_file_is_completed(server, manager, tmp_path):
+    dest = tmp_path / "counts.txt"
+    dest.write_bytes(PAYLOAD[:1000])
+
+    assert manager.download(url(server, "/file/counts.txt"), dest)["status"] == "downloaded"
+    assert dest.read_bytes() == PAYLOAD
+    assert server.requests[-1][1] == "bytes=1000-"
+
+
+def test_unrecorded_file_is_left_in_place_when_not_downloaded(server, manager, tmp_path):
+    big = tmp_path / "big.txt"
+    big.write_bytes(PAYLOAD[:1000])
+    manager.size_limit = len(PAYLOAD) - 1
+    assert manager.download(url(server, "/file/big.txt"), big)["status"] == "too_large"
+    assert big.read_bytes() == PAYLOAD[:1000]
+    assert not big.with_name("big.txt.part").exists()
+
+    missing = tmp_path / "missing.txt"
+    missing.write_bytes(b"local copy")
+    assert manager.download(url(server, "/missing.txt"), missing)["status"] == "failed"
+    assert missing.read_bytes() == b"local copy"
+    assert not missing.with_name("missing.txt.part").exists()
+
+
+def test_checksum_mismatch_and_size_limit(server, manager, tmp_path):
+    dest = tmp_path / "bad.txt"
+    result = manager.download(url(server, "/file/bad.txt"), dest, sha256="0" * 64)
+    assert result["status"] == "failed"
+    assert not dest.exists() and not dest.with_name("bad.txt.part").exists()
+
+    manager.size_limit = len(PAYLOAD) - 1
+    assert manager.download(url(server, "/file/big.txt"), tmp_path / "big.txt")["status"] == "too_large"
+    assert not (tmp_path / "big.txt").exists()
+
+
+def test_manifest_completion_detects_changed_files(server, manager, tmp_path):
+    dest = tmp_path / "a.txt"
+    manager.download(url(server, "/file/a.txt"), dest)
+    manifest = DownloadManifest(tmp_path)
+    assert not manifest.is_complete()
+
+    manifest.mark_complete()
+    assert manifest.is_complete()
+
+    dest.write_bytes(PAYLOAD[:10])
+    assert not manifest.is_complete()
+
+
+def test_ftp_urls_are_rewritten_to_https():
+    assert https_url("ftp://ftp.ncbi.nlm.nih.gov/geo/series/GSE1nnn/GSE1234/suppl/x.txt.gz") == \
+        "https://ftp.ncbi.nlm.nih.gov/geo/series/GSE1nnn/GSE1234/suppl/x.txt.gz"
+    assert https_url("https://example.org/x") == "https://example.org/x"
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from src.encoding.spike_encoding import SpikeEncoder
+from src.encoding.spike_trains import SpikeTrains
+
+
+def test_encode_is_reproducible_with_seed():
+    expression = np.linspace(0.0, 1.0, 25)
+    encoder = SpikeEncoder()
+
+    first = encoder.encode(expression, duration_ms=500.0, seed=7)
+    # Calls in between must not affect a seeded encoding
+    encoder.encode(expression, duration_ms=500.0)
+    second = SpikeEncoder(seed=123).encode(expression, duration_ms=500.0, seed=7)
+    other = encoder.encode(expression, duration_ms=500.0, seed=8)
+
+    assert np.array_equal(first.steps, second.steps)
+    assert np.array_equal(first.starts, second.starts)
+    assert not np.array_equal(first.steps, other.steps)
+
+
+def test_encode_1d_spike_count_matches_rate():
+    n_genes, duration = 400, 1000.0
+    expression = np.full(n_genes, 0.5)
+    trains = SpikeEncoder(max_freq=100.0).encode(expression, duration_ms=duration, seed=0)
+
+    # 50 Hz for 1 s: 50 spikes per gene on average
+    expected = 0.5 * 100.0 * duration / 1000.0
+    counts = trains.counts()
+    assert len(trains) == n_genes
+    assert abs(counts.mean() - expected) < 0.05 * expected
+
+
+def test_encode_2d_spike_count_per_window():
+    n_genes, duration = 400, 2000.0
+    expression = np.vstack([np.full(n_genes, 0.2), np.full(n_genes, 0.8), np.zeros(n_genes)])
+    trains = SpikeEncoder(max_freq=100.0).encode(expression, duration_ms=duration, seed=1)
+
+    window_steps = int(duration / 3)
+    for t, level in enumerate([0.2, 0.8, 0.0]):
+        in_window = trains.window(t * window_steps, (t + 1) * window_steps).counts()
+        expected = level * 100.0 * window_steps / 1000.0
+        if expected == 0:
+            assert in_window.sum() == 0
+        else:
+            assert abs(in_window.mean() - expected) < 0.05 * expected
+
+
+@pytest.mark.parametrize("expression_2d", [False, True])
+def test_encode_respects_refractory_period(expression_2d):
+    n_genes, refractory = 50, 5.0
+    expression = np.full(n_genes, 1.0)
+    if expression_2d:
+        expression = np.vstack([expression, expression * 0.9, expression])
+    trains = SpikeEncoder(max_freq=500.0, refractory_period=refractory).encode(
+        expression, duration_ms=600.0, seed=2)
+
+    assert trains.n_spikes > 0
+    for times in trains:
+        assert np.all(np.diff(times) >= refractory)
+
+
+def example_trains():
+    # Gene 0: steps 1, 4, 9; gene 1: none; gene 2: steps 0, 4; gene 3: step 7
+    return SpikeTrains.from_events(np.array([2, 0, 3, 0, 2, 0]),
+                                   np.array([4, 9, 7, 1, 0, 4]),
+                                   n_genes=4, dt=0.5)
+
+
+def test_spike_trains_round_trips():
+    trains = example_trains()
+
+    assert trains.n_genes == 4 and trains.n_spikes == 6
+    assert trains.is_contiguous()
+    assert [list(trains.gene_steps(i)) for i in range(4)] == [[1, 4, 9], [], [0, 4], [7]]
+    # Indexing yields times in ms
+    assert np.array_equal(trains[0], [0.5, 2.0, 4.5])
+
+    offsets = np.append(trains.starts, trains.stops[-1])
+    rebuilt = SpikeTrains.from_offsets(trains.steps, offsets, dt=trains.dt)
+    assert np.array_equal(rebuilt.steps, trains.steps)
+
+    from_times = SpikeTrains.from_times(trains.to_list(), dt=trains.dt)
+    assert np.array_equal(from_times.steps, trains.steps)
+    assert np.array_equal(from_times.counts(), trains.counts())
+
+
+def test_spike_trains_select_and_compact_keep_events():
+    trains = example_trains()
+    selected = trains.select([3, 0])
+
+    # Selection shares the flat array
+    assert selected.steps is trains.steps
+    assert not selected.is_contiguous()
+
+    compact = selected.compact()
+    assert compact.is_contiguous()
+    assert list(compact.steps) == [7, 1, 4, 9]
+    assert [list(compact.gene_steps(i)) for i in range(2)] == [[7], [1, 4, 9]]
+
+
+def test_spike_trains_window_is_half_open():
+    trains = example_trains()
+    windowed = trains.window(4, 9)
+
+    assert windowed.steps is trains.steps
+    assert [list(windowed.gene_steps(i)) for i in range(4)] == [[4], [], [4], [7]]
+    assert windowed.window(0, 4).n_spikes == 0
+
+
+def test_spike_trains_events_group_by_step():
+    event_steps, offsets, genes = example_trains().events(n_steps=9)
+
+    assert list(event_steps) == [0, 1, 4, 7]
+    assert [sorted(genes[offsets[k]:offsets[k + 1]]) for k in range(4)] == [[2], [0], [0, 2], [3]]
+
+
+def test_spike_store_round_trip(tmp_path):
+    trains = example_trains().select([2, 0, 3])
+    trains.save(tmp_path)
+
+    loaded = SpikeTrains.load(tmp_path)
+    assert isinstance(loaded.steps, np.memmap)
+    assert loaded.dt == trains.dt
+    assert loaded.n_genes == 3
+    for i in range(3):
+        assert np.array_equal(loaded.gene_steps(i), trains.gene_steps(i))
+
+    eager = SpikeTrains.load(tmp_path, mmap_mode=None)
+    assert not isinstance(eager.steps, np.memmap)
+    assert np.array_equal(eager.steps, loaded.steps)
+
+
+def test_spike_store_exists_requires_all_files(tmp_path):
+    assert not SpikeTrains.exists(tmp_path)
+    example_trains().save(tmp_path)
+    assert SpikeTrains.exists(tmp_path)
+
+    (tmp_path / "spike_meta.json").unlink()
+    assert not SpikeTrains.exists(tmp_path)
@@ -0,0 +1,162 @@
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.utils.gene_cache import GeneMappingCache, ENSEMBL_SCOPE, ENTREZ_SCOPE
+from src.utils.http import HttpClient
+
+
+def test_cache_lookup_returns_hits_and_missing(tmp_path):
+    cache = GeneMappingCache(tmp_path / "genes.sqlite")
+    cache.store(ENSEMBL_SCOPE, {"ENSG1": "TP53", "ENSG2": "APP"}, misses=["ENSG3"])
+
+    mapping, missing = cache.lookup(ENSEMBL_SCOPE, ["ENSG1", "ENSG3", "ENSG4", "ENSG1"])
+    assert mapping == {"ENSG1": "TP53"}
+    # Cached misses are known, unknown IDs are missing
+    assert missing == ["ENSG4"]
+    # Scopes are separate
+    assert cache.lookup(ENTREZ_SCOPE, ["ENSG1"]) == ({}, ["ENSG1"])
+    assert cache.stats() == {ENSEMBL_SCOPE: {"symbols": 2, "misses": 1}}
+
+
+def test_cached_misses_expire(tmp_path):
+    path = tmp_path / "genes.sqlite"
+    GeneMappingCache(path).store(ENTREZ_SCOPE, {"7157": "TP53"}, misses=["999999"])
+
+    assert GeneMappingCache(path).lookup(ENTREZ_SCOPE, ["7157", "999999"])[1] == []
+    # Hits never expire, misses older than the TTL are looked up again
+    expired = GeneMappingCache(path, negative_ttl_days=0.0)
+    assert expired.lookup(ENTREZ_SCOPE, ["7157", "999999"]) == ({"7157": "TP53"}, ["999999"])
+
+
+def test_import_dump_detects_columns(tmp_path):
+    dump = tmp_path / "hgnc_complete_set.txt"
+    dump.write_text("hgnc_id\tsymbol\tentrez_id\tensembl_gene_id\n"
+                    "HGNC:11998\tTP53\t7157\tENSG00000141510.17\n"
+                    "HGNC:620\tAPP\t351\tENSG00000142192|ENSG00000999999\n"
+                    "HGNC:1\t\t1\tENSG00000000001\n")
+    cache = GeneMappingCache(tmp_path / "genes.sqlite")
+
+    assert cache.import_dump(dump) == {ENTREZ_SCOPE: 2, ENSEMBL_SCOPE: 3}
+    mapping, missing = cache.lookup(ENSEMBL_SCOPE, ["ENSG00000141510", "ENSG00000999999", "ENSG00000000001"])
+    assert mapping == {"ENSG00000141510": "TP53", "ENSG00000999999": "APP"}
+    assert missing == ["ENSG00000000001"]
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError):
+        cache.import_dump(bad)
+
+
+class MyGeneHandler(BaseHTTPRequestHandler):
+    """
+    mygene.info /query stand-in: IDs starting with "ENSG" map to "SYM<id>", others are
+    not found. The first `fail_first` requests are answered with 503.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        ids = parse_qs(body)["q"][0].split(",")
+        self.server.queries.append(ids)
+        if len(self.server.queries) <= self.server.fail_first:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        hits = [{"query": i, "symbol": f"SYM{i[4:]}"} if i.startswith("ENSG") else {"query": i, "notfound": True}
+                for i in ids]
+        payload = json.dumps(hits).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def mygene(stand_in_server, monkeypatch, tmp_path):
+    pytest.importorskip("GEOparse")
+    from src.utils import gene_mapping
+
+    srv = stand_in_server(MyGeneHandler, queries=[], fail_first=0)
+    monkeypatch.setattr(gene_mapping, "MYGENE_BASE_URL", srv.base_url)
+    monkeypatch.setenv("KORA_GENE_CACHE", str(tmp_path / "genes.sqlite"))
+    monkeypatch.delenv("KORA_OFFLINE", raising=False)
+    srv.client = HttpClient(cache_dir=None, backoff=0.01, max_retries=2, rate_limits={"127.0.0.1": 1000.0})
+    return srv
+
+
+def test_mapping_queries_only_uncached_ids(mygene):
+    from src.utils.gene_mapping import map_ensembl_to_symbol
+
+    mygene.fail_first = 2
+    first = map_ensembl_to_symbol(["ENSG1.3", "ENSG2", "XYZ"], client=mygene.client)
+    assert first == {"ENSG1.3": "SYM1", "ENSG2": "SYM2"}
+    # Retried through the client's backoff after two 503s
+    assert len(mygene.queries) == 3
+
+    second = map_ensembl_to_symbol(["ENSG1", "ENSG2", "XYZ", "ENSG5"], client=mygene.client)
+    assert second == {"ENSG1": "SYM1", "ENSG2": "SYM2", "ENSG5": "SYM5"}
+    # The known miss XYZ is not queried again
+    assert mygene.queries[-1] == ["ENSG5"]
+
+
+def test_failed_chunks_are_not_cached(mygene):
+    from src.utils.gene_mapping import map_ensembl_to_symbol
+
+    mygene.fail_first = 3
+    assert map_ensembl_to_symbol(["ENSG1"], client=mygene.client) == {}
+    assert map_ensembl_to_symbol(["ENSG1"], client=mygene.client) == {"ENSG1": "SYM1"}
+
+
+def test_offline_mode_uses_only_the_cache(mygene, monkeypatch, tmp_path):
+    from src.utils.gene_mapping import map_entrez_to_symbol
+
+    GeneMappingCache(tmp_path / "genes.sqlite").store(ENTREZ_SCOPE, {"7157": "TP53"})
+    monkeypatch.setenv("KORA_OFFLINE", "1")
+
+    assert map_entrez_to_symbol([7157, 351], client=mygene.client) == {7157: "TP53"}
+    assert mygene.queries == []
+
+
+def platform_table():
+    import pandas as pd
+
+    return pd.DataFrame({
+        "ID": ["1007_s_at", "1053_at", "117_at", "121_at"],
+        "Gene Symbol": ["DDR1 /// MIR4640", "RFC2", "", "PAX8"],
+        "Gene Title": ["discoidin domain receptor", "replication factor C", "", "paired box 8"],
+    })
+
+
+def test_probe_map_is_built_once_and_served_from_disk(tmp_path, monkeypatch):
+    pytest.importorskip("GEOparse")
+    from src.utils import gene_mapping
+
+    calls = []
+
+    def load():
+        calls.append(1)
+        return platform_table()
+
+    built = gene_mapping.platform_probe_map("GPL570", load, cache_dir=tmp_path)
+    assert built == {"1007_s_at": "DDR1", "1053_at": "RFC2", "121_at": "PAX8"}
+    assert len(calls) == 1
+    assert (tmp_path / "GPL570.npz").exists()
+
+    def fail():
+        raise AssertionError("loader called for a persisted map")
+
+    assert gene_mapping.platform_probe_map("GPL570", fail, cache_dir=tmp_path) == built
+
+    # Maps written under other extraction rules are rebuilt
+    monkeypatch.setattr(gene_mapping, "PROBE_MAP_VERSION", gene_mapping.PROBE_MAP_VERSION + 1)
+    assert gene_mapping.load_probe_map("GPL570", cache_dir=tmp_path) is None
+    assert gene_mapping.platform_probe_map("GPL570", load, cache_dir=tmp_path) == built
+    assert len(calls) == 2
+    assert gene_mapping.load_probe_map("GPL570", cache_dir=tmp_path) == built
@@ -0,0 +1,73 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.data.generator import SyntheticGenerator
+
+
+def make_generator(n_cohorts=40, n_genes=30, n_timepoints=12, seed=7):
+    gen = SyntheticGenerator(n_genes=n_genes, n_timepoints=n_timepoints, n_cohorts=n_cohorts, seed=seed)
+    gen.generate_ground_truth_grn()
+    return gen
+
+
+def test_chunked_output_does_not_depend_on_worker_count(tmp_path):
+    serial = make_generator().simulate_dynamics_chunked(tmp_path / "serial.npy", chunk_size=8, n_workers=1)
+    parallel = make_generator().simulate_dynamics_chunked(tmp_path / "parallel.npy", chunk_size=8, n_workers=2)
+
+    assert (tmp_path / "serial.npy").read_bytes() == (tmp_path / "parallel.npy").read_bytes()
+    np.testing.assert_array_equal(serial, parallel)
+    # Another generator seed gives other data
+    other = make_generator(seed=8).simulate_dynamics_chunked(tmp_path / "other.npy", chunk_size=8)
+    assert not np.array_equal(other, serial)
+
+
+def test_chunked_output_is_float32_memmap(tmp_path):
+    gen = make_generator(n_cohorts=21)
+    data = gen.simulate_dynamics_chunked(tmp_path / "data.npy", chunk_size=8)
+
+    assert isinstance(data, np.memmap)
+    assert data.dtype == np.float32
+    assert data.shape == (21, 12, 30)
+    assert np.array_equal(np.load(tmp_path / "data.npy"), data)
+    # Every chunk, including the short last one, was written and stays in range
+    assert np.all(data[:, 0, :] <= 0.5) and np.all(data[:, 0, :].max(axis=1) > 0)
+    assert data.min() >= 0 and data.max() <= 1
+
+    gen.save_samples(tmp_path / "samples", data)
+    sample = pd.read_csv(tmp_path / "samples" / "sample_cohort_4.csv", index_col="Timepoint")
+    np.testing.assert_allclose(sample.to_numpy(), data[4], rtol=1e-6)
+
+
+def test_sparse_and_dense_operators_agree(tmp_path):
+    gen = make_generator()
+    assert sp.issparse(gen.interaction_operator(sparse_density=1.0))
+    assert isinstance(gen.interaction_operator(sparse_density=0.0), np.ndarray)
+    state = gen.rng.bit_generator.state
+
+    sparse = gen.simulate_dynamics_chunked(tmp_path / "sparse.npy", chunk_size=16, sparse_density=1.0)
+    gen.rng.bit_generator.state = state
+    dense = gen.simulate_dynamics_chunked(tmp_path / "dense.npy", chunk_size=16, sparse_density=0.0)
+
+    np.testing.assert_allclose(sparse, dense, rtol=1e-5, atol=1e-5)
+
+
+def test_in_memory_simulation_is_unchanged():
+    gen = make_generator(n_cohorts=5)
+    rng = copy.deepcopy(gen.rng)
+    data = gen.simulate_dynamics(noise_level=0.1, decay=0.2)
+
+    # Reference: the original per-timepoint model on the generator's stream
+    W = gen.interaction_matrix
+    expected = np.zeros((5, 12, 30))
+    expected[:, 0, :] = rng.uniform(0, 0.5, size=(5, 30))
+    for t in range(11):
+        x = expected[:, t, :]
+        activation = 1 / (1 + np.exp(-(x @ W)))
+        noise = rng.normal(0, 0.1, size=(5, 30))
+        expected[:, t + 1, :] = np.clip(0.8 * x + 0.2 * activation + noise, 0, 1)
+
+    assert data.dtype == np.float64
+    np.testing.assert_array_equal(data, expected)
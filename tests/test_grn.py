@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+from src.snn.simulation import Trainer
+from src.grn.infer_grn import GRNExtractor, StreamingGRNExtractor
+from src.grn.operators import OperatorDistiller
+from src.grn.engine import OperatorEngine
+from src.grn.perturbation import PerturbationScreen
+
+
+def random_spike_trains(n_genes: int, duration_ms: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        np.sort(rng.choice(int(duration_ms), size=rng.integers(5, 40), replace=False)).astype(float)
+        for _ in range(n_genes)
+    ]
+
+
+def test_float32_training_preserves_grn_edges():
+    n_genes, duration = 60, 500.0
+    spikes = random_spike_trains(n_genes, duration)
+
+    w64 = Trainer(n_genes).train_cohort(spikes, duration_ms=duration)
+    w32 = Trainer(n_genes, dtype=np.float32).train_cohort(spikes, duration_ms=duration)
+
+    assert w64.dtype == np.float64
+    assert w32.dtype == np.float32
+    np.testing.assert_allclose(w32, w64, atol=1e-5)
+
+    abs_w = np.abs(w64)
+    threshold = float(abs_w.mean() + 2 * abs_w.std())
+    extractor = GRNExtractor(weight_threshold=threshold)
+    edges64 = set(extractor.extract(w64).edges())
+    edges32 = set(extractor.extract(w32).edges())
+
+    assert len(edges64) > 0
+    # Edges may only flip where the weight sits within float32 tolerance of the threshold
+    for u, v in edges64 ^ edges32:
+        i, j = int(u.split("_")[1]), int(v.split("_")[1])
+        assert abs(abs_w[i, j] - threshold) < 1e-5
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_extract_skips_self_loops_and_signs_edges(dtype):
+    W = np.array([[0.9, 0.5, -0.4],
+                  [0.0, 0.0, 0.05],
+                  [-0.3, 0.2, 0.0]], dtype=dtype)
+    G = GRNExtractor(weight_threshold=0.1).extract(W)
+
+    assert not G.has_edge("Gene_0", "Gene_0")
+    assert G["Gene_0"]["Gene_1"]["sign"] == 1
+    assert G["Gene_0"]["Gene_2"]["sign"] == -1
+    assert not G.has_edge("Gene_1", "Gene_2")
+    assert G.number_of_edges() == 4
+
+
+@pytest.mark.parametrize("block_rows", [2, 64])
+def test_streaming_top_k_skips_zero_weights(block_rows):
+    W = np.zeros((6, 6))
+    W[0, 1], W[2, 1], W[3, 1] = 0.5, -0.7, 0.2
+    W[4, 2] = 0.3
+    W[5, 5] = 0.9 # self-loop only
+
+    edges = StreamingGRNExtractor(top_k=2, block_rows=block_rows).extract_edges(W, threshold=None)
+
+    assert np.all(edges["weights"] != 0)
+    assert set(zip(edges["sources"].tolist(), edges["targets"].tolist())) == {(0, 1), (2, 1), (4, 2)}
+    assert edges["signs"].tolist() == [1, -1, 1]
+
+
+def test_distill_named_genes_keeps_gene_index_order():
+    import networkx as nx
+    import scipy.sparse as sp
+
+    G = nx.DiGraph()
+    G.add_edge("TP53", "MDM2", weight=0.8)
+    G.add_edge("APP", "TP53", weight=-0.5)
+    order = ["MDM2", "APP", "TP53", "SNCA"]
+
+    operators = OperatorDistiller().distill(G, n_genes=4, gene_names=order)
+    W = operators["weights"]
+    assert operators["format"] == "dense" and isinstance(W, np.ndarray)
+    assert operators["gene_names"] == order
+    assert operators["gene_index"] == {"MDM2": 0, "APP": 1, "TP53": 2, "SNCA": 3}
+    # (target, source) layout
+    assert W[0, 2] == np.float32(0.8) and W[2, 1] == np.float32(-0.5)
+    assert np.count_nonzero(W) == 2
+
+    # Without an explicit order, non-"Gene_i" names are indexed in sorted order
+    default = OperatorDistiller().distill(G, n_genes=3)
+    assert default["gene_names"] == ["APP", "MDM2", "TP53"]
+
+    padded = order + [f"G{i}" for i in range(96)]
+    sparse = OperatorDistiller(format="auto").distill(G, n_genes=100, gene_names=padded)
+    assert sparse["format"] == "csr" and sp.issparse(sparse["weights"])
+    np.testing.assert_array_equal(sparse["weights"].toarray()[:4, :4], W)
+
+
+@pytest.mark.parametrize("activation", ["sigmoid", "tanh", "relu", "linear"])
+def test_operator_engine_matches_dense_reference(activation):
+    rng = np.random.default_rng(1)
+    W = rng.normal(size=(40, 40)) * (rng.random((40, 40)) < 0.05)
+    operators = OperatorDistiller(activation_fn=activation, format="csr").distill_weights(W)
+    x = rng.normal(size=(8, 40)).astype(np.float32)
+
+    z = x @ operators["weights"].toarray().T + operators["bias"]
+    expected = {"sigmoid": lambda z: 1 / (1 + np.exp(-z)), "tanh": np.tanh,
+                "relu": lambda z: np.maximum(0, z), "linear": lambda z: z}[activation](z)
+
+    for mode in ("dense", "sparse"):
+        engine = OperatorEngine(operators, mode=mode)
+        y = engine.forward(x)
+        assert y.dtype == np.float32
+        assert y is engine.output_buffer(8)
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(engine.forward(x[0]), expected[0], rtol=1e-5, atol=1e-6)
+
+
+def test_sparse_forward_writes_into_reused_buffer():
+    rng = np.random.default_rng(5)
+    W = rng.normal(size=(400, 400)) * (rng.random((400, 400)) < 0.02)
+    operators = OperatorDistiller(format="csr").distill_weights(W)
+    sparse = OperatorEngine(operators, mode="sparse")
+    dense = OperatorEngine(operators, mode="dense")
+    x = rng.normal(size=(64, 400)).astype(np.float32)
+
+    out = np.empty((64, 400), dtype=np.float32)
+    assert sparse.forward(x, out=out) is out
+    first = sparse.forward(x)
+    assert sparse.forward(x) is first
+    np.testing.assert_allclose(first, dense.forward(x), rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(out, first)
+
+
+def test_operator_engine_rollout_matches_repeated_forward():
+    rng = np.random.default_rng(2)
+    W = rng.normal(size=(30, 30)) * 0.1
+    operators = OperatorDistiller(activation_fn="tanh").distill_weights(W)
+    engine = OperatorEngine(operators)
+    x0 = rng.normal(size=(5, 30)).astype(np.float32)
+
+    out = engine.rollout(x0, n_steps=10, record_every=3)
+    x = x0.copy()
+    for t in range(1, 11):
+        x = engine.forward(x).copy()
+        if t == 9:
+            np.testing.assert_allclose(out["trajectory"][-1], x, rtol=1e-6)
+    np.testing.assert_allclose(out["final"], x, rtol=1e-6)
+    assert list(out["record_steps"]) == [0, 3, 6, 9]
+    assert out["n_steps"] == 10
+
+    # Contracting map: converges to the fixed point well before the step limit
+    stopped = engine.rollout(x0, n_steps=1000, tol=1e-6)
+    assert stopped["converged"].all() and stopped["n_steps"] < 1000
+
+
+@pytest.mark.parametrize("mode", ["knockout", "overexpression"])
+def test_perturbation_screen_matches_single_gene_simulations(mode, tmp_path):
+    rng = np.random.default_rng(3)
+    W = rng.normal(size=(25, 25)) * (rng.random((25, 25)) < 0.2)
+    operators = OperatorDistiller().distill_weights(W)
+    screen = PerturbationScreen(operators, mode=mode, block_size=7, n_steps=500, tol=1e-7)
+    result = screen.run(output_path=tmp_path / "effects.npy")
+
+    engine = OperatorEngine(operators)
+    baseline = engine.rollout(np.zeros(25, dtype=np.float32), 500, tol=1e-7)["final"]
+    for g in (0, 8, 24):
+        x = baseline.copy()
+        for _ in range(500):
+            x[g] = screen.value
+            x = engine.forward(x).copy()
+        x[g] = screen.value
+        np.testing.assert_allclose(result["effects"][g], x - baseline, atol=1e-5)
+
+    assert result["converged"].all()
+    np.testing.assert_array_equal(np.load(tmp_path / "effects.npy"), result["effects"])
+
+    # Steps are counted per perturbed gene, not per block
+    steps = result["n_steps"]
+    for start in range(0, 25, 7):
+        block = slice(start, start + 7)
+        single = engine.rollout(np.broadcast_to(baseline, (len(steps[block]), 25)), 500, tol=1e-7,
+                                clamp=(result["genes"][block], screen.value))
+        np.testing.assert_array_equal(steps[block], single["sample_steps"])
+        assert steps[block].max() == single["n_steps"]
+    assert len(np.unique(steps)) > 1
+    assert [row["n_steps"] for row in screen.summarize(result)] == steps.tolist()
@@ -0,0 +1,120 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.utils import http
+from src.utils.http import HttpClient
+from src.utils.dataset_fetchers import fetch_geo_metadata, fetch_metadata_batch
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Minimal E-utilities stand-in: /eutils/esearch.fcgi and /eutils/esummary.fcgi for
+    accessions GSE<n> (n samples each), plus /flaky which fails with 503 twice.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.hits.append(url.path)
+
+        if url.path == "/flaky":
+            self.server.flaky_calls += 1
+            if self.server.flaky_calls <= 2:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            return self._json({"ok": True, "calls": self.server.flaky_calls})
+        if url.path == "/eutils/esearch.fcgi":
+            uid = query["term"].split("[")[0].replace("GSE", "2000")
+            return self._json({"esearchresult": {"idlist": [uid]}})
+        if url.path == "/eutils/esummary.fcgi":
+            uid = query["id"]
+            n_samples = int(uid[4:])
+            return self._json({"result": {"uids": [uid], uid: {
+                "accession": f"GSE{n_samples}", "title": "stand-in", "n_samples": n_samples,
+                "gpl": "570", "taxon": "Homo sapiens", "entrytype": "GSE",
+                "gdstype": "Expression profiling by array", "ftplink": "",
+            }}})
+        self.send_response(404)
+        self.end_headers()
+
+    def _json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(stand_in_server):
+    return stand_in_server(StandInHandler, hits=[], flaky_calls=0)
+
+
+def test_response_cache_serves_repeated_requests(server, tmp_path):
+    client = HttpClient(cache_dir=tmp_path, rate_limits={"127.0.0.1": 100.0})
+    url = f"{server.base_url}/eutils/esearch.fcgi"
+
+    first = client.get_json(url, params={"term": "GSE12[Accession]"})
+    second = client.get_json(url, params={"term": "GSE12[Accession]"})
+
+    assert first == second == {"esearchresult": {"idlist": ["200012"]}}
+    assert len(server.hits) == 1
+
+    expired = HttpClient(cache_dir=tmp_path, cache_ttl=0.0, rate_limits={"127.0.0.1": 100.0})
+    expired.get_json(url, params={"term": "GSE12[Accession]"})
+    assert len(server.hits) == 2
+
+
+def test_retries_on_503(server, tmp_path):
+    client = HttpClient(cache_dir=None, backoff=0.01, rate_limits={"127.0.0.1": 100.0})
+    assert client.get_json(f"{server.base_url}/flaky") == {"ok": True, "calls": 3}
+
+    server.flaky_calls = 0
+    client = HttpClient(cache_dir=None, backoff=0.01, max_retries=1, rate_limits={"127.0.0.1": 100.0})
+    with pytest.raises(http.requests.HTTPError):
+        client.get_json(f"{server.base_url}/flaky")
+
+
+def test_rate_limit_bounds_concurrent_requests(server):
+    rate = 20.0
+    client = HttpClient(cache_dir=None, rate_limits={"127.0.0.1": rate}, max_workers=8)
+    url = f"{server.base_url}/eutils/esearch.fcgi"
+
+    n_requests = 30
+    start = time.monotonic()
+    client.map(lambda i: client.get_json(url, params={"term": f"GSE{i}[Accession]"}), range(n_requests))
+    elapsed = time.monotonic() - start
+
+    # A full bucket allows `rate` requests at once, the rest are paced at `rate`/s
+    assert len(server.hits) == n_requests
+    assert elapsed >= (n_requests - rate) / rate * 0.9
+
+
+def test_fetch_metadata_batch_against_stand_in(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http, "EUTILS_BASE_URL", f"{server.base_url}/eutils")
+    client = HttpClient(cache_dir=tmp_path, rate_limits={"127.0.0.1": 100.0})
+
+    record = fetch_geo_metadata("GSE12", client=client)
+    assert record["n_samples"] == 12
+    assert record["platform"] == "570"
+    assert record["entry_type"] == "GSE"
+    assert fetch_geo_metadata("GSE4", client=client) is None
+
+    records = fetch_metadata_batch([(f"GSE{n}", "GEO") for n in (4, 9, 30)], client=client, min_samples=0)
+    assert [r["n_samples"] for r in records] == [4, 9, 30]
+
+    # Refreshing bypasses the cached responses
+    n_hits = len(server.hits)
+    fetch_metadata_batch([("GSE9", "GEO")], client=client, min_samples=0)
+    assert len(server.hits) == n_hits
+    fetch_metadata_batch([("GSE9", "GEO")], client=client, min_samples=0, use_cache=False)
+    assert len(server.hits) == n_hits + 2
@@ -0,0 +1,34 @@
+import json
+import threading
+
+from src.utils import instrumentation
+
+
+def test_stages_nest_per_thread(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    instrumentation.enable(trace)
+    entered = threading.Barrier(3)
+    try:
+        def worker(key):
+            with instrumentation.stage("process_dataset", key=key):
+                instrumentation.add_items(1)
+                # All stages are open at the same time
+                entered.wait(timeout=10)
+
+        with instrumentation.stage("download_cohorts"):
+            threads = [threading.Thread(target=worker, args=(key,)) for key in ("GSE1", "GSE2")]
+            for thread in threads:
+                thread.start()
+            entered.wait(timeout=10)
+            for thread in threads:
+                thread.join()
+            instrumentation.add_items(5)
+    finally:
+        instrumentation.disable()
+
+    records = {r.get("key", r["stage"]): r for r in map(json.loads, trace.read_text().splitlines())}
+    assert set(records) == {"GSE1", "GSE2", "download_cohorts"}
+    # Worker stages are outermost in their threads; items go to the caller's own stage
+    assert all(records[key]["depth"] == 0 and records[key]["items"] == 1 for key in ("GSE1", "GSE2"))
+    assert records["download_cohorts"]["depth"] == 0
+    assert records["download_cohorts"]["items"] == 5
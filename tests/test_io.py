@@ -0,0 +1,84 @@
+import os
+import mmap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.io import read_expression, write_expression, CACHE_DIRNAME
+
+
+def expression_frame(seed=0, n_samples=5, n_genes=4):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((n_samples, n_genes)),
+                        index=pd.Index([f"S{i}" for i in range(n_samples)], name="sample"),
+                        columns=[f"G{j}" for j in range(n_genes)])
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def cached_matrices(csv_path):
+    return sorted((csv_path.parent / CACHE_DIRNAME).glob(f"{csv_path.stem}-*.npy"))
+
+
+def test_first_and_cached_reads_are_identical(tmp_path):
+    csv_path = tmp_path / "expr.csv"
+    expression_frame().to_csv(csv_path)
+
+    first = read_expression(csv_path)
+    second = read_expression(csv_path)
+
+    assert first.dtypes.unique().tolist() == [np.float32]
+    pd.testing.assert_frame_equal(first, second)
+    np.testing.assert_allclose(first.to_numpy(), pd.read_csv(csv_path, index_col=0).to_numpy(), rtol=1e-6)
+    assert len(cached_matrices(csv_path)) == 1
+
+
+def test_cached_matrix_is_read_only_memmap(tmp_path):
+    csv_path = tmp_path / "expr.csv"
+    write_expression(expression_frame(), csv_path)
+
+    values = read_expression(csv_path).to_numpy()
+    assert is_memory_mapped(values)
+    assert not values.flags.writeable
+    with pytest.raises(ValueError):
+        values[0, 0] = 1.0
+
+    loaded = read_expression(csv_path, mmap=False).to_numpy()
+    assert not is_memory_mapped(loaded)
+
+
+def test_cache_is_invalidated_when_csv_changes(tmp_path):
+    csv_path = tmp_path / "expr.csv"
+    expression_frame(seed=0).to_csv(csv_path)
+    read_expression(csv_path)
+
+    # Different size
+    changed = expression_frame(seed=1, n_samples=7)
+    changed.to_csv(csv_path)
+    df = read_expression(csv_path)
+    assert df.shape == (7, 4)
+    np.testing.assert_allclose(df.to_numpy(), changed.to_numpy(), rtol=1e-6)
+
+    # Same size, different content and mtime: detected by the content hash
+    text = csv_path.read_text()
+    edited = text.replace("S0,0.", "S0,1.", 1)
+    assert len(edited) == len(text) and edited != text
+    stat = csv_path.stat()
+    csv_path.write_text(edited)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    df = read_expression(csv_path)
+    assert df.iloc[0, 0] >= 1.0
+
+    # Touching the file without changing it keeps the cached copy
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    before = cached_matrices(csv_path)
+    pd.testing.assert_frame_equal(read_expression(csv_path), df)
+    assert cached_matrices(csv_path) == before
+    assert len(before) == 1
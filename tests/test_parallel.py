@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+
+from src.utils.parallel import run_jobs
+
+
+def job(x, fail=False, sleep=0.0):
+    start = time.time()
+    time.sleep(sleep)
+    if fail:
+        raise ValueError(f"bad input {x}")
+    return {"value": x * x, "start": start, "end": time.time(), "pid": os.getpid()}
+
+
+def startup_environ():
+    # Environment the process was started with (os.environ changes are not reflected)
+    with open("/proc/self/environ", "rb") as f:
+        entries = f.read().split(b"\0")
+    return dict(e.decode().split("=", 1) for e in entries if b"=" in e)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_run_jobs_keeps_order_and_records_errors(n_workers):
+    jobs = [{"key": f"c{i}", "args": (i,), "kwargs": {"fail": i == 2, "sleep": 0.05 * (4 - i)}}
+            for i in range(5)]
+    records = run_jobs(job, jobs, n_workers=n_workers)
+
+    assert [r["key"] for r in records] == [f"c{i}" for i in range(5)]
+    assert [r["status"] for r in records] == ["ok", "ok", "error", "ok", "ok"]
+    assert [r["result"]["value"] for r in records if r["status"] == "ok"] == [0, 1, 9, 16]
+    assert records[2]["error"] == "ValueError: bad input 2"
+    assert "ValueError" in records[2]["traceback"]
+
+
+def test_run_jobs_admits_jobs_within_memory_budget():
+    # Any two of these jobs exceed the budget, so they must not overlap
+    jobs = [{"key": i, "args": (i,), "kwargs": {"sleep": 0.3}, "memory_bytes": 60} for i in range(3)]
+    records = run_jobs(job, jobs, n_workers=3, memory_budget=100)
+
+    intervals = sorted((r["result"]["start"], r["result"]["end"]) for r in records)
+    for (_, end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= end
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/environ"), reason="needs /proc")
+def test_run_jobs_sets_blas_threads_before_worker_start():
+    before = os.environ.get("OMP_NUM_THREADS")
+    records = run_jobs(startup_environ, [{"key": 0}, {"key": 1}], n_workers=2, blas_threads=3)
+
+    for record in records:
+        assert record["result"]["OMP_NUM_THREADS"] == "3"
+        assert record["result"]["OPENBLAS_NUM_THREADS"] == "3"
+    assert os.environ.get("OMP_NUM_THREADS") == before
@@ -0,0 +1,104 @@
+import pytest
+
+GEOparse = pytest.importorskip("GEOparse")
+
+from src.utils import soft_store
+from src.utils.soft_store import read_series, read_platform_table, _encode_column, _decode_column
+
+SOFT = """\
+^DATABASE = GeoMiame
+!Database_name = Gene Expression Omnibus (GEO)
+^SERIES = GSE1
+!Series_title = Synthetic series
+!Series_geo_accession = GSE1
+!Series_platform_id = GPL1
+!Series_sample_id = GSM1
+!Series_sample_id = GSM2
+^PLATFORM = GPL1
+!Platform_title = Synthetic array
+!Platform_geo_accession = GPL1
+#ID = Probe
+#Gene Symbol = Symbol
+#Gene Title = Title
+!platform_table_begin
+ID\tGene Symbol\tGene Title
+p1\tTP53\ttumor protein p53
+p2\tDDR1 /// MIR4640\trécepteur
+p3\t\t
+!platform_table_end
+^SAMPLE = GSM1
+!Sample_title = s1
+!Sample_geo_accession = GSM1
+!Sample_platform_id = GPL1
+#ID_REF = Probe
+#VALUE = Value
+!sample_table_begin
+ID_REF\tVALUE
+p1\t1.5
+p2\t2.0
+p3\t0.1
+!sample_table_end
+^SAMPLE = GSM2
+!Sample_title = s2
+!Sample_geo_accession = GSM2
+!Sample_platform_id = GPL1
+#ID_REF = Probe
+#VALUE = Value
+!sample_table_begin
+ID_REF\tVALUE
+p1\t1.0
+p2\t2.5
+p3\t0.2
+!sample_table_end
+"""
+
+
+@pytest.fixture
+def soft_path(tmp_path):
+    path = tmp_path / "GSE1_family.soft"
+    path.write_text(SOFT, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("values", [
+    ["TP53", "", "DDR1 /// MIR4640", "récepteur ß", "nan"],
+    [""],
+    ["a\x00b", "c"],
+    [],
+])
+def test_column_encoding_round_trips(values):
+    column = _encode_column(values)
+    assert _decode_column(column["data"], column["offsets"]) == values
+
+
+def test_series_is_parsed_once_and_read_from_the_store(soft_path, monkeypatch):
+    record = read_series(soft_path)
+    assert record["accession"] == "GSE1"
+    assert record["metadata"]["title"] == ["Synthetic series"]
+    assert record["platforms"] == ["GPL1"]
+    assert record["n_samples"] == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError("SOFT file parsed again")
+
+    monkeypatch.setattr(soft_store.GEOparse, "get_GEO", fail)
+    assert read_series(soft_path) == record
+
+    table = read_platform_table(soft_path, "GPL1")
+    assert list(table.columns) == ["ID", "Gene Symbol", "Gene Title"]
+    assert table["ID"].tolist() == ["p1", "p2", "p3"]
+    assert table["Gene Symbol"].tolist() == ["TP53", "DDR1 /// MIR4640", "nan"]
+    assert table["Gene Title"].tolist() == ["tumor protein p53", "récepteur", "nan"]
+    with pytest.raises(KeyError):
+        read_platform_table(soft_path, "GPL2")
+
+
+def test_changed_soft_file_is_parsed_again(soft_path):
+    read_series(soft_path)
+    soft_path.write_text(SOFT.replace("Synthetic series", "Updated series"), encoding="utf-8")
+
+    assert read_series(soft_path)["metadata"]["title"] == ["Updated series"]
+    # Entries of the earlier file version are dropped
+    cache_dir = soft_path.parent / ".kora_cache"
+    assert len(list(cache_dir.glob("GSE1-*.series.json"))) == 1
+    assert len(list(cache_dir.glob("GSE1-*.GPL1.table.npz"))) == 1
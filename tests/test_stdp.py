@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from src.snn.simulation import Trainer, SNNNetwork, BatchedSNNNetwork
+from src.stdp.generalized_stdp import CausalSTDP
+
+
+def random_spike_trains(n_genes: int, duration_ms: float, seed: int = 0, n_silent: int = 0):
+    rng = np.random.default_rng(seed)
+    trains = [
+        np.sort(rng.choice(int(duration_ms), size=rng.integers(5, 40), replace=False)).astype(float)
+        for _ in range(n_genes - n_silent)
+    ]
+    return trains + [np.zeros(0) for _ in range(n_silent)]
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_event_driven_training_matches_dense_loop(dtype):
+    n_genes, duration = 30, 400.0
+    # Some genes never spike, and spikes at or after duration_ms must be ignored
+    spikes = random_spike_trains(n_genes, duration, n_silent=3)
+    spikes[0] = np.append(spikes[0], [duration, duration + 5])
+
+    dense = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=duration, event_driven=False)
+    events = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=duration, event_driven=True)
+
+    assert events.dtype == dtype
+    assert np.any(dense != 0)
+    assert np.array_equal(events, dense)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_event_driven_training_without_spikes(dtype):
+    n_genes = 8
+    spikes = [np.zeros(0) for _ in range(n_genes)]
+
+    dense = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=100.0, event_driven=False)
+    events = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=100.0, event_driven=True)
+
+    assert np.array_equal(events, dense)
+    assert not np.any(events)
+
+
+@pytest.mark.parametrize("window", [4, 16])
+def test_windowed_stdp_matches_per_event_training(window):
+    n_genes, duration = 30, 400.0
+    spikes = random_spike_trains(n_genes, duration, seed=1)
+
+    exact = Trainer(n_genes).train_cohort(spikes, duration_ms=duration, stdp_window=1)
+    windowed = Trainer(n_genes).train_cohort(spikes, duration_ms=duration, stdp_window=window)
+
+    # No weight saturates at this learning rate: equal up to summation order
+    assert np.abs(exact).max() < 1.0
+    np.testing.assert_allclose(windowed, exact, rtol=1e-10, atol=1e-12)
+
+
+def random_window(rng, k, n, lr):
+    stdp = CausalSTDP(learning_rate=lr)
+    weights = rng.uniform(-0.9, 0.9, size=(n, n))
+    spikes = rng.random((k, n)) < 0.2
+    pre_traces = rng.uniform(0, 3, size=(k, n))
+    post_traces = rng.uniform(0, 3, size=(k, n))
+    return stdp, weights, spikes, pre_traces, post_traces
+
+
+@pytest.mark.parametrize("lr", [0.01, 0.2])
+def test_process_window_within_documented_tolerance(lr):
+    rng = np.random.default_rng(2)
+    k, n = 8, 20
+    stdp, weights, spikes, pre_traces, post_traces = random_window(rng, k, n, lr)
+
+    per_event = weights.copy()
+    for t in range(k):
+        stdp.process_event(per_event, pre_traces[t], post_traces[t], spikes[t], spikes[t])
+    windowed = stdp.process_window(weights.copy(), pre_traces, post_traces, spikes, spikes)
+
+    assert windowed.min() >= stdp.w_min and windowed.max() <= stdp.w_max
+    max_trace = max(pre_traces.max(), post_traces.max())
+    bound = k * lr * max(stdp.A_plus, stdp.A_minus) * max_trace
+    if lr == 0.2:
+        # Large steps saturate weights mid-window; the documented bound applies
+        assert np.any(np.abs(per_event) == 1.0)
+        assert np.abs(windowed - per_event).max() <= bound
+    else:
+        np.testing.assert_allclose(windowed, per_event, rtol=1e-12, atol=1e-14)
+
+
+@pytest.mark.parametrize("lr", [0.01, 0.2])
+def test_batched_window_clip_matches_touched_clip(lr):
+    # The batched path clips the whole stack, the 2-D path only touched rows/columns;
+    # both agree because untouched entries are already within bounds.
+    rng = np.random.default_rng(3)
+    k, n = 8, 20
+    stdp, weights, spikes, pre_traces, post_traces = random_window(rng, k, n, lr)
+
+    single = stdp.process_window(weights.copy(), pre_traces, post_traces, spikes, spikes)
+    batched = stdp.process_window(weights.copy()[None], pre_traces[None], post_traces[None],
+                                  spikes[None], spikes[None])[0]
+
+    np.testing.assert_allclose(batched, single, rtol=1e-12, atol=1e-14)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_parallel_training_matches_per_cohort_training(dtype):
+    n_genes, duration = 20, 300.0
+    cohorts = [random_spike_trains(n_genes, duration, seed=s) for s in range(4)]
+    cohorts.append([np.zeros(0) for _ in range(n_genes)])
+
+    stacked = Trainer(n_genes, dtype=dtype).train_parallel(cohorts, duration_ms=duration)
+
+    assert stacked.shape == (len(cohorts), n_genes, n_genes)
+    for b, spikes in enumerate(cohorts):
+        single = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=duration)
+        assert np.array_equal(stacked[b], single)
+
+
+def test_batched_network_step_matches_single_networks():
+    rng = np.random.default_rng(4)
+    n_batch, n_genes, n_steps = 3, 12, 50
+    spikes = rng.random((n_steps, n_batch, n_genes)) < 0.1
+
+    batched = BatchedSNNNetwork(n_batch, n_genes)
+    singles = [SNNNetwork(n_genes) for _ in range(n_batch)]
+    for t in range(n_steps):
+        batched.step(spikes[t])
+        for b, network in enumerate(singles):
+            network.step(spikes[t, b])
+
+    for b, network in enumerate(singles):
+        assert np.array_equal(batched.weights[b], network.weights)
+        assert np.array_equal(batched.pre_traces[b], network.pre_traces)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_closed_form_decay_within_rounding(dtype):
+    n_genes, duration = 30, 2000.0
+    eps = np.finfo(dtype).eps
+    # Sparse trains: long silent gaps between spikes
+    spikes = random_spike_trains(n_genes, duration, seed=5)
+
+    network = SNNNetwork(n_genes, dtype=dtype)
+    network.pre_traces[:] = np.linspace(0.1, 3.0, n_genes)
+    stepped = network.pre_traces.copy()
+    network.advance(300, exact=False)
+    for _ in range(300):
+        stepped *= dtype(1 - network.trace_decay)
+    # One rounding per multiply: relative error at most ~n_steps * eps
+    np.testing.assert_allclose(network.pre_traces, stepped, rtol=300 * eps, atol=0)
+
+    exact = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=duration)
+    closed = Trainer(n_genes, dtype=dtype).train_cohort(spikes, duration_ms=duration, exact_decay=False)
+    assert np.any(exact != 0)
+    np.testing.assert_allclose(closed, exact, rtol=0, atol=16 * eps)
+
+    parallel = Trainer(n_genes, dtype=dtype).train_parallel([spikes], duration_ms=duration, exact_decay=False)
+    np.testing.assert_allclose(parallel[0], exact, rtol=0, atol=16 * eps)